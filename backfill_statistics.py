@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Заполнение таблицы statistics (дневные сводки) по истории переводов,
+пользователям и подпискам.
+
+При обновлении базы сводки заполняются автоматически (миграция 3);
+скрипт пересчитывает их заново (или с --days N только последние дни).
+Запускайте при остановленном боте.
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add bot directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from bot.database import Database
+
+async def backfill(days: int = None):
+    db = Database()
+    await db.init()
+    try:
+        since = date.today() - timedelta(days=days - 1) if days else None
+        written = await db.stats.backfill(since)
+        print(f"✅ Пересчитано дней: {written}" + (f" (с {since})" if since else ""))
+
+        recent = await db.stats.get_days(date.today() - timedelta(days=6), date.today())
+        for row in recent:
+            print(f"   {row['date']}: пользователей {row['total_users']} (+{row['new_users']}), "
+                  f"активных {row['active_users']}, переводов {row['total_translations']}, "
+                  f"оплат {row['payments']} на {row['revenue'] or 0:.0f} ₽")
+        print("⚠️ Переводы считаются по translation_history: старые записи сверх "
+              "MAX_HISTORY_ITEMS и пользователи без истории не учитываются")
+    finally:
+        await db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill daily statistics rollups")
+    parser.add_argument('--days', type=int, default=None,
+                        help="only rebuild the last N days (default: all)")
+    asyncio.run(backfill(parser.parse_args().days))
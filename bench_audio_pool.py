@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark: latency of a simulated text-message handler while voice messages
+are being processed, with pydub running inline in the coroutine (the old
+VoiceService) vs. in the audio worker pool from bot.services.audio_pool
+
+Uses WAV input so it runs without ffmpeg; speed adjustment stands in for
+the decode/transcode work done on real voice messages.
+"""
+
+import asyncio
+import io
+import math
+import statistics
+import struct
+import sys
+import time
+import wave
+from pathlib import Path
+
+# Add bot directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from bot.services import audio_pool as audio_jobs
+from bot.services.audio_pool import AudioWorkerPool
+
+VOICE_MESSAGES = 6
+VOICE_SECONDS = 20
+TEXT_INTERVAL = 0.01  # a text message every 10 ms
+
+def make_wav(seconds: int, rate: int = 16000) -> bytes:
+    """Mono 16-bit sine tone, roughly what a Telegram voice note decodes to"""
+    frames = b''.join(
+        struct.pack('<h', int(12000 * math.sin(2 * math.pi * 440 * i / rate)))
+        for i in range(seconds * rate)
+    )
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(frames)
+    return buffer.getvalue()
+
+async def text_traffic(stop: asyncio.Event, latencies: list):
+    """Handle a 'text message' every TEXT_INTERVAL and record how late it was served"""
+    while not stop.is_set():
+        scheduled = time.perf_counter()
+        await asyncio.sleep(TEXT_INTERVAL)
+        latencies.append((time.perf_counter() - scheduled - TEXT_INTERVAL) * 1000)
+
+async def measure(label: str, voice_job):
+    latencies = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(text_traffic(stop, latencies))
+
+    started = time.perf_counter()
+    await asyncio.gather(*[voice_job() for _ in range(VOICE_MESSAGES)])
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await ticker
+
+    latencies.sort()
+    p50 = statistics.median(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    worst = latencies[-1]
+    print(f"{label:<14} voice batch {elapsed:5.2f} s   text delay p50 {p50:7.1f} ms"
+          f"   p99 {p99:7.1f} ms   max {worst:7.1f} ms")
+    return p99
+
+async def main():
+    audio = make_wav(VOICE_SECONDS)
+    print(f"📊 {VOICE_MESSAGES} voice messages x {VOICE_SECONDS} s, "
+          f"text message every {TEXT_INTERVAL * 1000:.0f} ms\n")
+
+    async def inline_job():
+        # What VoiceService did before: pydub directly inside the coroutine
+        audio_jobs.change_speed(audio, 1.25, 'wav', 'wav')
+
+    pool = AudioWorkerPool(workers=2, max_queue=VOICE_MESSAGES)
+    pool.start()
+    # Warm up the worker processes so spawn time isn't measured
+    await asyncio.gather(*[pool.run(audio_jobs.duration, audio, 'wav') for _ in range(pool.workers)])
+
+    async def pool_job():
+        await pool.run(audio_jobs.change_speed, audio, 1.25, 'wav', 'wav')
+
+    try:
+        inline = await measure("inline pydub", inline_job)
+        pooled = await measure("worker pool", pool_job)
+        print(f"\n🚀 Text p99 delay: {inline:.1f} ms -> {pooled:.1f} ms")
+        print(f"📈 Pool stats: {pool.stats()}")
+    finally:
+        pool.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
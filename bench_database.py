@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark: get_user throughput with pooled connections vs. a fresh
+aiosqlite.connect() per call (the pre-pool behaviour)
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import aiosqlite
+
+# Add bot directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from bot.database import Database
+
+USERS = 200
+CALLS = 5000
+CONCURRENCY = 50
+
+async def get_user_per_call(db_path: str, user_id: int):
+    """Old behaviour: open and close a connection for every query"""
+    async with aiosqlite.connect(db_path) as conn:
+        conn.row_factory = aiosqlite.Row
+        cursor = await conn.execute('''
+            SELECT u.*, s.auto_voice, s.save_history, s.notifications_enabled,
+                   s.voice_speed, s.voice_type
+            FROM users u
+            LEFT JOIN user_settings s ON u.user_id = s.user_id
+            WHERE u.user_id = ?
+        ''', (user_id,))
+        row = await cursor.fetchone()
+        return dict(row) if row else None
+
+async def run(label: str, fetch) -> float:
+    """Run CALLS lookups with CONCURRENCY workers and return calls/sec"""
+    queue = asyncio.Queue()
+    for i in range(CALLS):
+        queue.put_nowait(i % USERS + 1)
+
+    async def worker():
+        while not queue.empty():
+            user_id = queue.get_nowait()
+            assert await fetch(user_id) is not None
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    elapsed = time.perf_counter() - started
+
+    rate = CALLS / elapsed
+    print(f"{label:<28} {rate:>10.0f} calls/sec  ({elapsed:.2f}s for {CALLS} calls)")
+    return rate
+
+async def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        db = Database(db_path)
+        await db.init()
+        for user_id in range(1, USERS + 1):
+            await db.add_user(user_id, f"user{user_id}", "Bench", "User")
+
+        print(f"📊 get_user benchmark: {CALLS} calls, {CONCURRENCY} concurrent, {USERS} users\n")
+
+        baseline = await run("connect() per call", lambda uid: get_user_per_call(db_path, uid))
+        pooled = await run(f"pool (size={db.pool.size})", db.get_user)
+
+        print(f"\n🚀 Speedup: {pooled / baseline:.1f}x")
+        await db.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: translation history writes on the response path (SELECT,
+INSERT, full prune and a commit per entry - the pre-writer behaviour)
+vs. the background HistoryWriter
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add bot directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from bot.database import Database
+from config import config
+
+USERS = 100
+ENTRIES = 5000
+CONCURRENCY = 50
+
+async def add_inline(db: Database, user_id: int, text: str):
+    """Old behaviour: everything before the handler can reply"""
+    async with db.pool.acquire() as conn:
+        cursor = await conn.execute('SELECT save_history FROM user_settings WHERE user_id = ?', (user_id,))
+        row = await cursor.fetchone()
+        if row and row[0]:
+            await conn.execute('''
+                INSERT INTO translation_history (
+                    user_id, source_text, source_language, translated_text,
+                    target_language, translation_style, is_voice
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (user_id, text, 'ru', text, 'en', 'informal', False))
+            await conn.execute(db.history.PRUNE_SQL, (user_id, user_id, config.MAX_HISTORY_ITEMS))
+            await conn.commit()
+
+async def add_queued(db: Database, user_id: int, text: str):
+    await db.add_translation_history(user_id, text, 'ru', text, 'en', 'informal', False)
+
+async def run(label: str, db: Database, add) -> float:
+    """Add ENTRIES with CONCURRENCY workers; returns the mean caller-side latency"""
+    queue = asyncio.Queue()
+    for i in range(ENTRIES):
+        queue.put_nowait(i)
+    latencies = []
+
+    async def worker():
+        while not queue.empty():
+            i = queue.get_nowait()
+            started = time.perf_counter()
+            await add(db, i % USERS + 1, f"Текст номер {i} для истории переводов")
+            latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(0)  # a handler does other I/O between translations
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    await db.history.close()
+    elapsed = time.perf_counter() - started
+
+    mean = sum(latencies) / len(latencies)
+    print(f"{label:<22} caller {mean * 1e6:>8.0f} µs/entry   total {ENTRIES / elapsed:>8.0f} entries/sec")
+    return mean
+
+async def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for label, add in (("inline (old)", add_inline), ("HistoryWriter", add_queued)):
+            db = Database(os.path.join(tmp, f"{add.__name__}.db"))
+            await db.init()
+            for user_id in range(1, USERS + 1):
+                await db.add_user(user_id, f"user{user_id}", "Bench", "User")
+            results[label] = await run(label, db, add)
+            if add is add_queued:
+                stats = db.history.stats()
+                print(f"{'':<22} {stats['batches']} batches, avg {stats['avg_batch']}, "
+                      f"max {stats['max_batch']}, flush p95 {stats['flush_latency']['p95_ms']} ms")
+            await db.close()
+
+        print(f"\n🚀 Caller-side speedup: {results['inline (old)'] / results['HistoryWriter']:.0f}x")
+
+if __name__ == "__main__":
+    print(f"📊 History write benchmark: {ENTRIES} entries, {CONCURRENCY} concurrent, {USERS} users\n")
+    asyncio.run(main())
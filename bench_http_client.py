@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-request latency against a local stub HTTP server with a new
+aiohttp.ClientSession per request (the old per-message services) vs. the
+shared session from bot.services.http_client
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from aiohttp import web
+import aiohttp
+
+# Add bot directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from bot.services.http_client import HttpClients
+
+REQUESTS = 500
+
+async def start_stub_server():
+    """Local stand-in for a translation API"""
+    async def translate(request):
+        await request.read()
+        return web.json_response({"translations": [{"text": "привет"}]})
+
+    app = web.Application()
+    app.router.add_post('/v2/translate', translate)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/v2/translate"
+
+async def request_with_new_session(url: str):
+    async with aiohttp.ClientSession() as session:
+        async with session.post(url, data={"text": "hello"}) as response:
+            return await response.json()
+
+async def request_with_shared_session(clients: HttpClients, url: str):
+    async with clients.session.post(url, data={"text": "hello"}) as response:
+        return await response.json()
+
+async def measure(label: str, call):
+    latencies = []
+    for _ in range(REQUESTS):
+        started = time.perf_counter()
+        await call()
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    latencies.sort()
+    mean = statistics.mean(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:<22} mean {mean:6.2f} ms   p95 {p95:6.2f} ms")
+    return mean
+
+async def main():
+    runner, url = await start_stub_server()
+    clients = HttpClients()
+
+    print(f"📊 {REQUESTS} sequential requests to {url}\n")
+    try:
+        fresh = await measure("new session/request", lambda: request_with_new_session(url))
+        shared = await measure("shared session", lambda: request_with_shared_session(clients, url))
+        print(f"\n🚀 Saved per request: {fresh - shared:.2f} ms ({fresh / shared:.1f}x faster)")
+        print("ℹ️  Plain HTTP on loopback; real APIs also save the TLS handshake and DNS lookup")
+    finally:
+        await clients.close()
+        await runner.cleanup()
+
+if __name__ == "__main__":
+    asyncio.run(main())
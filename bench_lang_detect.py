@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark: accuracy and throughput of source-language detection engines
+(bot.services.lang_detect) over the bundled corpus in bench_data/ - twelve
+phrases and sentences in each of the 26 supported languages
+
+"short" is text of at most 20 characters. "fallback" is the share of texts
+below LANG_DETECT_MIN_CONFIDENCE, left to the provider to detect.
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add bot directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from config import config
+from bot.services.lang_detect import ENGINES, LanguageDetector
+
+CORPUS_PATH = Path(__file__).parent / 'bench_data' / 'lang_corpus.json'
+SHORT_CHARS = 20
+ROUNDS = 20
+
+def load_corpus():
+    corpus = json.loads(CORPUS_PATH.read_text(encoding='utf-8'))
+    missing = set(config.SUPPORTED_LANGUAGES) - set(corpus)
+    assert not missing, f"corpus lacks {sorted(missing)}"
+    return [(lang, text) for lang, texts in corpus.items() for text in texts]
+
+def evaluate(engine, samples):
+    """Accuracy figures from one pass over the corpus"""
+    correct = short_correct = short_total = fallback = wrong_confident = 0
+    per_language = {}
+    for lang, text in samples:
+        detected, confidence = engine.detect(text)
+        hit = detected == lang
+        correct += hit
+        per_language.setdefault(lang, [0, 0])
+        per_language[lang][0] += hit
+        per_language[lang][1] += 1
+        if len(text) <= SHORT_CHARS:
+            short_total += 1
+            short_correct += hit
+        if confidence < config.LANG_DETECT_MIN_CONFIDENCE:
+            fallback += 1
+        elif not hit:
+            wrong_confident += 1
+
+    return {
+        'accuracy': correct / len(samples),
+        'short_accuracy': short_correct / short_total,
+        'fallback': fallback / len(samples),
+        'wrong_confident': wrong_confident / len(samples),
+        'worst': sorted(per_language.items(), key=lambda item: item[1][0] / item[1][1])[:3]
+    }
+
+def throughput(detect, samples, rounds=ROUNDS):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for _, text in samples:
+            detect(text)
+    elapsed = time.perf_counter() - started
+    return rounds * len(samples) / elapsed
+
+def main():
+    samples = load_corpus()
+    print(f"📊 {len(samples)} texts in {len(config.SUPPORTED_LANGUAGES)} languages, "
+          f"min confidence {config.LANG_DETECT_MIN_CONFIDENCE}\n")
+    print(f"{'engine':<11} {'load':>8} {'accuracy':>9} {'short':>7} {'fallback':>9} "
+          f"{'wrong*':>7} {'texts/s':>9} {'memo texts/s':>13}")
+
+    for name, engine_class in ENGINES.items():
+        engine = engine_class()
+        started = time.perf_counter()
+        engine.load()
+        load_ms = (time.perf_counter() - started) * 1000
+
+        result = evaluate(engine, samples)
+        raw = throughput(engine.detect, samples)
+        detector = LanguageDetector(engine)
+        memoized = throughput(detector.detect, samples)
+
+        print(f"{name:<11} {load_ms:>5.0f} ms {result['accuracy']:>8.1%} {result['short_accuracy']:>6.1%} "
+              f"{result['fallback']:>8.1%} {result['wrong_confident']:>6.1%} {raw:>9.0f} {memoized:>13.0f}")
+        worst = ', '.join(f"{lang} {hits}/{total}" for lang, (hits, total) in result['worst'])
+        print(f"{'':<11} worst: {worst}")
+
+    print("\n* wrong and above the confidence threshold (not left to the provider)")
+
+if __name__ == "__main__":
+    main()
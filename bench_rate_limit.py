@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-update cost of the previous full-scan throttling vs. the
+token-bucket RateLimiter (bot.utils.rate_limit) with 1k, 10k and 100k
+active users
+
+Each run first gives every user one request, then times a stream of
+updates from random users while the clock advances, so buckets keep
+filling up and expiring.
+"""
+
+import asyncio
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add bot directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from bot.utils.rate_limit import MemoryBackend
+
+USERS = (1_000, 10_000, 100_000)
+UPDATES = 20_000
+RATE, PER = 10, 60
+
+class FullScanThrottle:
+    """The previous ThrottlingMiddleware logic: fixed windows, cleanup scans all keys"""
+
+    def __init__(self, rate: int, per: int):
+        self.rate = rate
+        self.per = per
+        self.storage = {}
+
+    def hit(self, key: str, now: float) -> bool:
+        stale = [k for k, data in self.storage.items() if now - data['window_start'] > self.per * 2]
+        for k in stale:
+            del self.storage[k]
+
+        data = self.storage.get(key)
+        if data and now - data['window_start'] < self.per:
+            if data['count'] >= self.rate:
+                return False
+            data['count'] += 1
+        else:
+            self.storage[key] = {'window_start': now, 'count': 1}
+        return True
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def run(users: int, updates: int, make_hit):
+    """Microseconds per update; the clock moves 1 ms per update"""
+    clock = FakeClock()
+    fill, hit = make_hit(clock)
+    for user in range(users):
+        fill(f"throttle:{user}")
+
+    rng = random.Random(users)
+    keys = [f"throttle:{rng.randrange(users)}" for _ in range(updates)]
+    started = time.perf_counter()
+    for key in keys:
+        clock.now += 0.001
+        hit(key)
+    return (time.perf_counter() - started) / updates * 1e6
+
+def legacy(clock):
+    throttle = FullScanThrottle(RATE, PER)
+
+    def fill(key):
+        throttle.storage[key] = {'window_start': clock(), 'count': 1}
+
+    return fill, lambda key: throttle.hit(key, clock())
+
+def bucket(clock):
+    backend = MemoryBackend(timer=clock)
+
+    def hit(key):
+        backend.hit_now(key, RATE, PER, clock())
+
+    return hit, hit
+
+def bytes_per_user(users: int = 100_000) -> float:
+    backend = MemoryBackend(timer=lambda: 0.0)
+    keys = [f"throttle:{user}" for user in range(users)]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for key in keys:
+        backend.hit_now(key, RATE, PER, 0.0)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / users
+
+async def check_async_path():
+    backend = MemoryBackend()
+    result = await backend.hit("throttle:1", RATE, PER)
+    assert result.allowed and result.remaining == RATE - 1
+
+def main():
+    asyncio.run(check_async_path())
+    print(f"📊 {UPDATES} updates from random users, limit {RATE}/{PER}s\n")
+    print(f"{'users':>8}  {'full scan':>12}  {'token bucket':>13}")
+    for users in USERS:
+        # The full scan is too slow to replay every update at 100k users
+        scan_updates = max(200, UPDATES * 1_000 // users)
+        scan = run(users, scan_updates, legacy)
+        wheel = run(users, UPDATES, bucket)
+        print(f"{users:>8}  {scan:>9.1f} µs  {wheel:>10.2f} µs")
+
+    print(f"\n💾 token bucket state: {bytes_per_user():.0f} bytes per active user "
+          f"(incl. key string and wheel slot)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark: time-to-first-audio and total time of whole-text synthesis vs.
+sentence-chunked streaming TTS (VoiceService.generate_speech_stream) for
+100-, 500- and 2000-character inputs
+
+gTTS is replaced by a stub with Google's latency profile: one ~150 ms
+request per 100 characters, made one after another.
+"""
+
+import asyncio
+import math
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add bot directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from config import config
+from bot.services import audio_pool as audio_jobs
+from bot.services import tts_cache as tts_cache_module
+from bot.services.audio_pool import audio_pool
+from bot.services.voice import VoiceService, tts_stream_stats
+
+REQUEST_SECONDS = 0.15
+SIZES = (100, 500, 2000)
+SENTENCE = "the quick brown fox jumps over the lazy dog. "
+
+async def stub_gtts(text: str, language: str = 'en', speed: float = 1.0) -> bytes:
+    """Sequential 100-character requests, like gTTS"""
+    for _ in range(math.ceil(len(text) / 100)):
+        await asyncio.sleep(REQUEST_SECONDS)
+    return b'\xff\xfb' + text.encode('utf-8')
+
+def make_text(size: int, run: int) -> str:
+    """Distinct sentences, unique per run, so no chunk is served from the TTS cache"""
+    sentences = []
+    while sum(len(sentence) for sentence in sentences) < size:
+        sentences.append(f"Run {run}, sentence {len(sentences)}: {SENTENCE}")
+    return ''.join(sentences)[:size]
+
+async def main():
+    config.OPENAI_API_KEY = None
+    config.ELEVENLABS_API_KEY = None
+    tts_cache_module.tts_cache.__init__(path=tempfile.mkdtemp())
+
+    service = VoiceService()
+    service.generate_speech_gtts = stub_gtts
+
+    # Start the audio workers so process spawn time isn't measured
+    try:
+        await audio_pool.run(audio_jobs.stitch_to_opus, [], 'mp3')
+    except Exception:
+        pass
+
+    print(f"📊 gTTS stub: {REQUEST_SECONDS * 1000:.0f} ms per 100 characters, "
+          f"{config.TTS_STREAM_CHUNK_CHARS}-char chunks, {config.TTS_USER_CONCURRENCY} per user\n")
+    print(f"{'chars':>6}  {'whole text':>22}  {'streaming':>22}")
+    print(f"{'':>6}  {'first audio':>11} {'total':>10}  {'first audio':>11} {'total':>10}")
+
+    try:
+        for run, size in enumerate(SIZES):
+            started = time.perf_counter()
+            await stub_gtts(make_text(size, run), 'en')
+            whole = time.perf_counter() - started
+
+            started = time.perf_counter()
+            audio = await service.generate_speech_stream(make_text(size, run + 100), 'en', user_id=1)
+            streamed = time.perf_counter() - started
+            assert audio
+            first_audio = tts_stream_stats['ttfb']._samples[-1]
+
+            # Whole-text synthesis has nothing to play until it is completely done
+            print(f"{size:>6}  {whole * 1000:>8.0f} ms {whole * 1000:>7.0f} ms"
+                  f"  {first_audio * 1000:>8.0f} ms {streamed * 1000:>7.0f} ms")
+    finally:
+        audio_pool.close()
+
+    if tts_stream_stats['joined_mp3']:
+        print("\nℹ️  ffmpeg not found: chunks were joined as MP3 instead of stitched to OGG/Opus")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-voice-message wall time, memory and file I/O of the old
+temp-file pipeline (download -> NamedTemporaryFile -> aiofiles re-read ->
+BytesIO) vs. the in-memory VoiceService pipeline, against a local stub
+file server and a stub Whisper client that consumes the upload
+"""
+
+import asyncio
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from aiohttp import web
+import aiofiles
+
+# Add bot directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from bot.services.http_client import http_clients
+from bot.services.voice import VoiceService
+
+MESSAGES = 200
+VOICE_BYTES = 256 * 1024  # ~1 min of Opus at 32 kbit/s
+
+class StubTranscriptions:
+    """Reads the uploaded file completely, as the HTTP client would"""
+
+    async def create(self, model, file, response_format):
+        name, content = file if isinstance(file, tuple) else (file.name, file)
+        data = content.read() if hasattr(content, 'read') else content
+        return f"{len(data)} bytes of {Path(name).suffix}"
+
+class StubOpenAI:
+    def __init__(self):
+        self.audio = type('Audio', (), {'transcriptions': StubTranscriptions()})()
+
+async def start_stub_server(payload: bytes):
+    """Local stand-in for api.telegram.org/file"""
+    async def voice_file(request):
+        return web.Response(body=payload, content_type='audio/ogg')
+
+    app = web.Application()
+    app.router.add_get('/file/voice.oga', voice_file)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/file/voice.oga"
+
+async def temp_file_pipeline(service: VoiceService, url: str):
+    """What process_voice_message did before"""
+    audio_data = await service.download_voice_message(url, 'token')
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.ogg') as tmp_file:
+        tmp_file.write(audio_data)
+        tmp_path = tmp_file.name
+
+    async with aiofiles.open(tmp_path, 'rb') as audio_file:
+        data = await audio_file.read()
+    audio_file = io.BytesIO(data)
+    audio_file.name = Path(tmp_path).name
+    text = await service.openai_client.audio.transcriptions.create(
+        model='whisper-1', file=audio_file, response_format='text'
+    )
+    os.remove(tmp_path)
+    return text
+
+async def in_memory_pipeline(service: VoiceService, url: str):
+    """The current process_voice_message path after bot.get_file()"""
+    audio = await service.download_voice_buffer(url)
+    with audio:
+        return await service.transcribe_audio(audio, 'voice.oga')
+
+def io_counters():
+    """Bytes passed through read()/write() syscalls by this process (Linux only)"""
+    try:
+        with open('/proc/self/io') as f:
+            fields = dict(line.split(': ') for line in f.read().splitlines())
+        return int(fields['rchar']), int(fields['wchar'])
+    except OSError:
+        return 0, 0
+
+async def measure(label: str, pipeline, service: VoiceService, url: str):
+    await pipeline(service, url)  # warm-up
+
+    timings = []
+    tracemalloc.start()
+    read_before, written_before = io_counters()
+    for _ in range(MESSAGES):
+        started = time.perf_counter()
+        await pipeline(service, url)
+        timings.append((time.perf_counter() - started) * 1000)
+    read_after, written_after = io_counters()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    read_kb = (read_after - read_before) / MESSAGES / 1024
+    written_kb = (written_after - written_before) / MESSAGES / 1024
+    print(f"{label:<16} {statistics.mean(timings):6.2f} ms/msg   peak alloc {peak / 1024:7.0f} KB"
+          f"   syscall read {read_kb:6.0f} KB/msg   write {written_kb:6.0f} KB/msg")
+    return statistics.mean(timings)
+
+async def main():
+    payload = os.urandom(VOICE_BYTES)
+    runner, url = await start_stub_server(payload)
+
+    service = VoiceService()
+    service.openai_client = StubOpenAI()
+
+    print(f"📊 {MESSAGES} voice messages of {VOICE_BYTES // 1024} KB each")
+    print("ℹ️  syscall bytes count file read()/write() only, not socket recv/send\n")
+    try:
+        async with service:
+            old = await measure("temp files", temp_file_pipeline, service, url)
+            new = await measure("in memory", in_memory_pipeline, service, url)
+        print(f"\n🚀 {old:.2f} -> {new:.2f} ms per voice message ({old / new:.1f}x faster)")
+    finally:
+        await http_clients.close()
+        await runner.cleanup()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,19 +1,819 @@
 import asyncio
 import aiosqlite
-from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any, NamedTuple
 from pathlib import Path
 import json
+import logging
+import time
 from config import config
+from bot.utils import metrics
+from bot.utils.cache import TTLCache
+from bot.utils.latency import LatencyWindow
+
+logger = logging.getLogger(__name__)
+
+# Schema migrations applied on top of the base tables created in Database.init().
+# The applied version is tracked in PRAGMA user_version - only ever append entries.
+MIGRATIONS = [
+    (1, "Enable WAL journaling", [
+        "PRAGMA journal_mode=WAL",
+    ]),
+    (2, "Indexes for history, statistics and subscription queries", [
+        "CREATE INDEX IF NOT EXISTS idx_history_user_created ON translation_history (user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_history_created ON translation_history (created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_subscriptions_created ON subscriptions (created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_subscriptions_user ON subscriptions (user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_users_last_translation ON users (last_translation_date)",
+    ]),
+    (3, "Daily statistics rollups", [
+        "ALTER TABLE statistics ADD COLUMN new_users INTEGER DEFAULT 0",
+        "ALTER TABLE statistics ADD COLUMN payments INTEGER DEFAULT 0",
+        """CREATE TABLE IF NOT EXISTS daily_active_users (
+            date DATE NOT NULL,
+            user_id INTEGER NOT NULL,
+            PRIMARY KEY (date, user_id)
+        ) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS idx_users_premium ON users (is_premium, premium_until)",
+    ]),
+    (4, "Outbound notification queue", [
+        """CREATE TABLE IF NOT EXISTS outbound_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_outbound_due ON outbound_messages (next_attempt_at)",
+    ]),
+    (5, "One subscription per payment", [
+        # Keep the first row of payments that were stored twice
+        """DELETE FROM subscriptions WHERE payment_id IS NOT NULL AND id NOT IN (
+            SELECT MIN(id) FROM subscriptions WHERE payment_id IS NOT NULL GROUP BY payment_id
+        )""",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_subscriptions_payment ON subscriptions (payment_id)",
+    ]),
+]
+
+class ConnectionPool:
+    """Fixed-size pool of long-lived aiosqlite connections.
+
+    Connections are opened lazily up to ``size`` and handed out one coroutine
+    at a time, so a transaction never interleaves with another caller's.
+    """
+
+    def __init__(self, db_path: str, size: int = None):
+        self.db_path = db_path
+        self.size = max(1, size or config.DATABASE_POOL_SIZE)
+        self._slots = asyncio.Semaphore(self.size)
+        self._idle: List[aiosqlite.Connection] = []
+        self._opened = 0
+        self._closed = False
+
+    async def _open(self) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(self.db_path)
+        conn.row_factory = aiosqlite.Row
+        # Per-connection tuning; journal_mode=WAL is persistent and set by a migration
+        await conn.execute('PRAGMA synchronous = NORMAL')
+        await conn.execute(f'PRAGMA cache_size = -{config.DATABASE_CACHE_SIZE_KB}')
+        await conn.execute(f'PRAGMA mmap_size = {config.DATABASE_MMAP_SIZE}')
+        await conn.execute('PRAGMA temp_store = MEMORY')
+        self._opened += 1
+        return conn
+
+    async def _discard(self, conn: aiosqlite.Connection):
+        self._opened -= 1
+        try:
+            await conn.close()
+        except Exception as e:
+            logger.error(f"Error closing database connection: {e}")
+
+    async def _release(self, conn: aiosqlite.Connection):
+        try:
+            if conn.in_transaction:
+                # Never hand a half-finished transaction to the next caller
+                await conn.rollback()
+        except asyncio.CancelledError:
+            self._opened -= 1
+            asyncio.ensure_future(conn.close())
+            raise
+        except Exception as e:
+            logger.error(f"Dropping broken database connection: {e}")
+            await self._discard(conn)
+            return
+
+        if self._closed:
+            await self._discard(conn)
+        else:
+            self._idle.append(conn)
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Borrow a connection for the duration of the ``async with`` block"""
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+
+        async with self._slots:
+            conn = self._idle.pop() if self._idle else await self._open()
+            try:
+                yield conn
+            finally:
+                await self._release(conn)
+
+    async def close(self):
+        """Close idle connections; borrowed ones are closed when released"""
+        self._closed = True
+        while self._idle:
+            await self._discard(self._idle.pop())
+
+    def stats(self) -> Dict[str, int]:
+        """Pool occupancy for monitoring"""
+        return {
+            'size': self.size,
+            'opened': self._opened,
+            'idle': len(self._idle),
+            'in_use': self._opened - len(self._idle)
+        }
+
+class QuotaReservation(NamedTuple):
+    allowed: bool
+    remaining: int   # free translations left after this one, -1 for unlimited
+    charged: bool    # a free unit was taken and is returned by refund()
+    user_id: int
+    day: str
+
+class QuotaEngine:
+    """Daily free-translation quota: reserve a unit before translating,
+    then commit it on success or refund it on failure.
+
+    The check and the consumption are one UPDATE ... RETURNING statement, so
+    concurrent messages (from any process sharing the database) can never
+    take more than FREE_DAILY_LIMIT units. The same statement resets the
+    counter on a new day and clears an expired premium flag.
+
+    Premium users are passed on their cached profile (Database.get_user)
+    without touching the database while premium_until lies ahead. Users
+    found to be out of quota are remembered for a short while, so
+    repeated messages are refused without a query. total_translations is
+    not needed for the decision; committed units are added up in memory
+    and written behind in one executemany every ``flush_interval`` seconds.
+    """
+
+    # Premium that hasn't expired; the free counter is left alone
+    PREMIUM_VALID = "(is_premium = 1 AND (premium_until IS NULL OR premium_until >= :now))"
+
+    RESERVE_SQL = f'''
+        UPDATE users SET
+            is_premium = 0,
+            free_translations_today = CASE
+                WHEN last_translation_date IS NULL OR last_translation_date < :today THEN 1
+                ELSE free_translations_today + 1
+            END,
+            last_translation_date = :today
+        WHERE user_id = :user_id AND NOT {PREMIUM_VALID}
+          AND (last_translation_date IS NULL OR last_translation_date < :today
+               OR free_translations_today < :limit)
+        RETURNING free_translations_today
+    '''
+
+    def __init__(self, database: 'Database', flush_interval: float = None, exhausted_ttl: int = None):
+        self.database = database
+        self.flush_interval = (flush_interval if flush_interval is not None
+                               else config.QUOTA_FLUSH_INTERVAL)
+        # user_id -> day the free quota ran out
+        self._exhausted = TTLCache(config.USER_CACHE_SIZE, exhausted_ttl or config.QUOTA_EXHAUSTED_TTL)
+        self._pending: Dict[int, int] = {}  # user_id -> committed units not yet written
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_lock = asyncio.Lock()
+        self._tasks = set()
+
+        self.reserved = 0
+        self.refused = 0
+        self.refused_cached = 0
+        self.premium_cached = 0
+        self.refunded = 0
+        self.flushes = 0
+
+    async def reserve(self, user_id: int) -> QuotaReservation:
+        """Take one free unit, or pass a premium user; refused when out of quota"""
+        now = datetime.now()
+        today = now.date().isoformat()
+        limit = config.FREE_DAILY_LIMIT
+
+        if self._exhausted.get(user_id) == today:
+            self.refused_cached += 1
+            return QuotaReservation(False, 0, False, user_id, today)
+
+        user = await self.database.get_user(user_id)
+        if user is None:
+            self.refused += 1
+            return QuotaReservation(False, 0, False, user_id, today)
+        if self._premium_valid(user, now):
+            self.premium_cached += 1
+            return QuotaReservation(True, -1, False, user_id, today)
+
+        async with self.database.pool.acquire() as db:
+            cursor = await db.execute(self.RESERVE_SQL, {
+                'user_id': user_id, 'today': today, 'now': now.isoformat(' '), 'limit': limit
+            })
+            row = await cursor.fetchone()
+            await db.commit()
+
+            if row is None:
+                # Out of quota, or premium bought since the profile was cached
+                cursor = await db.execute(f'''
+                    SELECT {self.PREMIUM_VALID} FROM users WHERE user_id = :user_id
+                ''', {'user_id': user_id, 'now': now.isoformat(' ')})
+                status = await cursor.fetchone()
+
+        if row is not None:
+            used = row[0]
+            self.reserved += 1
+            self.database._patch_cached_user(user_id, is_premium=False, free_translations_today=used,
+                                             last_translation_date=today)
+            if used >= limit:
+                self._exhausted.set(user_id, today)
+            return QuotaReservation(True, limit - used, True, user_id, today)
+
+        if status is not None and status[0]:
+            self.database._invalidate_user(user_id)
+            return QuotaReservation(True, -1, False, user_id, today)
+
+        self.refused += 1
+        if status is not None:
+            self._exhausted.set(user_id, today)
+        return QuotaReservation(False, 0, False, user_id, today)
+
+    @staticmethod
+    def _premium_valid(user: Dict[str, Any], now: datetime) -> bool:
+        """PREMIUM_VALID on a cached profile"""
+        if not user.get('is_premium'):
+            return False
+        until = user.get('premium_until')
+        return until is None or str(until) >= now.isoformat(' ')
+
+    async def refund(self, reservation: QuotaReservation):
+        """Give back a unit whose translation failed (same day only)"""
+        if not reservation.charged:
+            return
+
+        async with self.database.pool.acquire() as db:
+            cursor = await db.execute('''
+                UPDATE users SET free_translations_today = free_translations_today - 1
+                WHERE user_id = ? AND last_translation_date = ? AND free_translations_today > 0
+                RETURNING free_translations_today
+            ''', (reservation.user_id, reservation.day))
+            row = await cursor.fetchone()
+            await db.commit()
+
+        self.refunded += 1
+        self._exhausted.pop(reservation.user_id)
+        if row is not None:
+            self.database._patch_cached_user(reservation.user_id, free_translations_today=row[0])
+
+    def commit(self, user_id: int):
+        """Count a finished translation in total_translations (written behind)"""
+        self._pending[user_id] = self._pending.get(user_id, 0) + 1
+
+        cached = self.database.user_cache.peek(user_id)
+        if cached is not None:
+            self.database._patch_cached_user(
+                user_id, total_translations=(cached.get('total_translations') or 0) + 1
+            )
+
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                self.flush_interval, self._schedule_flush
+            )
+
+    def pending(self, user_id: int) -> int:
+        """Committed units of a user not yet written to the database"""
+        return self._pending.get(user_id, 0)
+
+    def forget(self, user_id: int):
+        """Drop the out-of-quota mark, e.g. after the user bought premium"""
+        self._exhausted.pop(user_id)
+
+    def _schedule_flush(self):
+        self._flush_handle = None
+        task = asyncio.ensure_future(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self):
+        """Write the pending total_translations increments in one batch"""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            now = datetime.now()
+            try:
+                async with self.database.pool.acquire() as db:
+                    await db.executemany('''
+                        UPDATE users
+                        SET total_translations = total_translations + ?, updated_at = ?
+                        WHERE user_id = ?
+                    ''', [(count, now, user_id) for user_id, count in pending.items()])
+                    await db.commit()
+                self.flushes += 1
+            except Exception as e:
+                # Keep the counts for the next flush
+                for user_id, count in pending.items():
+                    self._pending[user_id] = self._pending.get(user_id, 0) + count
+                logger.error(f"Quota counter flush failed ({len(pending)} users): {e}")
+
+    async def close(self):
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'reserved': self.reserved,
+            'refused': self.refused,
+            'refused_cached': self.refused_cached,
+            'premium_cached': self.premium_cached,
+            'refunded': self.refunded,
+            'pending_users': len(self._pending),
+            'flushes': self.flushes
+        }
+
+class HistoryWriter:
+    """Writes translation history in the background, off the response path.
+
+    Entries go through a bounded asyncio queue and are written in batches
+    of up to ``batch_size`` - one executemany and one commit per batch, at
+    most ``flush_interval`` seconds after the first entry. The
+    user_settings.save_history check is part of the INSERT.
+
+    Pruning is amortized: a user's history is trimmed to MAX_HISTORY_ITEMS
+    only after ``prune_slack`` new entries, so it holds at most
+    MAX_HISTORY_ITEMS + prune_slack rows (get_user_history reads the newest).
+    The counts since the last prune live in a bounded TTLCache; a user
+    without one (new, idle or from before a restart) is trimmed on the
+    next write.
+
+    When the queue is full, ``policy`` decides: 'spill' writes the entry
+    right away on the caller's time, 'drop' discards it.
+    """
+
+    INSERT_SQL = '''
+        INSERT INTO translation_history (
+            user_id, source_text, source_language, translated_text,
+            target_language, translation_style, is_voice, created_at
+        )
+        SELECT ?, ?, ?, ?, ?, ?, ?, ?
+        WHERE (SELECT save_history FROM user_settings WHERE user_id = ?)
+    '''
+
+    PRUNE_SQL = '''
+        DELETE FROM translation_history
+        WHERE user_id = ? AND id NOT IN (
+            SELECT id FROM translation_history
+            WHERE user_id = ?
+            ORDER BY created_at DESC
+            LIMIT ?
+        )
+    '''
+
+    def __init__(self, database: 'Database', batch_size: int = None, flush_interval: float = None,
+                 queue_size: int = None, policy: str = None, prune_slack: int = None):
+        self.database = database
+        self.batch_size = batch_size or config.HISTORY_BATCH_SIZE
+        self.flush_interval = (flush_interval if flush_interval is not None
+                               else config.HISTORY_FLUSH_INTERVAL)
+        self.queue_size = queue_size or config.HISTORY_QUEUE_SIZE
+        self.policy = policy or config.HISTORY_QUEUE_POLICY
+        self.prune_slack = prune_slack or config.HISTORY_PRUNE_SLACK
+        self._queue: Optional[asyncio.Queue] = None  # created in the running loop
+        self._batch: List[tuple] = []  # taken from the queue, not yet written
+        self._writing = 0  # entries in a write that hasn't committed yet
+        self._worker: Optional[asyncio.Task] = None
+        self._write_lock = asyncio.Lock()
+        # user_id -> entries written since the last prune
+        self._unpruned = TTLCache(config.USER_CACHE_SIZE, config.HISTORY_PRUNE_TTL)
+
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.failed = 0
+        self.batches = 0
+        self.max_batch = 0
+        self.prunes = 0
+        self.latency = LatencyWindow()
+
+    @property
+    def pending(self) -> int:
+        """Entries accepted but not yet written"""
+        return len(self._batch) + self._writing + (self._queue.qsize() if self._queue else 0)
+
+    async def add(self, user_id: int, source_text: str, source_language: str,
+                  translated_text: str, target_language: str, style: str, is_voice: bool):
+        # Same format as the column's CURRENT_TIMESTAMP default
+        created_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        entry = (user_id, source_text, source_language, translated_text,
+                 target_language, style, is_voice, created_at, user_id)
+
+        if self._queue is None:
+            self._queue = asyncio.Queue(self.queue_size)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.ensure_future(self._run())
+
+        try:
+            self._queue.put_nowait(entry)
+            self.queued += 1
+        except asyncio.QueueFull:
+            if self.policy == 'drop':
+                self.dropped += 1
+                logger.warning(f"History queue full, entry of user {user_id} dropped")
+            else:
+                self.spilled += 1
+                await self._write([entry])
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            entry = await self._queue.get()
+            if entry is None:
+                return
+            self._batch.append(entry)
+
+            deadline = loop.time() + self.flush_interval
+            stop = False
+            while len(self._batch) < self.batch_size:
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), deadline - loop.time())
+                except asyncio.TimeoutError:
+                    break
+                if entry is None:
+                    stop = True
+                    break
+                self._batch.append(entry)
+
+            batch, self._batch = self._batch, []
+            await self._write(batch)
+            if stop:
+                return
+
+    async def flush(self):
+        """Write everything accepted so far"""
+        if self._queue is not None:
+            while True:
+                try:
+                    entry = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if entry is None:
+                    # Leave the stop marker for the worker
+                    self._queue.put_nowait(None)
+                    break
+                self._batch.append(entry)
+
+        batch, self._batch = self._batch, []
+        if batch:
+            await self._write(batch)
+        elif self._writing:
+            # Wait for the worker's batch to commit
+            async with self._write_lock:
+                pass
+
+    async def _write(self, batch: List[tuple]):
+        """One transaction: the inserts, then the prunes they made due"""
+        counts: Dict[int, int] = {}
+        for entry in batch:
+            counts[entry[0]] = counts.get(entry[0], 0) + 1
+
+        started = time.monotonic()
+        self._writing += len(batch)
+        try:
+            async with self._write_lock:
+                due = []
+                for user_id, count in counts.items():
+                    unpruned = self._unpruned.peek(user_id)
+                    if unpruned is None or unpruned + count >= self.prune_slack:
+                        due.append(user_id)
+                async with self.database.pool.acquire() as db:
+                    await db.executemany(self.INSERT_SQL, batch)
+                    if due:
+                        await db.executemany(self.PRUNE_SQL, [
+                            (user_id, user_id, config.MAX_HISTORY_ITEMS) for user_id in due
+                        ])
+                    await db.commit()
+
+                for user_id, count in counts.items():
+                    unpruned = 0 if user_id in due else (self._unpruned.peek(user_id) or 0) + count
+                    self._unpruned.set(user_id, unpruned)
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"History write failed ({len(batch)} entries): {e}")
+            return
+        finally:
+            self._writing -= len(batch)
+
+        self.prunes += len(due)
+        self.latency.record(time.monotonic() - started)
+        self.batches += 1
+        self.written += len(batch)
+        self.max_batch = max(self.max_batch, len(batch))
+
+    async def close(self):
+        """Write what is queued and stop the worker (call on shutdown)"""
+        if self._worker is not None and not self._worker.done():
+            await self._queue.put(None)
+            await self._worker
+        self._worker = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'queued': self.queued,
+            'pending': self.pending,
+            'written': self.written,
+            'dropped': self.dropped,
+            'spilled': self.spilled,
+            'failed': self.failed,
+            'batches': self.batches,
+            'avg_batch': round(self.written / self.batches, 2) if self.batches else 0.0,
+            'max_batch': self.max_batch,
+            'prunes': self.prunes,
+            'tracked_users': len(self._unpruned),
+            'flush_latency': self.latency.stats()
+        }
+
+class StatsRollup:
+    """Daily statistics maintained from events instead of table scans.
+
+    Translations, signups and payments bump in-memory counters that are
+    added to the day's ``statistics`` row every ``flush_interval`` seconds
+    (an upsert, so several processes can share the table). Active users
+    are collected per day in ``daily_active_users``. total_users is the
+    running sum of new_users, so reads touch one row per day.
+
+    Rows for days before the rollup existed come from backfill(), which
+    runs once when migration 3 is applied (backfill_statistics.py rebuilds
+    them by hand).
+    """
+
+    COUNTERS = ('new_users', 'total_translations', 'voice_translations', 'payments', 'revenue')
+
+    UPSERT_SQL = '''
+        INSERT INTO statistics (date, new_users, total_translations, voice_translations, payments, revenue)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (date) DO UPDATE SET
+            new_users = new_users + excluded.new_users,
+            total_translations = total_translations + excluded.total_translations,
+            voice_translations = voice_translations + excluded.voice_translations,
+            payments = payments + excluded.payments,
+            revenue = revenue + excluded.revenue
+    '''
+
+    # Derived columns of one day's row
+    REFRESH_SQL = '''
+        UPDATE statistics SET
+            active_users = (SELECT COUNT(*) FROM daily_active_users WHERE date = :day),
+            total_users = (SELECT SUM(new_users) FROM statistics WHERE date <= :day)
+        WHERE date = :day
+    '''
+
+    def __init__(self, database: 'Database', flush_interval: float = None):
+        self.database = database
+        self.flush_interval = (flush_interval if flush_interval is not None
+                               else config.STATS_FLUSH_INTERVAL)
+        self._counts: Dict[str, Dict[str, float]] = {}  # day -> counter -> delta
+        self._active: Dict[str, set] = {}  # day -> user ids
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_lock = asyncio.Lock()
+        self._tasks = set()
+
+        self.events = 0
+        self.flushes = 0
+        self.flush_errors = 0
+
+    @staticmethod
+    def _today() -> str:
+        return date.today().isoformat()
+
+    def record(self, user_id: int = None, **deltas):
+        """Add to today's counters; user_id marks the user active today"""
+        day = self._today()
+        counts = self._counts.setdefault(day, dict.fromkeys(self.COUNTERS, 0))
+        for name, value in deltas.items():
+            counts[name] += value
+        if user_id is not None:
+            self._active.setdefault(day, set()).add(user_id)
+        self.events += 1
+
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                self.flush_interval, self._schedule_flush
+            )
+
+    def record_translation(self, user_id: int, is_voice: bool = False):
+        self.record(user_id, total_translations=1, voice_translations=int(bool(is_voice)))
+
+    def _schedule_flush(self):
+        self._flush_handle = None
+        task = asyncio.ensure_future(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self):
+        """Add the pending counters to the statistics rows"""
+        async with self._flush_lock:
+            counts, self._counts = self._counts, {}
+            active, self._active = self._active, {}
+            if not counts:
+                return
+
+            today = self._today()
+            try:
+                async with self.database.pool.acquire() as db:
+                    await db.executemany(self.UPSERT_SQL, [
+                        (day, *(values[name] for name in self.COUNTERS))
+                        for day, values in counts.items()
+                    ])
+                    await db.executemany(
+                        'INSERT OR IGNORE INTO daily_active_users (date, user_id) VALUES (?, ?)',
+                        [(day, user_id) for day, users in active.items() for user_id in users]
+                    )
+                    for day in sorted(counts):
+                        await db.execute(self.REFRESH_SQL, {'day': day})
+                    await db.execute('UPDATE statistics SET premium_users = ? WHERE date = ?',
+                                     (await self._premium_count(db), today))
+                    # Finished days keep their count in statistics.active_users
+                    await db.execute('DELETE FROM daily_active_users WHERE date < ?',
+                                     ((date.today() - timedelta(days=1)).isoformat(),))
+                    await db.commit()
+                self.flushes += 1
+            except Exception as e:
+                self.flush_errors += 1
+                # Keep the counts for the next flush
+                for day, values in counts.items():
+                    merged = self._counts.setdefault(day, dict.fromkeys(self.COUNTERS, 0))
+                    for name, value in values.items():
+                        merged[name] += value
+                for day, users in active.items():
+                    self._active.setdefault(day, set()).update(users)
+                logger.error(f"Statistics flush failed: {e}")
+
+    @staticmethod
+    async def _premium_count(db: aiosqlite.Connection) -> int:
+        cursor = await db.execute('''
+            SELECT COUNT(*) FROM users
+            WHERE is_premium = 1 AND (premium_until IS NULL OR premium_until > ?)
+        ''', (datetime.now(),))
+        return (await cursor.fetchone())[0]
+
+    async def get_days(self, start: date, end: date) -> List[Dict[str, Any]]:
+        """statistics rows for start..end inclusive, oldest first"""
+        await self.flush()
+        async with self.database.pool.acquire() as db:
+            cursor = await db.execute('''
+                SELECT date, total_users, new_users, active_users, premium_users,
+                       total_translations, voice_translations, payments, revenue
+                FROM statistics
+                WHERE date >= ? AND date <= ?
+                ORDER BY date
+            ''', (start.isoformat(), end.isoformat()))
+            return [dict(row) for row in await cursor.fetchall()]
+
+    async def total_users(self) -> int:
+        await self.flush()
+        async with self.database.pool.acquire() as db:
+            cursor = await db.execute('SELECT COALESCE(SUM(new_users), 0) FROM statistics')
+            return (await cursor.fetchone())[0]
+
+    async def backfill(self, since: date = None) -> int:
+        """Rebuild the rows of days from ``since`` (all days if None) from the base tables.
+
+        Translation counts can only be as complete as translation_history,
+        which keeps MAX_HISTORY_ITEMS per user and nothing for users with
+        history turned off. Returns the number of days written.
+        """
+        await self.flush()
+        # The base tables store CURRENT_TIMESTAMP (UTC); events are counted in local days
+        bound = (since - timedelta(days=1)).isoformat() if since else ''
+        days: Dict[str, Dict[str, float]] = {}
+
+        def day_counts(day: str) -> Dict[str, float]:
+            return days.setdefault(day, dict.fromkeys(self.COUNTERS + ('active_users',), 0))
+
+        async with self.database.pool.acquire() as db:
+            cursor = await db.execute('''
+                SELECT DATE(created_at, 'localtime') AS day, COUNT(*), SUM(is_voice = 1),
+                       COUNT(DISTINCT user_id)
+                FROM translation_history WHERE created_at >= ? GROUP BY day
+            ''', (bound,))
+            for day, translations, voice, active in await cursor.fetchall():
+                counts = day_counts(day)
+                counts['total_translations'], counts['voice_translations'] = translations, voice or 0
+                counts['active_users'] = active
+
+            cursor = await db.execute('''
+                SELECT DATE(created_at, 'localtime') AS day, COUNT(*)
+                FROM users WHERE created_at >= ? GROUP BY day
+            ''', (bound,))
+            for day, new_users in await cursor.fetchall():
+                day_counts(day)['new_users'] = new_users
+
+            cursor = await db.execute('''
+                SELECT DATE(created_at, 'localtime') AS day, COUNT(*), SUM(amount)
+                FROM subscriptions WHERE created_at >= ? AND status = 'active' GROUP BY day
+            ''', (bound,))
+            for day, payments, revenue in await cursor.fetchall():
+                counts = day_counts(day)
+                counts['payments'], counts['revenue'] = payments, revenue or 0
+
+            if since:
+                days = {day: counts for day, counts in days.items() if day >= since.isoformat()}
+
+            await db.executemany('''
+                INSERT INTO statistics (date, new_users, total_translations, voice_translations,
+                                        payments, revenue, active_users)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (date) DO UPDATE SET
+                    new_users = excluded.new_users,
+                    total_translations = excluded.total_translations,
+                    voice_translations = excluded.voice_translations,
+                    payments = excluded.payments,
+                    revenue = excluded.revenue,
+                    active_users = excluded.active_users
+            ''', [(day, *(counts[name] for name in self.COUNTERS), counts['active_users'])
+                  for day, counts in days.items()])
+            await db.execute('''
+                UPDATE statistics SET total_users = (
+                    SELECT SUM(new_users) FROM statistics AS earlier WHERE earlier.date <= statistics.date
+                )
+            ''')
+            await db.execute('UPDATE statistics SET premium_users = ? WHERE date = ?',
+                             (await self._premium_count(db), self._today()))
+            await db.commit()
+        return len(days)
+
+    async def close(self):
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'events': self.events,
+            'pending_days': len(self._counts),
+            'flushes': self.flushes,
+            'flush_errors': self.flush_errors
+        }
 
 class Database:
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, pool_size: int = None):
         self.db_path = db_path or config.DATABASE_PATH
         Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.pool = ConnectionPool(self.db_path, pool_size)
+        # Joined users/user_settings rows keyed by user_id
+        self.user_cache = TTLCache(config.USER_CACHE_SIZE, config.USER_CACHE_TTL)
+        self.quota = QuotaEngine(self)
+        self.history = HistoryWriter(self)
+        self.stats = StatsRollup(self)
+
+    def _invalidate_user(self, user_id: int):
+        """Drop a cached profile after a write the cache can't mirror"""
+        self.user_cache.pop(user_id)
+
+    def _patch_cached_user(self, user_id: int, **fields):
+        """Write-through: apply written columns to a cached profile as SQLite returns them"""
+        cached = self.user_cache.peek(user_id)
+        if cached is None:
+            return
+
+        for key, value in fields.items():
+            if isinstance(value, bool):
+                value = int(value)
+            elif isinstance(value, datetime):
+                value = value.isoformat(' ')
+            elif hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            cached[key] = value
+
+    async def close(self):
+        """Close pooled connections (call on shutdown)"""
+        await self.quota.close()
+        await self.history.close()
+        await self.stats.close()
+        try:
+            async with self.pool.acquire() as db:
+                # Refresh query planner statistics for tables that changed a lot
+                await db.execute('PRAGMA optimize')
+        except Exception as e:
+            logger.error(f"PRAGMA optimize failed: {e}")
+        await self.pool.close()
 
     async def init(self):
         """Initialize database tables"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.acquire() as db:
             # Users table
             await db.execute('''
                 CREATE TABLE IF NOT EXISTS users (
@@ -99,6 +899,34 @@ class Database:
 
             await db.commit()
 
+            cursor = await db.execute('PRAGMA user_version')
+            previous = (await cursor.fetchone())[0]
+            version = await self.migrate(db)
+
+        if previous < 3 <= version:
+            # Existing data predates the statistics rollup
+            days = await self.stats.backfill()
+            logger.info(f"Statistics rollup backfilled for {days} days")
+
+    async def migrate(self, db: aiosqlite.Connection) -> int:
+        """Apply pending schema migrations and return the resulting version"""
+        cursor = await db.execute('PRAGMA user_version')
+        current = (await cursor.fetchone())[0]
+
+        for version, description, statements in MIGRATIONS:
+            if version <= current:
+                continue
+
+            for statement in statements:
+                await db.execute(statement)
+            await db.execute(f'PRAGMA user_version = {version}')
+            await db.commit()
+
+            current = version
+            logger.info(f"Applied database migration {version}: {description}")
+
+        return current
+
     async def add_user(self, user_id: int, username: str = None, first_name: str = None,
                       last_name: str = None, language_code: str = 'ru') -> bool:
         """Add new user or update existing"""
@@ -109,10 +937,12 @@ class Database:
         premium_status = is_admin  # Admin automatically gets premium
         premium_until = datetime.now() + timedelta(days=36500) if is_admin else None  # 100 years for admin
 
-        async with aiosqlite.connect(self.db_path) as db:
-            # Check if user exists
-            cursor = await db.execute('SELECT user_id, target_language FROM users WHERE user_id = ?', (user_id,))
-            existing_user = await cursor.fetchone()
+        async with self.pool.acquire() as db:
+            # Check if user exists (a cached profile proves it without a query)
+            existing_user = self.user_cache.peek(user_id)
+            if existing_user is None:
+                cursor = await db.execute('SELECT user_id, target_language FROM users WHERE user_id = ?', (user_id,))
+                existing_user = await cursor.fetchone()
 
             if existing_user:
                 # User exists - update without changing target_language
@@ -132,6 +962,7 @@ class Database:
                     ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 ''', (user_id, username, first_name, last_name, language_code,
                      language_code, 'en', premium_status, premium_until, datetime.now()))
+                self.stats.record(new_users=1)
 
             # Initialize user settings
             await db.execute('''
@@ -139,12 +970,22 @@ class Database:
             ''', (user_id,))
 
             await db.commit()
-            return True
+
+        if existing_user:
+            self._patch_cached_user(
+                user_id, username=username, first_name=first_name, last_name=last_name,
+                language_code=language_code, interface_language=language_code,
+                is_premium=premium_status, premium_until=premium_until
+            )
+        return True
 
     async def get_user(self, user_id: int) -> Optional[Dict[str, Any]]:
         """Get user information"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        cached = self.user_cache.get(user_id)
+        if cached is not None:
+            return dict(cached)
+
+        async with self.pool.acquire() as db:
             cursor = await db.execute('''
                 SELECT u.*, s.auto_voice, s.save_history, s.notifications_enabled,
                        s.voice_speed, s.voice_type
@@ -153,130 +994,60 @@ class Database:
                 WHERE u.user_id = ?
             ''', (user_id,))
             row = await cursor.fetchone()
-            return dict(row) if row else None
+
+        if not row:
+            return None
+
+        user = dict(row)
+        user['total_translations'] = (user['total_translations'] or 0) + self.quota.pending(user_id)
+        self.user_cache.set(user_id, dict(user))
+        return user
 
     async def update_user_language(self, user_id: int, target_language: str) -> bool:
         """Update user's target translation language"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.acquire() as db:
             await db.execute('''
                 UPDATE users
                 SET target_language = ?, updated_at = ?
                 WHERE user_id = ?
             ''', (target_language, datetime.now(), user_id))
             await db.commit()
+            self._invalidate_user(user_id)
             return True
 
     async def update_user_style(self, user_id: int, style: str) -> bool:
         """Update user's translation style"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.acquire() as db:
             await db.execute('''
                 UPDATE users
                 SET translation_style = ?, updated_at = ?
                 WHERE user_id = ?
             ''', (style, datetime.now(), user_id))
             await db.commit()
-            return True
-
-    async def check_daily_limit(self, user_id: int) -> tuple[bool, int]:
-        """Check if user has reached daily translation limit"""
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute('''
-                SELECT is_premium, free_translations_today, last_translation_date,
-                       premium_until
-                FROM users WHERE user_id = ?
-            ''', (user_id,))
-            row = await cursor.fetchone()
-
-            if not row:
-                return False, 0
-
-            is_premium, translations_today, last_date, premium_until = row
-
-            # Check if premium is still valid
-            if is_premium and premium_until:
-                premium_until = datetime.fromisoformat(premium_until)
-                if premium_until < datetime.now():
-                    # Premium expired
-                    await db.execute('''
-                        UPDATE users SET is_premium = 0 WHERE user_id = ?
-                    ''', (user_id,))
-                    await db.commit()
-                    is_premium = False
-
-            # Premium users have unlimited translations
-            if is_premium:
-                return True, -1
-
-            # Reset counter if it's a new day
-            today = datetime.now().date()
-            if last_date:
-                last_date = datetime.fromisoformat(last_date).date()
-                if last_date < today:
-                    translations_today = 0
-                    await db.execute('''
-                        UPDATE users
-                        SET free_translations_today = 0, last_translation_date = ?
-                        WHERE user_id = ?
-                    ''', (today, user_id))
-                    await db.commit()
-
-            remaining = config.FREE_DAILY_LIMIT - translations_today
-            return remaining > 0, remaining
-
-    async def increment_translation_count(self, user_id: int) -> bool:
-        """Increment user's translation count"""
-        async with aiosqlite.connect(self.db_path) as db:
-            today = datetime.now().date()
-            await db.execute('''
-                UPDATE users
-                SET free_translations_today = free_translations_today + 1,
-                    total_translations = total_translations + 1,
-                    last_translation_date = ?,
-                    updated_at = ?
-                WHERE user_id = ?
-            ''', (today, datetime.now(), user_id))
-            await db.commit()
+            self._invalidate_user(user_id)
             return True
 
     async def add_translation_history(self, user_id: int, source_text: str,
                                      source_language: str, translated_text: str,
                                      target_language: str, style: str = 'informal',
                                      is_voice: bool = False) -> bool:
-        """Add translation to history"""
-        async with aiosqlite.connect(self.db_path) as db:
-            # Check if history saving is enabled
-            cursor = await db.execute('''
-                SELECT save_history FROM user_settings WHERE user_id = ?
-            ''', (user_id,))
-            row = await cursor.fetchone()
+        """Add translation to history (written in the background by HistoryWriter)"""
+        self.stats.record_translation(user_id, is_voice)
 
-            if row and row[0]:
-                await db.execute('''
-                    INSERT INTO translation_history (
-                        user_id, source_text, source_language, translated_text,
-                        target_language, translation_style, is_voice
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (user_id, source_text, source_language, translated_text,
-                     target_language, style, is_voice))
-
-                # Clean old history (keep only last MAX_HISTORY_ITEMS)
-                await db.execute('''
-                    DELETE FROM translation_history
-                    WHERE user_id = ? AND id NOT IN (
-                        SELECT id FROM translation_history
-                        WHERE user_id = ?
-                        ORDER BY created_at DESC
-                        LIMIT ?
-                    )
-                ''', (user_id, user_id, config.MAX_HISTORY_ITEMS))
-
-                await db.commit()
+        # Skip users who turned history off; the INSERT checks again for uncached ones
+        cached = self.user_cache.peek(user_id)
+        if cached is not None and not cached.get('save_history'):
             return True
 
+        await self.history.add(user_id, source_text, source_language, translated_text,
+                               target_language, style, is_voice)
+        return True
+
     async def get_user_history(self, user_id: int, limit: int = 10) -> List[Dict[str, Any]]:
         """Get user's translation history"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        if self.history.pending:
+            await self.history.flush()
+        async with self.pool.acquire() as db:
             cursor = await db.execute('''
                 SELECT * FROM translation_history
                 WHERE user_id = ?
@@ -288,7 +1059,9 @@ class Database:
 
     async def clear_user_history(self, user_id: int) -> bool:
         """Clear user's translation history"""
-        async with aiosqlite.connect(self.db_path) as db:
+        if self.history.pending:
+            await self.history.flush()
+        async with self.pool.acquire() as db:
             await db.execute('''
                 DELETE FROM translation_history WHERE user_id = ?
             ''', (user_id,))
@@ -298,21 +1071,23 @@ class Database:
     async def activate_subscription(self, user_id: int, subscription_type: str,
                                    payment_id: str, amount: float) -> bool:
         """Activate user's premium subscription"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.acquire() as db:
             now = datetime.now()
             if subscription_type == 'monthly':
                 expires_at = now + timedelta(days=30)
             else:  # yearly
                 expires_at = now + timedelta(days=365)
 
-            # Add subscription record
-            await db.execute('''
+            # Add subscription record (the webhook may have stored this payment already)
+            cursor = await db.execute('''
                 INSERT INTO subscriptions (
                     user_id, subscription_type, amount, payment_id,
                     status, started_at, expires_at
                 ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (payment_id) DO NOTHING
             ''', (user_id, subscription_type, amount, payment_id,
                  'active', now, expires_at))
+            recorded = cursor.rowcount == 1
 
             # Update user premium status
             await db.execute('''
@@ -322,55 +1097,35 @@ class Database:
             ''', (expires_at, user_id))
 
             await db.commit()
+            self._invalidate_user(user_id)
+            self.quota.forget(user_id)
+            if recorded:
+                self.stats.record(payments=1, revenue=amount)
             return True
 
     async def get_statistics(self, date: datetime = None) -> Dict[str, Any]:
-        """Get statistics for a specific date or today"""
+        """Get statistics for a specific date or today (from the daily rollup)"""
         if not date:
             date = datetime.now().date()
+        day = date.date() if isinstance(date, datetime) else date
 
-        async with aiosqlite.connect(self.db_path) as db:
-            # Get user statistics
-            cursor = await db.execute('''
-                SELECT
-                    COUNT(*) as total_users,
-                    SUM(CASE WHEN last_translation_date = ? THEN 1 ELSE 0 END) as active_users,
-                    SUM(CASE WHEN is_premium = 1 THEN 1 ELSE 0 END) as premium_users
-                FROM users
-            ''', (date,))
-            user_stats = await cursor.fetchone()
-
-            # Get translation statistics
-            cursor = await db.execute('''
-                SELECT
-                    COUNT(*) as total_translations,
-                    SUM(CASE WHEN is_voice = 1 THEN 1 ELSE 0 END) as voice_translations
-                FROM translation_history
-                WHERE DATE(created_at) = ?
-            ''', (date,))
-            trans_stats = await cursor.fetchone()
-
-            # Get revenue
-            cursor = await db.execute('''
-                SELECT SUM(amount) as revenue
-                FROM subscriptions
-                WHERE DATE(created_at) = ? AND status = 'active'
-            ''', (date,))
-            revenue = await cursor.fetchone()
-
-            return {
-                'date': date,
-                'total_users': user_stats[0] or 0,
-                'active_users': user_stats[1] or 0,
-                'premium_users': user_stats[2] or 0,
-                'total_translations': trans_stats[0] or 0,
-                'voice_translations': trans_stats[1] or 0,
-                'revenue': revenue[0] or 0
-            }
+        rows = await self.stats.get_days(day, day)
+        row = rows[0] if rows else {}
+        return {
+            'date': date,
+            'total_users': row.get('total_users') or 0,
+            'new_users': row.get('new_users') or 0,
+            'active_users': row.get('active_users') or 0,
+            'premium_users': row.get('premium_users') or 0,
+            'total_translations': row.get('total_translations') or 0,
+            'voice_translations': row.get('voice_translations') or 0,
+            'payments': row.get('payments') or 0,
+            'revenue': row.get('revenue') or 0
+        }
 
     async def update_user_settings(self, user_id: int, **settings) -> bool:
         """Update user settings"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.acquire() as db:
             valid_settings = ['auto_voice', 'save_history', 'notifications_enabled',
                             'voice_speed', 'voice_type']
             updates = []
@@ -390,18 +1145,19 @@ class Database:
                 '''
                 await db.execute(query, values)
                 await db.commit()
+                self._invalidate_user(user_id)
             return True
 
     async def get_user_count(self) -> int:
         """Get total user count"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.acquire() as db:
             cursor = await db.execute('SELECT COUNT(*) FROM users')
             result = await cursor.fetchone()
             return result[0] if result else 0
 
     async def get_premium_user_count(self) -> int:
         """Get premium user count"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.acquire() as db:
             cursor = await db.execute('''
                 SELECT COUNT(*) FROM users
                 WHERE is_premium = 1 AND (premium_until IS NULL OR premium_until > ?)
@@ -410,22 +1166,54 @@ class Database:
             return result[0] if result else 0
 
     async def update_user_subscription(self, user_id: int, is_premium: bool,
-                                     subscription_type: str, subscription_end: float):
-        """Update user subscription status"""
+                                     subscription_type: str, subscription_end: float,
+                                     payment_id: str = None, amount: float = None):
+        """Update user subscription status.
+
+        With ``payment_id`` a subscriptions row is stored for the payment and
+        its ``amount`` counted in the daily statistics, unless the payment was
+        stored already (by activate_subscription() or an earlier delivery).
+        Returns False for such a repeated payment; errors are raised.
+        """
+        now = datetime.now()
         premium_until = datetime.fromtimestamp(subscription_end) if subscription_end else None
 
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.acquire() as db:
             try:
+                recorded = False
+                if is_premium and payment_id:
+                    cursor = await db.execute('''
+                        INSERT INTO subscriptions (
+                            user_id, subscription_type, amount, payment_id,
+                            status, started_at, expires_at
+                        ) VALUES (?, ?, ?, ?, 'active', ?, ?)
+                        ON CONFLICT (payment_id) DO NOTHING
+                    ''', (user_id, subscription_type, amount, payment_id, now, premium_until))
+                    recorded = cursor.rowcount == 1
+                    if not recorded:
+                        return False
+
                 await db.execute('''
                     UPDATE users
                     SET is_premium = ?, premium_until = ?, updated_at = ?
                     WHERE user_id = ?
-                ''', (is_premium, premium_until, datetime.now(), user_id))
+                ''', (is_premium, premium_until, now, user_id))
                 await db.commit()
+                self._invalidate_user(user_id)
+                self.quota.forget(user_id)
+
+                if recorded and amount:
+                    self.stats.record(payments=1, revenue=amount)
                 return True
             except Exception as e:
-                print(f"Error updating subscription: {e}")
-                return False
+                logger.error(f"Error updating subscription: {e}")
+                raise
 
 # Create global database instance
-db = Database()
\ No newline at end of file
+db = Database()
+
+metrics.register('db_pool', db.pool.stats)
+metrics.register('user_cache', db.user_cache.stats)
+metrics.register('quota', db.quota.stats)
+metrics.register('history_writer', db.history.stats)
+metrics.register('stats_rollup', db.stats.stats)
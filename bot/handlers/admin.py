@@ -5,15 +5,17 @@ from aiogram.types import Message, CallbackQuery
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
+from datetime import date, timedelta
 
 from bot.middlewares.admin import is_admin
-from bot.database import Database
+from bot.database import db
+from bot.services.circuit_breaker import provider_breakers
+from bot.services.translation_cache import translation_cache
 from config import config
 import os
 import logging
 
 router = Router()
-db = Database()
 logger = logging.getLogger(__name__)
 
 class AdminStates(StatesGroup):
@@ -165,9 +167,28 @@ async def admin_stats(message: Message):
         return
 
     try:
-        # Get stats from database
-        total_users = await db.get_user_count()
+        # Get stats from the daily rollup (one row per day, no table scans)
+        total_users = await db.stats.total_users()
         premium_users = await db.get_premium_user_count()
+        today = date.today()
+        week = await db.stats.get_days(today - timedelta(days=6), today)
+        today_stats = week[-1] if week and week[-1]['date'] == today.isoformat() else {}
+        user_cache = db.user_cache.stats()
+        trans_cache = translation_cache.stats()
+
+        breaker_states = {
+            'closed': '🟢 работает',
+            'half_open': '🟡 проверка',
+            'open': '🔴 отключен'
+        }
+        providers_text = ""
+        for name, breaker in provider_breakers.items():
+            stats = breaker.stats()
+            p50 = f"{stats['p50_ms']:.0f} мс" if stats['p50_ms'] is not None else "—"
+            providers_text += (f"• {name}: {breaker_states.get(stats['state'], stats['state'])}, "
+                               f"ошибок {stats['error_rate']:.0%}, p50 {p50}\n")
+        if not providers_text:
+            providers_text = "• Нет данных\n"
 
         stats_text = f"""
 📊 **Статистика бота**
@@ -175,14 +196,25 @@ async def admin_stats(message: Message):
 👥 **Пользователи:**
 • Всего: {total_users}
 • Премиум: {premium_users}
-• Обычные: {total_users - premium_users}
+• Обычные: {max(total_users - premium_users, 0)}
 
+📈 **Сегодня:**
+• Новых пользователей: {today_stats.get('new_users') or 0}
+• Активных: {today_stats.get('active_users') or 0}
+• Переводов: {today_stats.get('total_translations') or 0} (голосовых {today_stats.get('voice_translations') or 0})
+• Оплат: {today_stats.get('payments') or 0} на {today_stats.get('revenue') or 0:.0f} ₽
+• Переводов за 7 дней: {sum(day['total_translations'] or 0 for day in week)}
+
+🌐 **Провайдеры перевода:**
+{providers_text}
 💳 **Платежная система:**
 • Статус: {'✅ Настроена' if config.YOOKASSA_SHOP_ID != 'your_shop_id' else '❌ Не настроена'}
 
 🔧 **Система:**
 • Версия Python: 3.11
 • База данных: SQLite
+• Кэш профилей: {user_cache['size']} записей, попаданий {user_cache['hit_ratio']:.0%}
+• Кэш переводов: попаданий {trans_cache['hit_ratio']:.0%}, память {trans_cache['bytes_memory'] // 1024} КБ, диск {trans_cache['bytes_disk'] // 1024} КБ
 • Админ ID: {config.ADMIN_ID}
 """
 
@@ -7,9 +7,12 @@ import logging
 from bot.database import db
 from bot.keyboards.inline import get_main_menu_keyboard, get_translation_actions_keyboard
 from bot.keyboards.reply import get_main_reply_keyboard
+from bot.services.audio_pool import AudioPoolBusy
+from bot.services.session_store import translation_sessions
 from bot.services.translator import TranslatorService
 from bot.services.voice import VoiceService
 from bot.utils.messages import get_text
+from bot.utils.progressive import ProgressiveMessage
 from bot.utils.rate_limit import rate_limit
 from config import config
 
@@ -152,9 +155,11 @@ async def voice_handler(message: Message):
     from config import config
     is_admin = message.from_user.id in config.ADMIN_IDS
 
+    # Reserve a unit up front; it is given back if the translation fails
+    reservation = None
     if not is_admin:
-        can_translate, remaining = await db.check_daily_limit(message.from_user.id)
-        if not can_translate:
+        reservation = await db.quota.reserve(message.from_user.id)
+        if not reservation.allowed:
             await message.answer(get_text('daily_limit_reached', user_info.get('interface_language', 'ru')))
             return
 
@@ -167,6 +172,7 @@ async def voice_handler(message: Message):
             text = await voice_service.process_voice_message(message.voice.file_id, message.bot)
 
             if not text:
+                await refund_quota(reservation)
                 await processing_msg.edit_text(get_text('voice_processing_failed', user_info.get('interface_language', 'ru')))
                 return
 
@@ -188,11 +194,13 @@ async def voice_handler(message: Message):
                 )
 
                 if not translated:
+                    await refund_quota(reservation)
                     await processing_msg.edit_text(get_text('translation_failed', user_info.get('interface_language', 'ru')))
                     return
 
                 # Update counters
-                await db.increment_translation_count(message.from_user.id)
+                db.quota.commit(message.from_user.id)
+                reservation = None
                 await db.add_translation_history(
                     user_id=message.from_user.id,
                     source_text=text,
@@ -239,21 +247,140 @@ async def voice_handler(message: Message):
                 else:
                     response_text += f"🌍 *Перевод ({style_display}, {config.SUPPORTED_LANGUAGES.get(target_lang, target_lang)}):*\n{translated}"
 
-                # Store metadata for callback buttons
-                if user_info.get('is_premium', False):
-                    from bot.handlers.callbacks import last_translation_metadata
-                    last_translation_metadata[message.from_user.id] = metadata
-
                 await processing_msg.edit_text(
                     response_text,
                     parse_mode='Markdown',
                     reply_markup=get_translation_actions_keyboard(is_premium=user_info.get('is_premium', False), interface_lang=user_info.get('interface_language', 'ru'))
                 )
 
+                # Store metadata for callback buttons
+                if user_info.get('is_premium', False):
+                    await translation_sessions.save(message.from_user.id, processing_msg.message_id, metadata)
+
+    except AudioPoolBusy:
+        logger.warning("Audio pool busy, voice message rejected")
+        await refund_quota(reservation)
+        await processing_msg.edit_text(get_text('voice_busy', user_info.get('interface_language', 'ru')))
     except Exception as e:
         logger.error(f"Voice processing error: {e}")
+        await refund_quota(reservation)
         await processing_msg.edit_text(get_text('voice_processing_failed', user_info.get('interface_language', 'ru')))
 
+async def refund_quota(reservation):
+    """Give back a reserved free translation that wasn't delivered"""
+    if reservation is None:
+        return
+    try:
+        await db.quota.refund(reservation)
+    except Exception as e:
+        logger.error(f"Quota refund error for user {reservation.user_id}: {e}")
+
+async def format_translation_response(translator: TranslatorService, user_info: dict,
+                                      metadata: dict, translated: str, has_premium: bool,
+                                      remaining: int = None, pending: bool = False,
+                                      basic_only: bool = False) -> str:
+    """Markdown reply for a text translation.
+
+    With ``pending`` the styled translation is still being enhanced: only the
+    basic translation is shown, with a placeholder for the styled one. With
+    ``basic_only`` the enhancement failed and the placeholder is left out.
+    """
+    logger.info(f"Getting language names: source={metadata.get('source_lang', 'auto')}, target={metadata.get('target_lang')}")
+    source_lang_name = await translator.get_language_name(
+        metadata.get('source_lang', 'auto'),
+        user_info.get('interface_language', 'ru')
+    )
+    logger.info(f"Source language name: {source_lang_name}")
+    target_lang_name = await translator.get_language_name(
+        metadata.get('target_lang'),
+        user_info.get('interface_language', 'ru')
+    )
+    logger.info(f"Target language name: {target_lang_name}")
+
+    response_text = f"🌍 *{source_lang_name} → {target_lang_name}*\n\n"
+
+    # Debug logging for translation display
+    basic_trans = metadata.get('basic_translation', 'N/A')
+    logger.info(f"Translation display logic: basic='{basic_trans[:50]}...', enhanced='{translated[:50]}...', same={basic_trans == translated}")
+    logger.info(f"Metadata keys: {list(metadata.keys())}")
+    logger.info(f"Has basic_translation key: {'basic_translation' in metadata}")
+    logger.info(f"Basic != Enhanced: {metadata.get('basic_translation') != translated}")
+
+    # Get style display name
+    style = metadata.get('style')
+    style_names = config.TRANSLATION_STYLES_MULTILINGUAL.get(
+        user_info.get('interface_language', 'ru'),
+        config.TRANSLATION_STYLES_MULTILINGUAL['ru']
+    )
+    style_display = style_names.get(style, style)
+
+    # Show translations based on user type
+    if 'basic_translation' in metadata:
+        # For all users - show both basic and styled translations
+        logger.info("Showing two-stage translation (basic + styled)")
+        response_text += f"📝 *Точный перевод:*\n{metadata['basic_translation']}"
+        if basic_only:
+            has_premium = False
+        else:
+            response_text += f"\n\n✨ *Стилизованный перевод ({style_display}):*\n"
+            if pending:
+                response_text += "_Улучшаю перевод..._"
+                # Alternatives and explanations arrive with the enhanced version
+                has_premium = False
+            else:
+                response_text += translated
+
+        # Premium features - alternatives and explanations
+        if has_premium:
+            # Add synonyms/alternatives if available
+            if metadata.get('alternatives'):
+                response_text += f"\n\n🔄 *Альтернативы:*\n"
+                for alt in metadata['alternatives'][:3]:  # Show max 3 alternatives
+                    response_text += f"• {alt}\n"
+
+            # Add explanation if available
+            if metadata.get('explanation') and metadata['explanation'].strip():
+                explanation = metadata['explanation'].strip()[:200]  # Limit length
+                explanation_labels = {
+                    'ru': "💡 *Объяснение:*",
+                    'en': "💡 *Explanation:*"
+                }
+                label = explanation_labels.get(user_info.get('interface_language', 'ru'), explanation_labels['ru'])
+                response_text += f"\n{label} {explanation}"
+                if len(metadata['explanation']) > 200:
+                    response_text += "..."
+
+            # Add grammar if available
+            if metadata.get('grammar') and metadata['grammar'].strip():
+                grammar = metadata['grammar'].strip()
+                # Ensure grammar explanation ends with proper punctuation
+                if not grammar.endswith('.') and not grammar.endswith('!') and not grammar.endswith('?'):
+                    grammar += '.'
+
+                grammar_labels = {
+                    'ru': "📚 *Грамматика:*",
+                    'en': "📚 *Grammar:*"
+                }
+                label = grammar_labels.get(user_info.get('interface_language', 'ru'), grammar_labels['ru'])
+                response_text += f"\n\n{label} {grammar[:250]}"
+                if len(grammar) > 250:
+                    response_text += "..."
+    else:
+        logger.info("Showing single translation (no two stages)")
+        response_text += f"📝 *Перевод ({style_display}):*\n{translated}"
+
+    # Add remaining translations info for free users
+    if not user_info.get('is_premium') and remaining is not None:
+        response_text += f"\n\n📊 Осталось переводов сегодня: {remaining}"
+
+    # Add enhanced info for premium users
+    if user_info.get('is_premium') and not pending and not basic_only and metadata.get('alternatives'):
+        response_text += f"\n\n🔄 *Альтернативы:*\n"
+        for alt in metadata['alternatives'][:2]:
+            response_text += f"• {alt}\n"
+
+    return response_text
+
 @router.message(F.text & ~F.text.startswith('/'))
 @rate_limit(key='translation', rate=10, per=60)
 async def text_translation_handler(message: Message):
@@ -296,9 +423,13 @@ async def text_translation_handler(message: Message):
     from config import config
     is_admin = message.from_user.id in config.ADMIN_IDS
 
+    # Reserve a unit up front; it is given back if the translation fails
+    reservation = None
+    remaining = None
     if not is_admin:
-        can_translate, remaining = await db.check_daily_limit(message.from_user.id)
-        if not can_translate:
+        reservation = await db.quota.reserve(message.from_user.id)
+        remaining = reservation.remaining
+        if not reservation.allowed:
             limit_text = get_text('daily_limit_reached', user_info.get('interface_language', 'ru'))
             await message.answer(limit_text)
             return
@@ -306,6 +437,20 @@ async def text_translation_handler(message: Message):
     # Show typing
     await message.bot.send_chat_action(chat_id=message.chat.id, action='typing')
 
+    reply = None
+    basic_only_text = None  # what the reply falls back to once the basic translation is shown
+
+    async def keep_basic() -> bool:
+        """After a failed enhancement, drop the placeholder from the shown basic translation"""
+        if reply is None or reply.sent is None or basic_only_text is None:
+            return False
+        try:
+            await reply.show(basic_only_text, parse_mode='Markdown', final=True)
+            return True
+        except Exception as e:
+            logger.error(f"Could not restore the basic translation: {e}")
+            return False
+
     try:
         async with TranslatorService() as translator:
             target_lang = user_info.get('target_language', 'en')
@@ -318,22 +463,39 @@ async def text_translation_handler(message: Message):
 
             logger.info(f"Translation for user {message.from_user.id}: admin={is_admin}, premium={has_premium}")
 
+            reply = ProgressiveMessage(message)
+
+            async def show_basic(basic: str, basic_metadata: dict):
+                # Provider result is in - show it while GPT enhances
+                nonlocal basic_only_text
+                pending_text = await format_translation_response(
+                    translator, user_info, basic_metadata, basic, has_premium, remaining, pending=True
+                )
+                basic_only_text = await format_translation_response(
+                    translator, user_info, basic_metadata, basic, has_premium, remaining, basic_only=True
+                )
+                await reply.show(pending_text, parse_mode='Markdown')
+
             translated, metadata = await translator.translate(
                 text=message.text,
                 target_lang=target_lang,
                 style=style,
                 enhance=has_premium,
                 user_id=message.from_user.id,
-                explain_grammar=has_premium
+                explain_grammar=has_premium,
+                on_basic=show_basic if config.PROGRESSIVE_TRANSLATION else None
             )
 
             if not translated:
-                await message.answer(get_text('translation_failed', user_info.get('interface_language', 'ru')))
+                await refund_quota(reservation)
+                if not await keep_basic():
+                    await message.answer(get_text('translation_failed', user_info.get('interface_language', 'ru')))
                 return
 
             # Update counters
             logger.info("Starting database updates...")
-            await db.increment_translation_count(message.from_user.id)
+            db.quota.commit(message.from_user.id)
+            reservation = None
             await db.add_translation_history(
                 user_id=message.from_user.id,
                 source_text=message.text,
@@ -345,111 +507,26 @@ async def text_translation_handler(message: Message):
             )
             logger.info("Database updates completed")
 
-            # Format response
-            logger.info(f"Getting language names: source={metadata.get('source_lang', 'auto')}, target={target_lang}")
-            source_lang_name = await translator.get_language_name(
-                metadata.get('source_lang', 'auto'),
-                user_info.get('interface_language', 'ru')
+            response_text = await format_translation_response(
+                translator, user_info, metadata, translated, has_premium, remaining
             )
-            logger.info(f"Source language name: {source_lang_name}")
-            target_lang_name = await translator.get_language_name(
-                target_lang,
-                user_info.get('interface_language', 'ru')
-            )
-            logger.info(f"Target language name: {target_lang_name}")
-
-            response_text = f"🌍 *{source_lang_name} → {target_lang_name}*\n\n"
-
-            # Debug logging for translation display
-            basic_trans = metadata.get('basic_translation', 'N/A')
-            logger.info(f"Translation display logic: basic='{basic_trans[:50]}...', enhanced='{translated[:50]}...', same={basic_trans == translated}")
-            logger.info(f"Metadata keys: {list(metadata.keys())}")
-            logger.info(f"Has basic_translation key: {'basic_translation' in metadata}")
-            logger.info(f"Basic != Enhanced: {metadata.get('basic_translation') != translated}")
-
-            # Get style display name
-            from config import config
-            style_names = config.TRANSLATION_STYLES_MULTILINGUAL.get(
-                user_info.get('interface_language', 'ru'),
-                config.TRANSLATION_STYLES_MULTILINGUAL['ru']
-            )
-            style_display = style_names.get(style, style)
-
-            # Show translations based on user type
-            if 'basic_translation' in metadata:
-                # For all users - show both basic and styled translations
-                logger.info("Showing two-stage translation (basic + styled)")
-                response_text += f"📝 *Точный перевод:*\n{metadata['basic_translation']}\n\n"
-                response_text += f"✨ *Стилизованный перевод ({style_display}):*\n{translated}"
-
-                # Premium features - alternatives and explanations
-                if has_premium:
-                    # Add synonyms/alternatives if available
-                    if metadata.get('alternatives'):
-                        response_text += f"\n\n🔄 *Альтернативы:*\n"
-                        for alt in metadata['alternatives'][:3]:  # Show max 3 alternatives
-                            response_text += f"• {alt}\n"
-
-                    # Add explanation if available
-                    if metadata.get('explanation') and metadata['explanation'].strip():
-                        explanation = metadata['explanation'].strip()[:200]  # Limit length
-                        explanation_labels = {
-                            'ru': "💡 *Объяснение:*",
-                            'en': "💡 *Explanation:*"
-                        }
-                        label = explanation_labels.get(user_info.get('interface_language', 'ru'), explanation_labels['ru'])
-                        response_text += f"\n{label} {explanation}"
-                        if len(metadata['explanation']) > 200:
-                            response_text += "..."
-
-                    # Add grammar if available
-                    if metadata.get('grammar') and metadata['grammar'].strip():
-                        grammar = metadata['grammar'].strip()
-                        # Ensure grammar explanation ends with proper punctuation
-                        if not grammar.endswith('.') and not grammar.endswith('!') and not grammar.endswith('?'):
-                            grammar += '.'
-
-                        grammar_labels = {
-                            'ru': "📚 *Грамматика:*",
-                            'en': "📚 *Grammar:*"
-                        }
-                        label = grammar_labels.get(user_info.get('interface_language', 'ru'), grammar_labels['ru'])
-                        response_text += f"\n\n{label} {grammar[:250]}"
-                        if len(grammar) > 250:
-                            response_text += "..."
-            else:
-                logger.info("Showing single translation (no two stages)")
-                response_text += f"📝 *Перевод ({style_display}):*\n{translated}"
-
-            # Add remaining translations info for free users
-            if not user_info.get('is_premium'):
-                response_text += f"\n\n📊 Осталось переводов сегодня: {remaining - 1}"
-
-            # Add enhanced info for premium users
-            if user_info.get('is_premium') and metadata.get('alternatives'):
-                response_text += f"\n\n🔄 *Альтернативы:*\n"
-                for alt in metadata['alternatives'][:2]:
-                    response_text += f"• {alt}\n"
 
             keyboard = get_translation_actions_keyboard(is_premium=user_info.get('is_premium', False), interface_lang=user_info.get('interface_language', 'ru'))
 
-            # Store metadata for callback buttons
-            if user_info.get('is_premium', False):
-                from bot.handlers.callbacks import last_translation_metadata
-                logger.info(f"Storing metadata for user {message.from_user.id}: keys = {list(metadata.keys())}")
-                logger.info(f"Alternatives: {metadata.get('alternatives', 'Not found')}")
-                logger.info(f"Explanation: {metadata.get('explanation', 'Not found')}")
-                logger.info(f"Grammar: {metadata.get('grammar', 'Not found')}")
-                last_translation_metadata[message.from_user.id] = metadata
-
             logger.info(f"Sending response to user {message.from_user.id}")
-            await message.answer(
+            await reply.show(
                 response_text,
                 parse_mode='Markdown',
-                reply_markup=keyboard
+                reply_markup=keyboard,
+                final=True
             )
             logger.info("Response sent successfully")
 
+            # Store metadata for callback buttons
+            if user_info.get('is_premium', False):
+                logger.info(f"Storing metadata for user {message.from_user.id}: keys = {list(metadata.keys())}")
+                await translation_sessions.save(message.from_user.id, reply.sent.message_id, metadata)
+
             # Auto voice if enabled
             if user_info.get('auto_voice') and user_info.get('is_premium'):
                 try:
@@ -457,21 +534,19 @@ async def text_translation_handler(message: Message):
                         # Use basic translation for voice (more accurate pronunciation)
                         voice_text = metadata.get('basic_translation', translated)
                         logger.info(f"Generating voice for: {voice_text[:50]}...")
-                        audio_data = await voice_service.generate_speech(
+                        await voice_service.answer_with_speech(
+                            message,
                             text=voice_text,
                             language=target_lang,
                             premium=True,
                             speed=user_info.get('voice_speed', 1.0),
                             voice_type=user_info.get('voice_type', 'alloy')
                         )
-
-                        if audio_data:
-                            from aiogram.types import BufferedInputFile
-                            audio_file = BufferedInputFile(audio_data, filename="translation.mp3")
-                            await message.answer_voice(audio_file)
                 except Exception as e:
                     logger.error(f"Auto voice error: {e}")
 
     except Exception as e:
         logger.error(f"Translation error: {e}")
-        await message.answer(get_text('translation_failed', user_info.get('interface_language', 'ru')))
\ No newline at end of file
+        await refund_quota(reservation)
+        if not await keep_basic():
+            await message.answer(get_text('translation_failed', user_info.get('interface_language', 'ru')))
\ No newline at end of file
@@ -7,6 +7,7 @@ from bot.database import db
 from bot.keyboards.inline import *
 from bot.keyboards.inline import get_voice_options_keyboard, get_quick_styles_keyboard
 from bot.keyboards.reply import get_main_reply_keyboard
+from bot.services.session_store import translation_sessions
 from bot.services.translator import TranslatorService
 from bot.services.voice import VoiceService
 from bot.utils.messages import get_text
@@ -15,9 +16,6 @@ from config import config
 logger = logging.getLogger(__name__)
 router = Router()
 
-# Store last translation metadata for callbacks
-last_translation_metadata = {}
-
 @router.callback_query(F.data == "back_to_menu")
 async def back_to_menu_handler(callback: CallbackQuery):
     """Return to main menu"""
@@ -402,7 +400,7 @@ async def voice_translation_handler(callback: CallbackQuery):
 
     # Check if alternatives are available
     user_id = callback.from_user.id
-    metadata = last_translation_metadata.get(user_id, {})
+    metadata = await translation_sessions.get(user_id, callback.message.message_id)
     has_alternatives = bool(metadata.get('alternatives') and len(metadata.get('alternatives', [])) > 0)
 
     # Get interface language
@@ -414,10 +412,13 @@ async def voice_translation_handler(callback: CallbackQuery):
         'en': "🎧 What to voice?"
     }
 
-    await callback.message.answer(
+    sent = await callback.message.answer(
         voice_text.get(interface_lang, voice_text['ru']),
         reply_markup=get_voice_options_keyboard(has_alternatives, interface_lang)
     )
+    # Buttons of the options message act on this translation
+    if metadata:
+        await translation_sessions.save(user_id, sent.message_id, metadata)
     await callback.answer()
 
 @router.callback_query(F.data == "help")
@@ -442,7 +443,7 @@ async def noop_handler(callback: CallbackQuery):
 async def show_alternatives_handler(callback: CallbackQuery):
     """Show translation alternatives"""
     user_id = callback.from_user.id
-    metadata = last_translation_metadata.get(user_id, {})
+    metadata = await translation_sessions.get(user_id, callback.message.message_id)
 
     logger.info(f"Alternatives callback for user {user_id}: metadata keys = {list(metadata.keys())}")
     logger.info(f"Alternatives data: {metadata.get('alternatives', 'Not found')}")
@@ -462,7 +463,7 @@ async def show_alternatives_handler(callback: CallbackQuery):
 async def show_explanation_handler(callback: CallbackQuery):
     """Show translation explanation"""
     user_id = callback.from_user.id
-    metadata = last_translation_metadata.get(user_id, {})
+    metadata = await translation_sessions.get(user_id, callback.message.message_id)
 
     # Get user's interface language
     from bot.database import db
@@ -495,7 +496,7 @@ async def show_explanation_handler(callback: CallbackQuery):
 async def show_grammar_handler(callback: CallbackQuery):
     """Show grammar explanation"""
     user_id = callback.from_user.id
-    metadata = last_translation_metadata.get(user_id, {})
+    metadata = await translation_sessions.get(user_id, callback.message.message_id)
 
     # Get user's interface language
     from bot.database import db
@@ -538,19 +539,17 @@ async def generate_voice_for_text(callback: CallbackQuery, text: str, voice_type
     try:
         async with VoiceService() as voice_service:
             target_lang = user_info.get('target_language', 'en')
-            audio_data = await voice_service.generate_speech(
+            sent = await voice_service.answer_with_speech(
+                callback.message,
                 text=text.strip(),
                 language=target_lang,
                 premium=True,
                 speed=user_info.get('voice_speed', 1.0),
-                voice_type=user_info.get('voice_type', 'alloy')
+                voice_type=user_info.get('voice_type', 'alloy'),
+                filename=f"{voice_type_name}.mp3"
             )
 
-            if audio_data:
-                from aiogram.types import BufferedInputFile
-                audio_file = BufferedInputFile(audio_data, filename=f"{voice_type_name}.mp3")
-                await callback.message.answer_voice(audio_file)
-            else:
+            if not sent:
                 await callback.answer("❌ Не удалось создать голосовое сообщение", show_alert=True)
 
     except Exception as e:
@@ -573,7 +572,7 @@ async def voice_exact_handler(callback: CallbackQuery):
 
     # Get exact translation from metadata
     user_id = callback.from_user.id
-    metadata = last_translation_metadata.get(user_id, {})
+    metadata = await translation_sessions.get(user_id, callback.message.message_id)
     exact_text = metadata.get('basic_translation', '')
 
     await generate_voice_for_text(callback, exact_text, "точный перевод")
@@ -594,7 +593,7 @@ async def voice_styled_handler(callback: CallbackQuery):
 
     # Get styled translation from metadata - need to extract from message or use stored data
     user_id = callback.from_user.id
-    metadata = last_translation_metadata.get(user_id, {})
+    metadata = await translation_sessions.get(user_id, callback.message.message_id)
 
     # Try to get enhanced translation, fallback to basic if not available
     styled_text = metadata.get('enhanced_translation', metadata.get('basic_translation', ''))
@@ -617,7 +616,7 @@ async def voice_alternatives_handler(callback: CallbackQuery):
 
     # Get alternatives from metadata
     user_id = callback.from_user.id
-    metadata = last_translation_metadata.get(user_id, {})
+    metadata = await translation_sessions.get(user_id, callback.message.message_id)
     alternatives = metadata.get('alternatives', [])
 
     if not alternatives:
@@ -703,7 +702,7 @@ async def translate_with_style(callback: CallbackQuery, style: str, for_voice: b
     """Helper function to translate text with specific style"""
     user_info = await db.get_user(callback.from_user.id)
     user_id = callback.from_user.id
-    metadata = last_translation_metadata.get(user_id, {})
+    metadata = await translation_sessions.get(user_id, callback.message.message_id)
 
     # Get original text and target language from metadata
     original_text = metadata.get('original_text', '')
@@ -732,11 +731,9 @@ async def translate_with_style(callback: CallbackQuery, style: str, for_voice: b
                 await callback.answer("❌ Ошибка перевода", show_alert=True)
                 return
 
-            # Update stored metadata
-            last_translation_metadata[user_id] = new_metadata
-
             # If for voice, generate audio immediately
             if for_voice:
+                await translation_sessions.save(user_id, callback.message.message_id, new_metadata)
                 await generate_voice_for_text(callback, translated, f"перевод в стиле {style}")
             else:
                 # Show new translation
@@ -777,11 +774,12 @@ async def translate_with_style(callback: CallbackQuery, style: str, for_voice: b
 
                 keyboard = get_translation_actions_keyboard(is_premium=True, interface_lang=user_info.get('interface_language', 'ru'))
 
-                await callback.message.answer(
+                sent = await callback.message.answer(
                     response_text,
                     parse_mode='Markdown',
                     reply_markup=keyboard
                 )
+                await translation_sessions.save(user_id, sent.message_id, new_metadata)
 
     except Exception as e:
         logger.error(f"Style translation error: {e}")
@@ -806,7 +804,7 @@ async def back_to_voice_menu_handler(callback: CallbackQuery):
     """Return to voice options menu"""
     user_info = await db.get_user(callback.from_user.id)
     user_id = callback.from_user.id
-    metadata = last_translation_metadata.get(user_id, {})
+    metadata = await translation_sessions.get(user_id, callback.message.message_id)
     has_alternatives = bool(metadata.get('alternatives') and len(metadata.get('alternatives', [])) > 0)
     interface_lang = user_info.get('interface_language', 'ru')
 
@@ -3,18 +3,19 @@
 from typing import Callable, Dict, Any, Awaitable
 from aiogram import BaseMiddleware
 from aiogram.types import Update, Message, CallbackQuery, InlineQuery
-import time
 import logging
 
+from bot.utils.rate_limit import RateLimiter, rate_limiter
+
 logger = logging.getLogger(__name__)
 
 class ThrottlingMiddleware(BaseMiddleware):
     """Middleware for basic throttling"""
 
-    def __init__(self, rate: int = 10, per: int = 60):
+    def __init__(self, rate: int = 10, per: int = 60, limiter: RateLimiter = None):
         self.rate = rate  # requests per period
         self.per = per    # period in seconds
-        self.storage = {}  # In production, use Redis
+        self.limiter = limiter or rate_limiter
 
     async def __call__(
         self,
@@ -39,48 +40,12 @@ class ThrottlingMiddleware(BaseMiddleware):
             user_id = event.inline_query.from_user.id
 
         if user_id:
-            current_time = time.time()
-            key = f"throttle:{user_id}"
-
-            # Clean old entries
-            self.cleanup_storage(current_time)
-
-            # Check rate limit
-            if key in self.storage:
-                user_data = self.storage[key]
-                window_start = user_data['window_start']
-                request_count = user_data['count']
-
-                # If we're in the same window
-                if current_time - window_start < self.per:
-                    if request_count >= self.rate:
-                        # Rate limit exceeded - ignore the update
-                        logger.warning(f"Rate limit exceeded for user {user_id}")
-                        return
-                    else:
-                        # Increment counter
-                        self.storage[key]['count'] += 1
-                else:
-                    # New window
-                    self.storage[key] = {
-                        'window_start': current_time,
-                        'count': 1
-                    }
-            else:
-                # First request
-                self.storage[key] = {
-                    'window_start': current_time,
-                    'count': 1
-                }
+            # Messages and callbacks are limited separately
+            key = f"throttle:{type(event).__name__}:{user_id}"
+            result = await self.limiter.hit(key, self.rate, self.per)
+            if not result.allowed:
+                # Rate limit exceeded - ignore the update
+                logger.warning(f"Rate limit exceeded for user {user_id}")
+                return
 
         return await handler(event, data)
-
-    def cleanup_storage(self, current_time: float):
-        """Clean up old entries"""
-        keys_to_remove = []
-        for key, data in self.storage.items():
-            if current_time - data['window_start'] > self.per * 2:
-                keys_to_remove.append(key)
-
-        for key in keys_to_remove:
-            del self.storage[key]
\ No newline at end of file
@@ -0,0 +1,154 @@
+"""Process pool for pydub/ffmpeg audio work, kept off the event loop"""
+
+import asyncio
+import io
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+
+from bot.utils import metrics
+from bot.utils.latency import LatencyWindow
+from config import config
+
+logger = logging.getLogger(__name__)
+
+class AudioPoolBusy(Exception):
+    """Raised when the audio queue is full - the caller should ask the user to retry"""
+
+# Worker functions run in child processes: module-level and bytes in/bytes out
+# so they pickle cheaply and never touch the bot's state
+
+def transcode(audio_data: bytes, input_format: Optional[str], output_format: str) -> bytes:
+    """Decode audio_data and re-encode it as output_format"""
+    from pydub import AudioSegment
+
+    audio = AudioSegment.from_file(io.BytesIO(audio_data), format=input_format)
+    buffer = io.BytesIO()
+    audio.export(buffer, format=output_format)
+    return buffer.getvalue()
+
+def duration(audio_data: bytes, input_format: Optional[str] = None) -> float:
+    """Length of the audio in seconds"""
+    from pydub import AudioSegment
+
+    audio = AudioSegment.from_file(io.BytesIO(audio_data), format=input_format)
+    return len(audio) / 1000
+
+def change_speed(audio_data: bytes, speed: float, input_format: str = 'mp3',
+                 output_format: str = 'mp3') -> bytes:
+    """Speed up (speed > 1) or slow down the audio"""
+    from pydub import AudioSegment
+
+    audio = AudioSegment.from_file(io.BytesIO(audio_data), format=input_format)
+    audio = audio.speedup(playback_speed=speed)
+    buffer = io.BytesIO()
+    audio.export(buffer, format=output_format)
+    return buffer.getvalue()
+
+def stitch_to_opus(segments: List[bytes], input_format: str = 'mp3') -> bytes:
+    """Join audio segments into one OGG/Opus file (Telegram's voice note format)"""
+    from pydub import AudioSegment
+
+    audio = AudioSegment.empty()
+    for segment in segments:
+        audio += AudioSegment.from_file(io.BytesIO(segment), format=input_format)
+    buffer = io.BytesIO()
+    audio.export(buffer, format='ogg', codec='libopus', bitrate='32k')
+    return buffer.getvalue()
+
+class AudioWorkerPool:
+    """Bounded ProcessPoolExecutor for CPU-heavy audio jobs.
+
+    At most ``workers`` jobs run at once; up to ``max_queue`` more wait for
+    a free worker. Beyond that ``run()`` raises AudioPoolBusy straight away
+    instead of letting voice messages pile up behind each other.
+    """
+
+    def __init__(self, workers: int = None, max_queue: int = None):
+        self.workers = workers or config.AUDIO_WORKERS
+        self.max_queue = config.AUDIO_MAX_QUEUE if max_queue is None else max_queue
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.running = 0
+        self.queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.queue_wait = LatencyWindow()
+        self.run_time = LatencyWindow()
+
+    def start(self):
+        """Create the worker processes (call from on_startup)"""
+        if self._executor is None:
+            # spawn: forking a process that runs aiosqlite/aiohttp threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Run fn(*args) in a worker process, waiting for a free worker if needed"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        if self.running + self.queued >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise AudioPoolBusy(f"audio queue full ({self.queued} waiting)")
+
+        self.start()
+        queued_at = time.perf_counter()
+        self.queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+
+        started = time.perf_counter()
+        self.queue_wait.record(started - queued_at)
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._executor, fn, *args)
+            self.completed += 1
+            return result
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM in ffmpeg) - replace the pool for the next job
+            logger.error("Audio worker pool broken, restarting")
+            self.failed += 1
+            if self._executor:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.run_time.record(time.perf_counter() - started)
+            self.running -= 1
+            self._slots.release()
+
+    def close(self):
+        """Stop the worker processes (call from on_shutdown)"""
+        if self._executor:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+        self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'workers': self.workers,
+            'running': self.running,
+            'queued': self.queued,
+            'max_queue': self.max_queue,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'queue_wait': self.queue_wait.stats(),
+            'run_time': self.run_time.stats()
+        }
+
+# Shared pool, started/closed in main.py
+audio_pool = AudioWorkerPool()
+
+metrics.register('audio_pool', audio_pool.stats)
@@ -0,0 +1,117 @@
+"""Per-provider circuit breakers for translation and TTS backends"""
+
+import time
+from collections import deque
+from typing import Callable, Dict, Any, Optional
+
+from bot.utils import metrics
+from bot.utils.latency import LatencyWindow
+from config import config
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker over a rolling window of call outcomes.
+
+    Closed: calls flow; the breaker opens when the error rate over the last
+    ``window`` calls reaches ``error_threshold`` (after ``min_calls``).
+    Open: calls are skipped for ``open_seconds``.
+    Half-open: a single probe call is let through; success closes the
+    breaker, failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, window: int = None, error_threshold: float = None,
+                 min_calls: int = None, open_seconds: float = None,
+                 timer: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.window = window or config.BREAKER_WINDOW
+        self.error_threshold = error_threshold or config.BREAKER_ERROR_THRESHOLD
+        self.min_calls = min_calls or config.BREAKER_MIN_CALLS
+        self.open_seconds = open_seconds or config.BREAKER_OPEN_SECONDS
+        self._timer = timer
+
+        self._outcomes = deque(maxlen=self.window)  # True = success
+        self.latency = LatencyWindow(self.window)
+        self.state = self.CLOSED
+        self.opened_at: Optional[float] = None
+        self._probe_started_at: Optional[float] = None
+        self.times_opened = 0
+
+    @property
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def allow(self) -> bool:
+        """Whether a call may be attempted now (claims the probe when half-open)"""
+        now = self._timer()
+
+        if self.state == self.OPEN and now - self.opened_at >= self.open_seconds:
+            self.state = self.HALF_OPEN
+            self._probe_started_at = None
+
+        if self.state == self.CLOSED:
+            return True
+
+        if self.state == self.HALF_OPEN:
+            # One probe at a time; a probe that never reported back is retried
+            if self._probe_started_at is None or now - self._probe_started_at >= self.open_seconds:
+                self._probe_started_at = now
+                return True
+
+        return False
+
+    def is_available(self) -> bool:
+        """Like allow() but without claiming the half-open probe"""
+        if self.state == self.OPEN:
+            return self._timer() - self.opened_at >= self.open_seconds
+        return True
+
+    def record_success(self, latency: float):
+        self._outcomes.append(True)
+        self.latency.record(latency)
+
+        if self.state == self.HALF_OPEN:
+            self.state = self.CLOSED
+            self._outcomes.clear()
+            self._outcomes.append(True)
+
+    def record_failure(self):
+        self._outcomes.append(False)
+
+        if self.state == self.HALF_OPEN:
+            self._open()
+        elif (self.state == self.CLOSED and len(self._outcomes) >= self.min_calls
+              and self.error_rate >= self.error_threshold):
+            self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = self._timer()
+        self._probe_started_at = None
+        self.times_opened += 1
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            'state': self.state,
+            'error_rate': round(self.error_rate, 3),
+            'calls_in_window': len(self._outcomes),
+            'times_opened': self.times_opened
+        }
+        stats.update(self.latency.stats())
+        return stats
+
+# Breakers per provider (TTS ones are named tts_<provider>), shared by all services
+provider_breakers: Dict[str, CircuitBreaker] = {}
+
+def get_breaker(name: str) -> CircuitBreaker:
+    if name not in provider_breakers:
+        provider_breakers[name] = CircuitBreaker(name)
+    return provider_breakers[name]
+
+metrics.register('circuit_breakers', lambda: {
+    name: breaker.stats() for name, breaker in provider_breakers.items()
+})
@@ -0,0 +1,222 @@
+"""Structured, micro-batched GPT enhancement of translations"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Optional, Dict, Any, List
+
+from bot.services.http_client import http_clients
+from bot.utils import metrics
+from bot.utils.latency import LatencyWindow
+from config import config
+
+logger = logging.getLogger(__name__)
+
+STYLE_PROMPTS = {
+    'informal': 'casual and friendly, using colloquial expressions, contractions, and everyday language as if talking to a close friend',
+    'formal': 'formal and polite, using proper grammar, respectful language, and avoiding contractions - suitable for official documents and business correspondence',
+    'business': 'professional and business-oriented, using corporate terminology, concise language, and industry-appropriate expressions',
+    'travel': 'simple, clear and practical for tourists - using basic vocabulary, essential phrases, and avoiding complex grammar',
+    'academic': 'scholarly and precise, using technical terminology, complex sentence structures, and formal academic language'
+}
+
+LANG_NAMES = {
+    'ru': 'Russian', 'en': 'English', 'es': 'Spanish', 'fr': 'French',
+    'de': 'German', 'it': 'Italian', 'pt': 'Portuguese', 'ja': 'Japanese',
+    'zh': 'Chinese', 'ko': 'Korean', 'ar': 'Arabic', 'hi': 'Hindi',
+    'tr': 'Turkish', 'pl': 'Polish', 'nl': 'Dutch', 'sv': 'Swedish'
+}
+
+# Strict JSON schema: the model must return exactly these fields for every item
+ENHANCEMENT_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'items': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'id': {'type': 'integer'},
+                    'enhanced': {'type': 'string'},
+                    'alternatives': {'type': 'array', 'items': {'type': 'string'}},
+                    'grammar': {'type': 'string'},
+                    'explanation': {'type': 'string'}
+                },
+                'required': ['id', 'enhanced', 'alternatives', 'grammar', 'explanation'],
+                'additionalProperties': False
+            }
+        }
+    },
+    'required': ['items'],
+    'additionalProperties': False
+}
+
+SYSTEM_PROMPT = """You are a professional translator and language expert.
+For every item, rewrite the basic translation so it is natural in the item's target language and matches the item's style. Make the style difference clear and noticeable.
+"enhanced" and "alternatives" MUST be in the item's target language.
+If "explain" is true: give 2-3 alternative translations, a grammar explanation in Russian and a brief explanation of the style choices in Russian.
+If "explain" is false: return empty "alternatives", "grammar" and "explanation".
+Return one result per item with the same "id"."""
+
+# Completion token budget per item
+TOKENS_SIMPLE = 120
+TOKENS_EXPLAINED = 450
+
+class EnhancementBatcher:
+    """Collects enhancement requests for a few milliseconds and sends them as
+    one structured-output chat completion, then fans the results back out.
+
+    A batch is sent when ``window`` seconds have passed since its first
+    request or when it holds ``max_items`` requests, whichever comes first.
+    """
+
+    def __init__(self, window: float = None, max_items: int = None, client=None):
+        self.window = window if window is not None else config.GPT_BATCH_WINDOW_MS / 1000
+        self.max_items = max_items or config.GPT_BATCH_MAX_ITEMS
+        self._client = client
+        self._pending: List[tuple] = []  # (item, future)
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+        self.requests = 0
+        self.items = 0
+        self.failed_items = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latency = LatencyWindow()
+        self._started = time.monotonic()
+
+    @property
+    def client(self):
+        return self._client or http_clients.openai
+
+    async def enhance(self, original_text: str, translated_text: str, target_lang: str,
+                      style: str = 'informal', explain_grammar: bool = False) -> Dict[str, Any]:
+        """Enhancement result in the enhance_with_gpt() format"""
+        item = {
+            'original': original_text,
+            'translation': translated_text,
+            'target_language': LANG_NAMES.get(target_lang, target_lang),
+            'style': STYLE_PROMPTS.get(style, STYLE_PROMPTS['informal']),
+            'explain': bool(explain_grammar)
+        }
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_items:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.window, self._flush)
+
+        parsed = await future
+        if parsed is None:
+            self.failed_items += 1
+            return {
+                'enhanced_translation': translated_text,
+                'alternatives': [],
+                'explanation': '',
+                'grammar': '',
+                'failed': True
+            }
+        return self._to_result(parsed, translated_text, style, explain_grammar)
+
+    def _flush(self):
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: List[tuple]):
+        """One chat completion for the whole batch; None for items without a result"""
+        items = [dict(item, id=i) for i, (item, _) in enumerate(batch)]
+        max_tokens = sum(TOKENS_EXPLAINED if item['explain'] else TOKENS_SIMPLE for item in items)
+        parsed = {}
+
+        started = time.monotonic()
+        try:
+            response = await self.client.chat.completions.create(
+                model=config.GPT_MODEL,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": json.dumps({'items': items}, ensure_ascii=False)}
+                ],
+                temperature=0.7,
+                max_tokens=max_tokens,
+                response_format={
+                    "type": "json_schema",
+                    "json_schema": {
+                        "name": "translation_enhancements",
+                        "strict": True,
+                        "schema": ENHANCEMENT_SCHEMA
+                    }
+                }
+            )
+            self.latency.record(time.monotonic() - started)
+
+            if response.usage:
+                self.prompt_tokens += response.usage.prompt_tokens
+                self.completion_tokens += response.usage.completion_tokens
+
+            content = json.loads(response.choices[0].message.content)
+            parsed = {result['id']: result for result in content['items']}
+        except Exception as e:
+            logger.error(f"GPT batch enhancement error ({len(batch)} items): {e}")
+
+        self.requests += 1
+        self.items += len(batch)
+        for i, (_, future) in enumerate(batch):
+            if not future.done():
+                future.set_result(parsed.get(i))
+
+    @staticmethod
+    def _to_result(parsed: Dict[str, Any], translated_text: str, style: str,
+                   explain_grammar: bool) -> Dict[str, Any]:
+        enhanced_translation = parsed['enhanced'].strip() or translated_text
+
+        if not explain_grammar:
+            return {
+                'enhanced_translation': enhanced_translation,
+                'alternatives': [],
+                'explanation': '',
+                'grammar': '',
+                'synonyms': []
+            }
+
+        alternatives = [alt.strip() for alt in parsed['alternatives'] if alt.strip()][:2]
+        # Add a third alternative if we have space
+        if translated_text != enhanced_translation:
+            alternatives.append(translated_text)
+
+        return {
+            'enhanced_translation': enhanced_translation,
+            'alternatives': alternatives,
+            'explanation': parsed['explanation'].strip() or f'Style adapted to {style}',
+            'grammar': parsed['grammar'].strip(),
+            'synonyms': []
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        tokens = self.prompt_tokens + self.completion_tokens
+        uptime = time.monotonic() - self._started
+        return {
+            'requests': self.requests,
+            'items': self.items,
+            'failed_items': self.failed_items,
+            'avg_batch': round(self.items / self.requests, 2) if self.requests else 0.0,
+            'items_per_minute': round(self.items / uptime * 60, 1) if uptime else 0.0,
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'tokens_per_item': round(tokens / self.items, 1) if self.items else None,
+            'latency': self.latency.stats()
+        }
+
+# Shared batcher used by TranslatorService
+enhancement_batcher = EnhancementBatcher()
+
+metrics.register('gpt_enhancement', enhancement_batcher.stats)
@@ -0,0 +1,96 @@
+"""Application-scoped HTTP clients shared by all services"""
+
+import logging
+from typing import Optional, Dict, Any
+
+import aiohttp
+import httpx
+import openai
+
+from bot.utils import metrics
+from config import config
+
+logger = logging.getLogger(__name__)
+
+class HttpClients:
+    """Long-lived aiohttp session and OpenAI client.
+
+    Created once at startup and closed at shutdown, so requests to DeepL,
+    Yandex, ElevenLabs, Telegram file storage and OpenAI reuse keep-alive
+    connections instead of paying a new TCP/TLS handshake each time.
+    Accessing ``session``/``openai`` before ``start()`` creates them lazily.
+    """
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._openai: Optional[openai.AsyncOpenAI] = None
+
+    async def start(self):
+        """Create the shared clients (call from on_startup)"""
+        self._create_session()
+        if config.OPENAI_API_KEY:
+            self._create_openai()
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=config.HTTP_POOL_LIMIT,
+            limit_per_host=config.HTTP_POOL_LIMIT_PER_HOST,
+            keepalive_timeout=config.HTTP_KEEPALIVE_TIMEOUT,
+            use_dns_cache=True,
+            ttl_dns_cache=config.HTTP_DNS_CACHE_TTL
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=config.HTTP_TIMEOUT)
+        )
+        return self._session
+
+    def _create_openai(self) -> openai.AsyncOpenAI:
+        self._openai = openai.AsyncOpenAI(
+            api_key=config.OPENAI_API_KEY,
+            http_client=openai.DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=config.HTTP_POOL_LIMIT,
+                    max_keepalive_connections=config.HTTP_POOL_LIMIT_PER_HOST,
+                    keepalive_expiry=config.HTTP_KEEPALIVE_TIMEOUT
+                )
+            )
+        )
+        return self._openai
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Shared aiohttp session (must be used from a running event loop)"""
+        if self._session is None or self._session.closed:
+            return self._create_session()
+        return self._session
+
+    @property
+    def openai(self) -> Optional[openai.AsyncOpenAI]:
+        """Shared OpenAI client, or None when no API key is configured"""
+        if self._openai is None and config.OPENAI_API_KEY:
+            return self._create_openai()
+        return self._openai
+
+    async def close(self):
+        """Close the shared clients (call from on_shutdown)"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+        if self._openai:
+            await self._openai.close()
+        self._openai = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'session_open': bool(self._session and not self._session.closed),
+            'openai_client': self._openai is not None,
+            'limit': config.HTTP_POOL_LIMIT,
+            'limit_per_host': config.HTTP_POOL_LIMIT_PER_HOST
+        }
+
+# Shared registry, started/closed in main.py
+http_clients = HttpClients()
+
+metrics.register('http_clients', http_clients.stats)
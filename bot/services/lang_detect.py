@@ -0,0 +1,309 @@
+"""Offline source-language detection with a memo for short strings"""
+
+import json
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from bot.utils import metrics
+from bot.utils.latency import LatencyWindow
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Only this much of a long text is scored - more doesn't change the answer
+MAX_TEXT_CHARS = 1000
+
+# Writing system of every supported language
+LANGUAGE_SCRIPTS = {
+    'ru': 'Cyrillic', 'uk': 'Cyrillic',
+    'ar': 'Arabic', 'he': 'Hebrew', 'hi': 'Devanagari', 'th': 'Thai',
+    'ko': 'Hangul', 'ja': 'Kana', 'zh': 'Han'
+}
+
+# langdetect profile files for our language codes
+PROFILE_NAMES = {'zh': ('zh-cn', 'zh-tw')}
+
+def char_script(ch: str) -> Optional[str]:
+    """Script of a letter ('Other' for scripts we don't score), None for non-letters"""
+    code = ord(ch)
+    if code < 0x250 or 0x1E00 <= code <= 0x1EFF:
+        return 'Latin' if ch.isalpha() else None
+    if 0x400 <= code <= 0x4FF:
+        return 'Cyrillic'
+    if 0x590 <= code <= 0x5FF:
+        return 'Hebrew'
+    if 0x600 <= code <= 0x6FF:
+        return 'Arabic'
+    if 0x900 <= code <= 0x97F:
+        return 'Devanagari'
+    if 0xE00 <= code <= 0xE7F:
+        return 'Thai'
+    if 0x3040 <= code <= 0x30FF:
+        return 'Kana'
+    if 0x3400 <= code <= 0x9FFF:
+        return 'Han'
+    if 0xAC00 <= code <= 0xD7AF or 0x1100 <= code <= 0x11FF or 0x3130 <= code <= 0x318F:
+        return 'Hangul'
+    return 'Other' if ch.isalpha() else None
+
+def dominant_script(text: str) -> Optional[str]:
+    counts: Dict[str, int] = {}
+    for ch in text:
+        script = char_script(ch)
+        if script:
+            counts[script] = counts.get(script, 0) + 1
+    if not counts:
+        return None
+    # Japanese is mostly kanji; any kana marks it as Japanese
+    if 'Kana' in counts:
+        return 'Kana'
+    return max(counts, key=counts.get)
+
+class NgramEngine:
+    """Naive Bayes over character 1-3-grams with precomputed language profiles.
+
+    The profiles are the Wikipedia n-gram frequencies shipped with langdetect,
+    turned into log-probability tables once in load(). Scoring is
+    deterministic and only considers languages written in the text's
+    dominant script. Confidence is the posterior of the best language.
+
+    The other langdetect profiles of the same scripts (Persian next to
+    Arabic, Bulgarian next to Russian, Croatian next to Czech...) are
+    scored too but never returned: text in them leaves the supported
+    guess with a low confidence. Text in a script no supported language
+    uses (Greek, Georgian, ...) is not detected at all.
+    """
+
+    name = 'ngram'
+    # Probability given to an n-gram a language's profile doesn't contain
+    SMOOTHING = 5e-5
+    # Naive Bayes is overconfident on short texts; flatten the posterior
+    TEMPERATURE = 2.0
+
+    def __init__(self, languages: List[str] = None, profile_dir: str = None):
+        self.languages = list(languages or config.SUPPORTED_LANGUAGES)
+        self.profile_dir = profile_dir
+        self._log_probs: Dict[str, Dict[str, float]] = {}
+        self._supported: set = set()
+        self._known: set = set()
+        self._by_script: Dict[str, List[str]] = {}
+        self._normalized: Dict[str, str] = {}
+        self._normalize = None
+        self._normalize_vi = None
+        self._floor = math.log(self.SMOOTHING)
+        self.load_seconds: Optional[float] = None
+
+    def load(self):
+        """Read the profiles and build the log-probability tables (once)"""
+        if self.load_seconds is not None:
+            return
+
+        from langdetect.utils.ngram import NGram
+
+        started = time.perf_counter()
+        self._normalize = NGram.normalize
+        self._normalize_vi = NGram.normalize_vi
+        profile_dir = self.profile_dir or os.path.join(
+            os.path.dirname(__import__('langdetect').__file__), 'profiles'
+        )
+
+        for lang in self.languages:
+            freq, n_words = self._read_profiles(profile_dir, PROFILE_NAMES.get(lang, (lang,)))
+            self._add_profile(lang, freq, n_words, LANGUAGE_SCRIPTS.get(lang, 'Latin'))
+        self._supported = set(self._log_probs)
+
+        # Unsupported languages written in the same scripts compete for the text
+        used = {name for names in PROFILE_NAMES.values() for name in names} | self._supported
+        for name in sorted(os.listdir(profile_dir)):
+            if name in used:
+                continue
+            freq, n_words = self._read_profiles(profile_dir, (name,))
+            script = self._profile_script(freq)
+            if script in self._by_script:
+                self._add_profile(name, freq, n_words, script)
+
+        # Kanji-only text may be either
+        if 'ja' in self._log_probs:
+            self._by_script.setdefault('Han', []).append('ja')
+
+        self.load_seconds = time.perf_counter() - started
+        logger.info(f"Language profiles loaded: {len(self._supported)} languages "
+                    f"(+{len(self._log_probs) - len(self._supported)} competing), "
+                    f"{len(self._known)} n-grams in {self.load_seconds * 1000:.0f} ms")
+
+    @staticmethod
+    def _read_profiles(profile_dir: str, names) -> Tuple[Dict[str, int], List[int]]:
+        freq: Dict[str, int] = {}
+        n_words = [0, 0, 0]
+        for name in names:
+            with open(os.path.join(profile_dir, name), encoding='utf-8') as f:
+                profile = json.load(f)
+            for gram, count in profile['freq'].items():
+                freq[gram] = freq.get(gram, 0) + count
+            n_words = [total + count for total, count in zip(n_words, profile['n_words'])]
+        return freq, n_words
+
+    @staticmethod
+    def _profile_script(freq: Dict[str, int]) -> Optional[str]:
+        """Script of a profile's most frequent letters"""
+        counts: Dict[str, int] = {}
+        for gram, count in freq.items():
+            script = char_script(gram) if len(gram) == 1 else None
+            if script:
+                counts[script] = counts.get(script, 0) + count
+        return max(counts, key=counts.get) if counts else None
+
+    def _add_profile(self, lang: str, freq: Dict[str, int], n_words: List[int], script: str):
+        self._log_probs[lang] = {
+            gram: math.log(count / n_words[len(gram) - 1] + self.SMOOTHING)
+            for gram, count in freq.items() if 1 <= len(gram) <= 3
+        }
+        self._known.update(self._log_probs[lang])
+        self._by_script.setdefault(script, []).append(lang)
+
+    def _ngrams(self, text: str) -> List[str]:
+        chars = []
+        for ch in self._normalize_vi(text[:MAX_TEXT_CHARS]):
+            normalized = self._normalized.get(ch)
+            if normalized is None:
+                normalized = self._normalize(ch)
+                self._normalized[ch] = normalized
+            chars.append(normalized.lower())
+
+        grams = []
+        for word in ''.join(chars).split():
+            padded = f" {word} "
+            for n in (1, 2, 3):
+                for i in range(len(padded) - n + 1):
+                    gram = padded[i:i + n]
+                    if gram != ' ' and gram in self._known:
+                        grams.append(gram)
+        return grams
+
+    def detect(self, text: str) -> Tuple[Optional[str], float]:
+        self.load()
+
+        candidates = self._by_script.get(dominant_script(text))
+        if not candidates:
+            return None, 0.0
+        if len(candidates) == 1:
+            # No other known language is written this way (hangul, kana, Thai)
+            return candidates[0], 1.0
+
+        grams = self._ngrams(text)
+        if not grams:
+            return None, 0.0
+
+        floor = self._floor
+        scores = {}
+        for lang in candidates:
+            table = self._log_probs[lang]
+            scores[lang] = sum(table.get(gram, floor) for gram in grams)
+
+        best = max(scores, key=scores.get)
+        top = scores[best]
+        total = sum(math.exp((score - top) / self.TEMPERATURE) for score in scores.values())
+        if best not in self._supported:
+            best = max(self._supported.intersection(scores), key=scores.get)
+        return best, math.exp((scores[best] - top) / self.TEMPERATURE) / total
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            'languages': len(self._supported),
+            'competing_languages': len(self._log_probs) - len(self._supported),
+            'ngrams': len(self._known),
+            'load_ms': round(self.load_seconds * 1000, 1) if self.load_seconds is not None else None
+        }
+
+class LangdetectEngine:
+    """The previous per-call langdetect detection, seeded to be deterministic"""
+
+    name = 'langdetect'
+
+    def load(self):
+        from langdetect import DetectorFactory
+        DetectorFactory.seed = 0
+
+    def detect(self, text: str) -> Tuple[Optional[str], float]:
+        from langdetect import detect_langs, LangDetectException
+
+        self.load()
+        try:
+            best = detect_langs(text)[0]
+        except LangDetectException:
+            return None, 0.0
+        return best.lang.split('-')[0], best.prob
+
+    def stats(self) -> Dict[str, object]:
+        return {}
+
+ENGINES = {
+    NgramEngine.name: NgramEngine,
+    LangdetectEngine.name: LangdetectEngine
+}
+
+class LanguageDetector:
+    """Runs the configured engine, memoizing results for short strings.
+
+    Short messages ("thanks", "ok", a greeting) repeat a lot and are the
+    hardest to classify, so their results are kept in an LRU memo.
+    """
+
+    def __init__(self, engine=None, memo_size: int = None, memo_max_chars: int = None):
+        self.engine = engine or ENGINES.get(config.LANG_DETECT_ENGINE, NgramEngine)()
+        self.memo_size = memo_size or config.LANG_DETECT_MEMO_SIZE
+        self.memo_max_chars = memo_max_chars or config.LANG_DETECT_MEMO_MAX_CHARS
+        self._memo: "OrderedDict[str, Tuple[Optional[str], float]]" = OrderedDict()
+
+        self.calls = 0
+        self.memo_hits = 0
+        self.low_confidence = 0
+        self.latency = LatencyWindow()
+
+    def load(self):
+        """Load the engine's model (call from on_startup)"""
+        self.engine.load()
+
+    def detect(self, text: str) -> Tuple[Optional[str], float]:
+        """(language, confidence) for text; (None, 0.0) if it has no letters"""
+        self.calls += 1
+        key = ' '.join(text.split()).lower()
+        memoize = len(key) <= self.memo_max_chars
+
+        if memoize and key in self._memo:
+            self.memo_hits += 1
+            self._memo.move_to_end(key)
+            result = self._memo[key]
+        else:
+            started = time.perf_counter()
+            result = self.engine.detect(text)
+            self.latency.record(time.perf_counter() - started)
+            if memoize:
+                self._memo[key] = result
+                if len(self._memo) > self.memo_size:
+                    self._memo.popitem(last=False)
+
+        if result[1] < config.LANG_DETECT_MIN_CONFIDENCE:
+            self.low_confidence += 1
+        return result
+
+    def stats(self) -> Dict[str, object]:
+        stats = {
+            'engine': self.engine.name,
+            'calls': self.calls,
+            'memo_hits': self.memo_hits,
+            'memo_entries': len(self._memo),
+            'low_confidence': self.low_confidence,
+            'latency': self.latency.stats()
+        }
+        stats.update(self.engine.stats())
+        return stats
+
+# Shared detector used by TranslatorService, loaded in main.py
+language_detector = LanguageDetector()
+
+metrics.register('lang_detect', language_detector.stats)
@@ -0,0 +1,209 @@
+"""Durable outbound message queue for notifications sent outside a handler"""
+
+import asyncio
+import logging
+import time
+from typing import Optional, Dict, Any, List
+
+from aiogram.exceptions import (
+    TelegramBadRequest, TelegramForbiddenError, TelegramNotFound, TelegramRetryAfter
+)
+
+from bot.database import db as default_db
+from bot.utils import metrics
+from bot.utils.latency import LatencyWindow
+from bot.utils.rate_limit import MemoryBackend
+from config import config
+
+logger = logging.getLogger(__name__)
+
+class NotificationQueue:
+    """Messages to users (payment results, ...) stored in outbound_messages
+    and delivered by a background worker through the running Bot.
+
+    enqueue() only commits a row, so a webhook can be acknowledged without
+    waiting for Telegram. The worker claims due rows with one
+    UPDATE ... RETURNING that pushes their next attempt ``lease`` seconds
+    out: a row claimed by a process that dies is sent again later, and
+    two processes never claim the same row at once.
+
+    Sending stays within Telegram's limits - ``global_rate`` messages per
+    second overall and one message per ``chat_interval`` seconds per chat -
+    and a RetryAfter pauses all sending for the time Telegram asks.
+    Failed sends are retried with exponential backoff up to
+    ``max_attempts``; blocked bots and unknown chats are dropped.
+    """
+
+    CLAIM_SQL = '''
+        UPDATE outbound_messages SET next_attempt_at = :lease_until
+        WHERE id IN (
+            SELECT id FROM outbound_messages
+            WHERE next_attempt_at <= :now
+            ORDER BY next_attempt_at LIMIT :batch
+        )
+        RETURNING id, chat_id, text, attempts
+    '''
+
+    def __init__(self, database=None, global_rate: float = None, chat_interval: float = None,
+                 max_attempts: int = None, lease: float = None, batch: int = None):
+        self.database = database or default_db
+        self.global_rate = global_rate or config.NOTIFY_GLOBAL_RATE
+        self.chat_interval = chat_interval or config.NOTIFY_CHAT_INTERVAL
+        self.max_attempts = max_attempts or config.NOTIFY_MAX_ATTEMPTS
+        self.lease = lease or config.NOTIFY_LEASE_SECONDS
+        self.batch = batch or config.NOTIFY_BATCH_SIZE
+
+        self.bot = None
+        self._limits = MemoryBackend()
+        self._paused_until = 0.0
+        self._wake = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+
+        self.enqueued = 0
+        self.sent = 0
+        self.retried = 0
+        self.dropped = 0
+        self.flood_waits = 0
+        self.latency = LatencyWindow()
+
+    def start(self, bot):
+        """Deliver through ``bot`` (call from on_startup)"""
+        self.bot = bot
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.ensure_future(self._run())
+
+    async def close(self):
+        """Stop the worker; undelivered messages stay queued for the next start"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+
+    async def enqueue(self, chat_id: int, text: str, delay: float = 0):
+        async with self.database.pool.acquire() as conn:
+            await conn.execute('''
+                INSERT INTO outbound_messages (chat_id, text, next_attempt_at) VALUES (?, ?, ?)
+            ''', (chat_id, text, time.time() + delay))
+            await conn.commit()
+        self.enqueued += 1
+        self._wake.set()
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            try:
+                wait = await self.deliver_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Notification worker error: {e}")
+                wait = 5.0
+            try:
+                await asyncio.wait_for(self._wake.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    async def deliver_due(self) -> float:
+        """Send the messages that are due; returns seconds until the next one"""
+        now = time.time()
+        if now < self._paused_until:
+            return self._paused_until - now
+
+        async with self.database.pool.acquire() as conn:
+            cursor = await conn.execute(self.CLAIM_SQL, {
+                'now': now, 'lease_until': now + self.lease, 'batch': self.batch
+            })
+            rows = await cursor.fetchall()
+            await conn.commit()
+
+        for index, (message_id, chat_id, text, attempts) in enumerate(rows):
+            if time.time() < self._paused_until:
+                # Flood wait: everything still claimed goes out after the pause
+                await self._reschedule([row[0] for row in rows[index:]], self._paused_until)
+                return self._paused_until - time.time()
+            await self._deliver(message_id, chat_id, text, attempts)
+
+        if len(rows) == self.batch:
+            return 0
+        async with self.database.pool.acquire() as conn:
+            cursor = await conn.execute('SELECT MIN(next_attempt_at) FROM outbound_messages')
+            next_at = (await cursor.fetchone())[0]
+        return min(self.lease, max(0.0, next_at - time.time())) if next_at is not None else self.lease
+
+    async def _deliver(self, message_id: int, chat_id: int, text: str, attempts: int):
+        chat_limit = await self._limits.hit(f"chat:{chat_id}", 1, self.chat_interval)
+        if not chat_limit.allowed:
+            await self._reschedule([message_id], time.time() + chat_limit.retry_after)
+            return
+
+        while True:
+            global_limit = await self._limits.hit('global', self.global_rate, 1)
+            if global_limit.allowed:
+                break
+            await asyncio.sleep(global_limit.retry_after)
+
+        started = time.monotonic()
+        try:
+            await self.bot.send_message(chat_id, text)
+        except TelegramRetryAfter as e:
+            self.flood_waits += 1
+            self._paused_until = time.time() + e.retry_after
+            logger.warning(f"Telegram flood wait {e.retry_after}s, notifications paused")
+            await self._reschedule([message_id], self._paused_until)
+            return
+        except (TelegramForbiddenError, TelegramNotFound, TelegramBadRequest) as e:
+            logger.warning(f"Cannot send notification to user {chat_id} - dropped: {e}")
+            await self._remove(message_id)
+            self.dropped += 1
+            return
+        except Exception as e:
+            attempts += 1
+            if attempts >= self.max_attempts:
+                logger.error(f"Notification to user {chat_id} failed {attempts} times - dropped: {e}")
+                await self._remove(message_id)
+                self.dropped += 1
+                return
+            delay = min(self.lease, 2 ** attempts)
+            logger.warning(f"Notification to user {chat_id} failed ({e}), retry in {delay}s")
+            async with self.database.pool.acquire() as conn:
+                await conn.execute('''
+                    UPDATE outbound_messages SET attempts = ?, next_attempt_at = ? WHERE id = ?
+                ''', (attempts, time.time() + delay, message_id))
+                await conn.commit()
+            self.retried += 1
+            return
+
+        self.latency.record(time.monotonic() - started)
+        await self._remove(message_id)
+        self.sent += 1
+
+    async def _reschedule(self, message_ids: List[int], at: float):
+        async with self.database.pool.acquire() as conn:
+            await conn.executemany('UPDATE outbound_messages SET next_attempt_at = ? WHERE id = ?',
+                                   [(at, message_id) for message_id in message_ids])
+            await conn.commit()
+
+    async def _remove(self, message_id: int):
+        async with self.database.pool.acquire() as conn:
+            await conn.execute('DELETE FROM outbound_messages WHERE id = ?', (message_id,))
+            await conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'running': bool(self._worker and not self._worker.done()),
+            'enqueued': self.enqueued,
+            'sent': self.sent,
+            'retried': self.retried,
+            'dropped': self.dropped,
+            'flood_waits': self.flood_waits,
+            'paused_for': round(max(0.0, self._paused_until - time.time()), 1),
+            'send_latency': self.latency.stats()
+        }
+
+# Shared queue; the worker is started in main.py with the running Bot
+notification_queue = NotificationQueue()
+
+metrics.register('notifications', notification_queue.stats)
@@ -1,19 +1,22 @@
 """Payment processing service"""
 
-import uuid
-import json
 from typing import Optional, Dict, Any
-from yookassa import Configuration, Payment
+from bot.services.yookassa_client import YooKassaClient, YooKassaError, IdempotenceKeys, yookassa_client
 from config import config
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Shared by all PaymentService instances: a purchase started from another
+# handler reuses the same key
+idempotence_keys = IdempotenceKeys()
+
+# A payment with one of these statuses is never returned for a new purchase
+FINAL_STATUSES = ('succeeded', 'canceled')
+
 class PaymentService:
-    def __init__(self):
-        if config.YOOKASSA_SHOP_ID and config.YOOKASSA_SECRET_KEY:
-            Configuration.account_id = config.YOOKASSA_SHOP_ID
-            Configuration.secret_key = config.YOOKASSA_SECRET_KEY
+    def __init__(self, client: YooKassaClient = None):
+        self.client = client or yookassa_client
 
     async def create_payment(self, user_id: int, subscription_type: str, amount: float,
                            description: str = None) -> Optional[Dict[str, Any]]:
@@ -28,9 +31,8 @@ class PaymentService:
             logger.error("YooKassa credentials are not properly configured - using placeholder values")
             return None
 
+        purchase = (user_id, subscription_type, str(amount))
         try:
-            payment_id = str(uuid.uuid4())
-
             payment_data = {
                 "amount": {
                     "value": str(amount),
@@ -49,17 +51,36 @@ class PaymentService:
                 }
             }
 
-            payment = Payment.create(payment_data, payment_id)
-
+            payment = await self.client.create_payment(payment_data, idempotence_keys.get(purchase))
+            if payment.get("status") in FINAL_STATUSES:
+                # The reused key belongs to a finished payment (e.g. canceled) - start a new one
+                logger.info(f"Payment {payment.get('id')} is {payment['status']}, creating a new one")
+                idempotence_keys.release(purchase)
+                payment = await self.client.create_payment(payment_data, idempotence_keys.get(purchase))
+
+            confirmation_url = (payment.get("confirmation") or {}).get("confirmation_url")
+            if not payment.get("id") or not confirmation_url:
+                logger.error(f"Payment creation error: no confirmation URL in response {payment}")
+                idempotence_keys.release(purchase)
+                return None
+            idempotence_keys.bind(purchase, payment["id"])
+
+            amount = payment.get("amount") or payment_data["amount"]
             return {
-                "payment_id": payment.id,
-                "status": payment.status,
-                "confirmation_url": payment.confirmation.confirmation_url,
-                "amount": float(payment.amount.value),
-                "currency": payment.amount.currency,
-                "description": payment.description
+                "payment_id": payment["id"],
+                "status": payment.get("status"),
+                "confirmation_url": confirmation_url,
+                "amount": float(amount["value"]),
+                "currency": amount["currency"],
+                "description": payment.get("description")
             }
 
+        except YooKassaError as e:
+            if e.status:
+                # Rejected, nothing was created - the next attempt needs a new key
+                idempotence_keys.release(purchase)
+            logger.error(f"Payment creation error: {e}")
+            return None
         except Exception as e:
             logger.error(f"Payment creation error: {e}")
             return None
@@ -70,15 +91,18 @@ class PaymentService:
             return None
 
         try:
-            payment = Payment.find_one(payment_id)
+            payment = await self.client.get_payment(payment_id)
+            amount = payment.get("amount")
+            if payment.get("status") in FINAL_STATUSES:
+                idempotence_keys.finish(payment_id)
 
             return {
-                "payment_id": payment.id,
-                "status": payment.status,
-                "paid": payment.paid,
-                "amount": float(payment.amount.value) if payment.amount else 0,
-                "currency": payment.amount.currency if payment.amount else "RUB",
-                "metadata": payment.metadata or {}
+                "payment_id": payment["id"],
+                "status": payment["status"],
+                "paid": payment.get("paid", False),
+                "amount": float(amount["value"]) if amount else 0,
+                "currency": amount["currency"] if amount else "RUB",
+                "metadata": payment.get("metadata") or {}
             }
 
         except Exception as e:
@@ -90,6 +114,8 @@ class PaymentService:
         try:
             event_type = webhook_data.get("event")
             payment_data = webhook_data.get("object", {})
+            if event_type in ("payment.succeeded", "payment.canceled"):
+                idempotence_keys.finish(payment_data.get("id"))
 
             if event_type == "payment.succeeded":
                 payment_id = payment_data.get("id")
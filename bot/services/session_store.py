@@ -0,0 +1,251 @@
+"""Per-message translation sessions for the callback buttons"""
+
+import asyncio
+import json
+import logging
+import time
+import zlib
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple
+
+from bot.database import ConnectionPool
+from bot.utils import metrics
+from bot.utils.cache import TTLCache
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# The metadata fields the callback buttons use; everything else is dropped
+SESSION_FIELDS = (
+    'original_text', 'basic_translation', 'enhanced_translation', 'alternatives',
+    'explanation', 'grammar', 'source_lang', 'target_lang', 'style'
+)
+
+# Payloads longer than this are zlib-compressed
+COMPRESS_MIN_BYTES = 256
+
+def pack(metadata: Dict[str, Any]) -> bytes:
+    """Compact payload: the session fields as a JSON array, compressed when long"""
+    data = json.dumps([metadata.get(field) for field in SESSION_FIELDS],
+                      ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if len(data) >= COMPRESS_MIN_BYTES:
+        return b'z' + zlib.compress(data)
+    return b'j' + data
+
+def unpack(payload: bytes) -> Dict[str, Any]:
+    data = zlib.decompress(payload[1:]) if payload[:1] == b'z' else payload[1:]
+    values = json.loads(data)
+    return {field: value for field, value in zip(SESSION_FIELDS, values) if value is not None}
+
+class MemorySessionBackend:
+    """LRU + TTL in process memory; lost on restart and not shared by replicas"""
+
+    name = 'memory'
+
+    def __init__(self, maxsize: int = None, ttl: int = None):
+        self.ttl = ttl or config.SESSION_TTL
+        self.maxsize = maxsize or config.SESSION_MAX_ENTRIES
+        self._sessions = TTLCache(self.maxsize, self.ttl)  # (user_id, message_id) -> payload
+        self._latest = TTLCache(self.maxsize, self.ttl)    # user_id -> message_id
+
+    async def set(self, user_id: int, message_id: int, payload: bytes):
+        self._sessions.set((user_id, message_id), payload)
+        if message_id >= (self._latest.peek(user_id) or 0):
+            self._latest.set(user_id, message_id)
+
+    async def get(self, user_id: int, message_id: int) -> Optional[bytes]:
+        return self._sessions.get((user_id, message_id))
+
+    async def latest(self, user_id: int) -> Optional[Tuple[int, bytes]]:
+        message_id = self._latest.peek(user_id)
+        if message_id is None:
+            return None
+        payload = self._sessions.get((user_id, message_id))
+        return (message_id, payload) if payload is not None else None
+
+    async def close(self):
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'entries': len(self._sessions),
+            'max_entries': self.maxsize,
+            'bytes': sum(len(payload) for payload in self._sessions.values()),
+            'evictions': self._sessions.evictions
+        }
+
+class SQLiteSessionBackend:
+    """Sessions in a SQLite file: survive restarts, expire after ``ttl`` seconds.
+
+    The operations are plain get/set with expiry, so a Redis backend
+    (SET key payload EX ttl) fits the same interface.
+    """
+
+    name = 'sqlite'
+
+    # Delete expired rows after this many writes
+    PURGE_EVERY = 500
+
+    def __init__(self, path: str = None, ttl: int = None):
+        self.path = path or config.SESSION_DB_PATH
+        self.ttl = ttl or config.SESSION_TTL
+        self.pool = None
+        self._ready = False
+        self._lock = asyncio.Lock()
+        self._writes = 0
+        self.entries = 0
+        self.bytes = 0
+
+    async def _ensure(self):
+        if self._ready:
+            return
+        async with self._lock:
+            if self._ready:
+                return
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self.pool = ConnectionPool(self.path, size=2)
+            async with self.pool.acquire() as db:
+                await db.execute('PRAGMA journal_mode=WAL')
+                await db.execute('''
+                    CREATE TABLE IF NOT EXISTS translation_sessions (
+                        user_id INTEGER NOT NULL,
+                        message_id INTEGER NOT NULL,
+                        payload BLOB NOT NULL,
+                        expires_at REAL NOT NULL,
+                        PRIMARY KEY (user_id, message_id)
+                    ) WITHOUT ROWID
+                ''')
+                await db.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_translation_sessions_expires
+                    ON translation_sessions (expires_at)
+                ''')
+                await db.commit()
+            self._ready = True
+            await self.purge_expired()
+
+    async def set(self, user_id: int, message_id: int, payload: bytes):
+        await self._ensure()
+        async with self.pool.acquire() as db:
+            await db.execute('''
+                INSERT OR REPLACE INTO translation_sessions (user_id, message_id, payload, expires_at)
+                VALUES (?, ?, ?, ?)
+            ''', (user_id, message_id, payload, time.time() + self.ttl))
+            await db.commit()
+        self.entries += 1
+        self.bytes += len(payload)
+
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            await self.purge_expired()
+
+    async def get(self, user_id: int, message_id: int) -> Optional[bytes]:
+        await self._ensure()
+        async with self.pool.acquire() as db:
+            cursor = await db.execute('''
+                SELECT payload FROM translation_sessions
+                WHERE user_id = ? AND message_id = ? AND expires_at > ?
+            ''', (user_id, message_id, time.time()))
+            row = await cursor.fetchone()
+        return row[0] if row else None
+
+    async def latest(self, user_id: int) -> Optional[Tuple[int, bytes]]:
+        await self._ensure()
+        async with self.pool.acquire() as db:
+            cursor = await db.execute('''
+                SELECT message_id, payload FROM translation_sessions
+                WHERE user_id = ? AND expires_at > ?
+                ORDER BY message_id DESC LIMIT 1
+            ''', (user_id, time.time()))
+            row = await cursor.fetchone()
+        return (row[0], row[1]) if row else None
+
+    async def purge_expired(self):
+        """Delete expired rows and recount what is stored"""
+        if not self._ready:
+            return
+        async with self.pool.acquire() as db:
+            await db.execute('DELETE FROM translation_sessions WHERE expires_at <= ?', (time.time(),))
+            await db.commit()
+            cursor = await db.execute('''
+                SELECT COUNT(*), COALESCE(SUM(LENGTH(payload)), 0) FROM translation_sessions
+            ''')
+            self.entries, self.bytes = await cursor.fetchone()
+
+    async def close(self):
+        if self.pool:
+            await self.pool.close()
+        self.pool = None
+        self._ready = False
+
+    def stats(self) -> Dict[str, Any]:
+        # Replaced rows are counted until the next purge
+        return {'entries': self.entries, 'bytes': self.bytes}
+
+BACKENDS = {
+    MemorySessionBackend.name: MemorySessionBackend,
+    SQLiteSessionBackend.name: SQLiteSessionBackend
+}
+
+class SessionStore:
+    """Translation metadata keyed on (user_id, message_id).
+
+    Callback buttons look up the message they are attached to, so buttons
+    under older translations keep working. A message without a session of
+    its own (e.g. a menu sent later) falls back to the user's latest one.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or BACKENDS.get(config.SESSION_BACKEND, SQLiteSessionBackend)()
+        self.saves = 0
+        self.hits = 0
+        self.fallbacks = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def save(self, user_id: int, message_id: int, metadata: Dict[str, Any]):
+        try:
+            await self.backend.set(user_id, message_id, pack(metadata))
+            self.saves += 1
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Session save error for user {user_id}: {e}")
+
+    async def get(self, user_id: int, message_id: int = None) -> Dict[str, Any]:
+        """Metadata of the message, else of the user's latest translation, else {}"""
+        try:
+            payload = await self.backend.get(user_id, message_id) if message_id else None
+            if payload is not None:
+                self.hits += 1
+                return unpack(payload)
+
+            latest = await self.backend.latest(user_id)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Session read error for user {user_id}: {e}")
+            return {}
+
+        if latest is None:
+            self.misses += 1
+            return {}
+        self.fallbacks += 1
+        return unpack(latest[1])
+
+    async def close(self):
+        await self.backend.close()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            'backend': self.backend.name,
+            'saves': self.saves,
+            'hits': self.hits,
+            'fallbacks': self.fallbacks,
+            'misses': self.misses,
+            'errors': self.errors
+        }
+        stats.update(self.backend.stats())
+        return stats
+
+# Shared store used by the translation handlers and callbacks
+translation_sessions = SessionStore()
+
+metrics.register('sessions', translation_sessions.stats)
@@ -0,0 +1,198 @@
+"""Two-level cache for translation results"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import unicodedata
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple
+
+from bot.database import ConnectionPool
+from bot.utils import metrics
+from bot.utils.cache import TTLCache
+from config import config
+
+logger = logging.getLogger(__name__)
+
+class TranslationCache:
+    """Bounded in-memory LRU in front of a persistent SQLite tier.
+
+    Entries hold the final translation together with its metadata (basic
+    translation, alternatives, grammar...), serialized as JSON, and expire
+    after ``config.CACHE_TTL`` seconds in both tiers.
+    """
+
+    # Purge expired disk rows after this many inserts
+    PURGE_EVERY = 500
+
+    def __init__(self, path: str = None, maxsize: int = None, ttl: int = None,
+                 disk: bool = None):
+        self.ttl = ttl or config.CACHE_TTL
+        self.memory = TTLCache(maxsize or config.TRANSLATION_CACHE_SIZE, self.ttl)
+        self.disk_enabled = config.TRANSLATION_CACHE_DISK if disk is None else disk
+        self.path = path or config.TRANSLATION_CACHE_PATH
+        self.pool = None
+        self._disk_ready = False
+        self._disk_lock = asyncio.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_bytes = 0
+        self._inserts = 0
+
+    @staticmethod
+    def make_key(text: str, target_lang: str, source_lang: str = None,
+                 style: str = 'informal', enhance: bool = True,
+                 explain_grammar: bool = False) -> str:
+        """Key on whitespace/Unicode-normalized text plus translation parameters"""
+        normalized = unicodedata.normalize('NFC', ' '.join(text.split()))
+        payload = json.dumps(
+            [normalized, source_lang or 'auto', target_lang, style,
+             bool(enhance), bool(explain_grammar)],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    async def _ensure_disk(self) -> bool:
+        if not self.disk_enabled:
+            return False
+        if self._disk_ready:
+            return True
+
+        async with self._disk_lock:
+            if not self._disk_ready and self.disk_enabled:
+                await self._open_disk()
+        return self._disk_ready
+
+    async def _open_disk(self):
+        try:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self.pool = ConnectionPool(self.path, size=2)
+            async with self.pool.acquire() as db:
+                await db.execute('PRAGMA journal_mode=WAL')
+                await db.execute('''
+                    CREATE TABLE IF NOT EXISTS translation_cache (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL,
+                        created_at REAL NOT NULL
+                    )
+                ''')
+                await db.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_translation_cache_created
+                    ON translation_cache (created_at)
+                ''')
+                await db.commit()
+            self._disk_ready = True
+            await self.purge_expired()
+        except Exception as e:
+            logger.error(f"Translation cache disk tier unavailable: {e}")
+            self.disk_enabled = False
+
+    async def get(self, key: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Return (translated, metadata) or None"""
+        value = self.memory.get(key)
+        if value is not None:
+            self.memory_hits += 1
+            return self._decode(value)
+
+        if await self._ensure_disk():
+            try:
+                async with self.pool.acquire() as db:
+                    cursor = await db.execute('''
+                        SELECT value, created_at FROM translation_cache
+                        WHERE key = ? AND created_at > ?
+                    ''', (key, time.time() - self.ttl))
+                    row = await cursor.fetchone()
+            except Exception as e:
+                logger.error(f"Translation cache read error: {e}")
+                row = None
+
+            if row:
+                self.disk_hits += 1
+                # Promote to the memory tier
+                self.memory.set(key, row[0])
+                return self._decode(row[0])
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, translated: str, metadata: Dict[str, Any]):
+        """Store a successful translation in both tiers"""
+        value = json.dumps({'translated': translated, 'metadata': metadata}, ensure_ascii=False)
+        self.memory.set(key, value)
+
+        if not await self._ensure_disk():
+            return
+
+        try:
+            async with self.pool.acquire() as db:
+                # A replaced row no longer counts towards the bytes on disk
+                cursor = await db.execute('''
+                    SELECT LENGTH(CAST(value AS BLOB)) FROM translation_cache WHERE key = ?
+                ''', (key,))
+                replaced = await cursor.fetchone()
+                await db.execute('''
+                    INSERT OR REPLACE INTO translation_cache (key, value, created_at)
+                    VALUES (?, ?, ?)
+                ''', (key, value, time.time()))
+                await db.commit()
+            self.disk_bytes += len(value.encode('utf-8')) - (replaced[0] if replaced else 0)
+        except Exception as e:
+            logger.error(f"Translation cache write error: {e}")
+            return
+
+        self._inserts += 1
+        if self._inserts % self.PURGE_EVERY == 0:
+            await self.purge_expired()
+
+    async def purge_expired(self):
+        """Delete expired disk rows and recount the bytes held on disk"""
+        if not self._disk_ready:
+            return
+
+        try:
+            async with self.pool.acquire() as db:
+                await db.execute('''
+                    DELETE FROM translation_cache WHERE created_at <= ?
+                ''', (time.time() - self.ttl,))
+                await db.commit()
+                cursor = await db.execute('''
+                    SELECT COALESCE(SUM(LENGTH(CAST(value AS BLOB))), 0) FROM translation_cache
+                ''')
+                self.disk_bytes = (await cursor.fetchone())[0]
+        except Exception as e:
+            logger.error(f"Translation cache purge error: {e}")
+
+    async def close(self):
+        if self.pool:
+            await self.pool.close()
+        self.pool = None
+        self._disk_ready = False
+
+    @staticmethod
+    def _decode(value: str) -> Tuple[str, Dict[str, Any]]:
+        data = json.loads(value)
+        return data['translated'], data['metadata']
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit ratio and bytes used per tier"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            'entries_memory': len(self.memory),
+            'bytes_memory': sum(len(value.encode('utf-8')) for value in self.memory.values()),
+            'bytes_disk': self.disk_bytes,
+            'disk_enabled': self.disk_enabled,
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_ratio': round(hits / lookups, 4) if lookups else 0.0
+        }
+
+# Shared cache used by TranslatorService
+translation_cache = TranslationCache()
+
+metrics.register('translation_cache', translation_cache.stats)
@@ -1,34 +1,90 @@
-import aiohttp
 import asyncio
+import copy
+import hashlib
 import json
-from typing import Optional, Dict, Any, Tuple
-from langdetect import detect, LangDetectException
-import openai
+import time
+from typing import Optional, Dict, Any, Tuple, List, Callable, Awaitable
 from config import config
+from bot.services.circuit_breaker import get_breaker
+from bot.services.gpt_enhancer import LANG_NAMES, STYLE_PROMPTS, enhancement_batcher
+from bot.services.http_client import http_clients
+from bot.services.lang_detect import language_detector
+from bot.services.translation_cache import TranslationCache, translation_cache
+from bot.utils import metrics
+from bot.utils.singleflight import SingleFlight
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Identical concurrent requests share one upstream call (across all instances)
+translation_flights = SingleFlight()
+enhancement_flights = SingleFlight()
+# Provider result of each translation flight, set before GPT enhancement starts
+basic_translations: Dict[str, asyncio.Future] = {}
+
+metrics.register('singleflight', lambda: {
+    'translate': translation_flights.stats(),
+    'enhance': enhancement_flights.stats()
+})
+
+def pack_batches(texts: List[str], max_items: int, max_chars: int) -> List[List[int]]:
+    """Group text indices into consecutive batches within item and character limits"""
+    batches = []
+    current, chars = [], 0
+    for i, text in enumerate(texts):
+        if current and (len(current) >= max_items or chars + len(text) > max_chars):
+            batches.append(current)
+            current, chars = [], 0
+        current.append(i)
+        chars += len(text)
+    if current:
+        batches.append(current)
+    return batches
+
 class TranslatorService:
-    def __init__(self):
-        self.openai_client = openai.AsyncOpenAI(api_key=config.OPENAI_API_KEY)
+    STRATEGIES = ('sequential', 'hedged')
+    # (texts, characters) per request for providers that take arrays of texts
+    BATCH_LIMITS = {
+        'deepl': (50, 30000),
+        'yandex': (100, 10000)
+    }
+
+    def __init__(self, cache=translation_cache, strategy: str = None):
+        self.openai_client = http_clients.openai
         self.session = None
+        self.cache = cache
+        self.strategy = strategy or config.TRANSLATION_STRATEGY
+        if self.strategy not in self.STRATEGIES:
+            logger.warning(f"Unknown translation strategy '{self.strategy}', using sequential")
+            self.strategy = 'sequential'
 
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        self.session = http_clients.session
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        # The session is shared application-wide and closed on shutdown
+        self.session = None
 
     async def detect_language(self, text: str) -> Optional[str]:
         """Detect the language of the text"""
-        try:
-            lang = detect(text)
-            return lang
-        except LangDetectException:
-            return None
+        lang, _ = language_detector.detect(text)
+        return lang
+
+    async def detect_source_language(self, text: str) -> Tuple[Optional[str], Optional[str]]:
+        """(detected language, language to send to providers).
+
+        The second is None when detection isn't confident enough (or found
+        nothing, e.g. for a script no supported language uses) - providers
+        then detect the source language themselves.
+        """
+        lang, confidence = language_detector.detect(text)
+        if not lang:
+            logger.info("Source language not detected, leaving it to the provider")
+        elif confidence < config.LANG_DETECT_MIN_CONFIDENCE:
+            logger.info(f"Low-confidence detection {lang} ({confidence:.2f}), leaving it to the provider")
+            return lang, None
+        return lang, lang
 
     async def translate_with_yandex(self, text: str, target_lang: str,
                                    source_lang: str = None) -> Optional[str]:
@@ -36,31 +92,37 @@ class TranslatorService:
         if not config.YANDEX_API_KEY:
             return None
 
+        translations = await self.translate_many_with_yandex([text], target_lang, source_lang)
+        return translations[0] if translations else None
+
+    async def translate_many_with_yandex(self, texts: List[str], target_lang: str,
+                                         source_lang: str = None) -> Optional[List[str]]:
+        """Translate several texts in one Yandex Translate request"""
+        if not config.YANDEX_API_KEY:
+            return None
+
         url = "https://translate.api.cloud.yandex.net/translate/v2/translate"
         headers = {
             "Authorization": f"Api-Key {config.YANDEX_API_KEY}",
             "Content-Type": "application/json"
         }
 
-        if not source_lang:
-            source_lang = await self.detect_language(text)
-            if not source_lang:
-                return None
-
         data = {
-            "texts": [text],
-            "targetLanguageCode": target_lang,
-            "sourceLanguageCode": source_lang
+            "texts": texts,
+            "targetLanguageCode": target_lang
         }
+        # Without a source language Yandex detects it
+        if source_lang:
+            data["sourceLanguageCode"] = source_lang
 
         try:
             if not self.session:
-                self.session = aiohttp.ClientSession()
+                self.session = http_clients.session
 
             async with self.session.post(url, headers=headers, json=data) as response:
                 if response.status == 200:
                     result = await response.json()
-                    return result["translations"][0]["text"]
+                    return [item["text"] for item in result["translations"]]
                 else:
                     logger.error(f"Yandex Translate error: {response.status}")
                     return None
@@ -71,6 +133,12 @@ class TranslatorService:
     async def translate_with_deepl(self, text: str, target_lang: str,
                                   source_lang: str = None) -> Optional[str]:
         """Translate text using DeepL API"""
+        translations = await self.translate_many_with_deepl([text], target_lang, source_lang)
+        return translations[0] if translations else None
+
+    async def translate_many_with_deepl(self, texts: List[str], target_lang: str,
+                                        source_lang: str = None) -> Optional[List[str]]:
+        """Translate several texts in one DeepL request"""
         if not config.DEEPL_API_KEY:
             return None
 
@@ -97,23 +165,22 @@ class TranslatorService:
 
         target_lang = deepl_lang_map.get(target_lang, target_lang.upper())
 
-        data = {
-            "text": text,
-            "target_lang": target_lang
-        }
+        # Repeated "text" fields, one per segment
+        data = [("text", text) for text in texts]
+        data.append(("target_lang", target_lang))
 
         if source_lang:
             source_lang = deepl_lang_map.get(source_lang, source_lang.upper())
-            data["source_lang"] = source_lang
+            data.append(("source_lang", source_lang))
 
         try:
             if not self.session:
-                self.session = aiohttp.ClientSession()
+                self.session = http_clients.session
 
             async with self.session.post(url, headers=headers, data=data) as response:
                 if response.status == 200:
                     result = await response.json()
-                    return result["translations"][0]["text"]
+                    return [item["text"] for item in result["translations"]]
                 else:
                     logger.error(f"DeepL error: {response.status}")
                     return None
@@ -218,16 +285,28 @@ class TranslatorService:
     async def enhance_with_gpt(self, original_text: str, translated_text: str,
                               target_lang: str, style: str = 'informal',
                               explain_grammar: bool = False, user_id: int = None) -> Dict[str, Any]:
+        """Enhance translation using GPT, sharing the call with identical in-flight requests"""
+        key = hashlib.sha256(json.dumps(
+            [original_text, translated_text, target_lang, style, bool(explain_grammar)],
+            ensure_ascii=False
+        ).encode('utf-8')).hexdigest()
+
+        enhancement = await enhancement_flights.do(key, lambda: self._enhance_with_gpt(
+            original_text, translated_text, target_lang, style,
+            explain_grammar=explain_grammar, user_id=user_id
+        ))
+        return copy.deepcopy(enhancement)
+
+    async def _enhance_with_gpt(self, original_text: str, translated_text: str,
+                               target_lang: str, style: str = 'informal',
+                               explain_grammar: bool = False, user_id: int = None) -> Dict[str, Any]:
         """Enhance translation using GPT for natural language and style"""
-        style_prompts = {
-            'informal': 'casual and friendly, using colloquial expressions, contractions, and everyday language as if talking to a close friend',
-            'formal': 'formal and polite, using proper grammar, respectful language, and avoiding contractions - suitable for official documents and business correspondence',
-            'business': 'professional and business-oriented, using corporate terminology, concise language, and industry-appropriate expressions',
-            'travel': 'simple, clear and practical for tourists - using basic vocabulary, essential phrases, and avoiding complex grammar',
-            'academic': 'scholarly and precise, using technical terminology, complex sentence structures, and formal academic language'
-        }
+        if config.GPT_STRUCTURED_OUTPUT:
+            # JSON-schema output, batched with other requests arriving at the same time
+            return await enhancement_batcher.enhance(original_text, translated_text, target_lang,
+                                                     style, explain_grammar)
 
-        style_description = style_prompts.get(style, style_prompts['informal'])
+        style_description = STYLE_PROMPTS.get(style, STYLE_PROMPTS['informal'])
 
         # Get user's interface language for explanations
         from bot.database import db
@@ -235,13 +314,7 @@ class TranslatorService:
         interface_lang = user_info.get('interface_language', 'ru')
 
         # Get target language name for prompts
-        lang_names = {
-            'ru': 'Russian', 'en': 'English', 'es': 'Spanish', 'fr': 'French',
-            'de': 'German', 'it': 'Italian', 'pt': 'Portuguese', 'ja': 'Japanese',
-            'zh': 'Chinese', 'ko': 'Korean', 'ar': 'Arabic', 'hi': 'Hindi',
-            'tr': 'Turkish', 'pl': 'Polish', 'nl': 'Dutch', 'sv': 'Swedish'
-        }
-        target_lang_name = lang_names.get(target_lang, target_lang)
+        target_lang_name = LANG_NAMES.get(target_lang, target_lang)
 
         # Create prompt for enhanced features
         if explain_grammar:
@@ -352,65 +425,125 @@ Provide ONLY the enhanced translation in {target_lang_name} with {style} style.
                 'enhanced_translation': translated_text,
                 'alternatives': [],
                 'explanation': '',
-                'grammar': ''
+                'grammar': '',
+                'failed': True
             }
 
     async def translate(self, text: str, target_lang: str, source_lang: str = None,
                        style: str = 'informal', enhance: bool = True, user_id: int = None,
-                       explain_grammar: bool = False) -> Tuple[str, Dict[str, Any]]:
-        """Main translation method with enhancement"""
+                       explain_grammar: bool = False,
+                       on_basic: Callable[[str, Dict[str, Any]], Awaitable[None]] = None) -> Tuple[str, Dict[str, Any]]:
+        """Main translation method with enhancement.
+
+        ``on_basic(translated, metadata)`` is awaited with the provider result
+        before GPT enhancement starts, so the caller can show it right away.
+        It is not called for cache hits or when there is nothing to enhance.
+        Every caller sharing an in-flight translation gets its own call, made
+        outside the shared work.
+        """
         logger.info(f"Translation request: text='{text[:30]}...', target_lang={target_lang}, source_lang={source_lang}")
 
+        enhance = enhance and bool(config.OPENAI_API_KEY)
+        key = TranslationCache.make_key(text, target_lang, source_lang, style,
+                                        enhance, explain_grammar)
+
+        # Serve repeated phrases from cache (keyed before language detection)
+        if self.cache:
+            cached = await self.cache.get(key)
+            if cached:
+                translated, metadata = cached
+                metadata['original_text'] = text
+                logger.info(f"Translation cache hit: {source_lang or 'auto'} -> {target_lang}")
+                return translated, metadata
+
+        def start_flight():
+            basic = asyncio.get_running_loop().create_future()
+            basic_translations[key] = basic
+            return self._translate_flight(key, basic, text, target_lang, source_lang, style,
+                                          enhance, user_id, explain_grammar)
+
+        # Identical requests already in flight share that call's result
+        flight = translation_flights.start(key, start_flight)
+        basic = basic_translations.get(key)
+        if on_basic and basic is not None:
+            await asyncio.wait((flight, basic), return_when=asyncio.FIRST_COMPLETED)
+            if basic.done() and not basic.cancelled() and not flight.done():
+                basic_translated, basic_metadata = basic.result()
+                try:
+                    await on_basic(basic_translated, dict(basic_metadata, original_text=text))
+                except Exception as e:
+                    logger.error(f"Basic translation callback error: {e}")
+
+        translated, metadata = await asyncio.shield(flight)
+
+        metadata = copy.deepcopy(metadata)
+        if translated:
+            metadata['original_text'] = text
+        return translated, metadata
+
+    async def _translate_flight(self, cache_key: str, basic: asyncio.Future, *args) -> Tuple[str, Dict[str, Any]]:
+        """_translate_uncached() for a translation flight, publishing its provider result"""
+        try:
+            return await self._translate_uncached(cache_key, *args, basic=basic)
+        finally:
+            if basic_translations.get(cache_key) is basic:
+                del basic_translations[cache_key]
+            if not basic.done():
+                basic.cancel()
+
+    async def _translate_uncached(self, cache_key: str, text: str, target_lang: str,
+                                  source_lang: str, style: str, enhance: bool,
+                                  user_id: int, explain_grammar: bool,
+                                  basic: asyncio.Future = None) -> Tuple[str, Dict[str, Any]]:
+        """Detect, translate, enhance and store the result in the cache"""
         # Detect source language if not provided
+        provider_source_lang = source_lang
         if not source_lang:
-            source_lang = await self.detect_language(text)
+            source_lang, provider_source_lang = await self.detect_source_language(text)
             logger.info(f"Auto-detected source language: {source_lang}")
-            if not source_lang:
-                return None, {'error': 'Could not detect source language'}
 
         # Try translation services in order of preference
-        translated = None
-
-        # Try DeepL first (highest quality)
-        if config.DEEPL_API_KEY:
-            translated = await self.translate_with_deepl(text, target_lang, source_lang)
-
-        # Try Yandex if DeepL failed
-        if not translated and config.YANDEX_API_KEY:
-            translated = await self.translate_with_yandex(text, target_lang, source_lang)
-
-        # Fallback to Google Translate
-        if not translated:
-            logger.info(f"Trying Google Translate for: {text[:50]} -> {target_lang}")
-            translated = await self.translate_with_google(text, target_lang, source_lang)
-            if translated:
-                logger.info(f"Google Translate success: {translated[:50]}")
-            else:
-                logger.error("Google Translate failed")
-
-        # If all translation services fail, try a simple OpenAI-based translation
-        if not translated and config.OPENAI_API_KEY:
-            logger.info("All translation services failed, trying OpenAI fallback")
-            translated = await self.translate_with_openai_fallback(text, target_lang, source_lang)
-            if translated:
-                logger.info(f"OpenAI fallback translation success: {translated[:50]}")
+        chain = self.get_provider_chain()
+        if self.strategy == 'hedged':
+            translated, provider = await self._translate_hedged(chain, text, target_lang, provider_source_lang)
+        else:
+            translated, provider = await self._translate_sequential(chain, text, target_lang, provider_source_lang)
 
         if not translated:
             logger.error("All translation methods failed")
             return None, {'error': 'Translation failed'}
 
-        # Enhance with GPT if requested
+        logger.info(f"Basic translation by {provider}: {translated[:50]}")
+
+        return await self._finish_translation(cache_key, text, translated, provider, source_lang,
+                                              target_lang, style, enhance, user_id, explain_grammar,
+                                              basic)
+
+    async def _finish_translation(self, cache_key: Optional[str], text: str, translated: str,
+                                  provider: str, source_lang: str, target_lang: str, style: str,
+                                  enhance: bool, user_id: int,
+                                  explain_grammar: bool,
+                                  basic: asyncio.Future = None) -> Tuple[str, Dict[str, Any]]:
+        """Build metadata, enhance with GPT if requested and store the result in the cache"""
         metadata = {
             'source_lang': source_lang,
             'target_lang': target_lang,
             'style': style,
             'basic_translation': translated,
+            'provider': provider,
             'original_text': text  # Store original text for re-translation
         }
 
-        if enhance and config.OPENAI_API_KEY:
+        if enhance:
+            if basic is not None and not basic.done():
+                # Let the callers show the provider result while GPT works
+                basic.set_result((translated, dict(metadata)))
+
             logger.info(f"Starting GPT enhancement for text: {text[:50]}... with style: {style}")
             enhancement = await self.enhance_with_gpt(text, translated, target_lang, style, explain_grammar=explain_grammar, user_id=user_id)
+            if enhancement.pop('failed', False):
+                # Don't keep the unenhanced fallback for the whole cache TTL
+                cache_key = None
             logger.info(f"GPT enhancement result: {enhancement.get('enhanced_translation', 'No enhancement')[:50]}...")
             if enhancement['enhanced_translation']:
                 translated = enhancement['enhanced_translation']
@@ -419,8 +552,272 @@ Provide ONLY the enhanced translation in {target_lang_name} with {style} style.
             logger.info(f"GPT enhancement skipped: enhance={enhance}, openai_key_exists={bool(config.OPENAI_API_KEY)}")
 
         logger.info(f"Translation completed: {source_lang} -> {target_lang}, result='{translated[:50]}...'")
+
+        if cache_key and self.cache:
+            await self.cache.set(cache_key, translated, metadata)
+
         return translated, metadata
 
+    async def translate_many(self, texts: List[str], target_lang: str, source_lang: str = None,
+                             style: str = 'informal', enhance: bool = True, user_id: int = None,
+                             explain_grammar: bool = False) -> List[Tuple[Optional[str], Dict[str, Any]]]:
+        """Translate several segments with batched provider calls.
+
+        Returns one (translated, metadata) pair per input, in input order.
+        Segments go through the same cache and single-flight layer as
+        translate(); the ones still missing are packed into DeepL/Yandex
+        batches, and segments a batch couldn't translate fall back one by one.
+        """
+        enhance = enhance and bool(config.OPENAI_API_KEY)
+        keys = [TranslationCache.make_key(text, target_lang, source_lang, style,
+                                          enhance, explain_grammar) for text in texts]
+        results: Dict[str, Tuple[Optional[str], Dict[str, Any]]] = {}
+
+        if self.cache:
+            for key in set(keys):
+                cached = await self.cache.get(key)
+                if cached:
+                    results[key] = cached
+
+        # Identical segments are translated once; ones already in flight are joined
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key not in results and key not in translation_flights:
+                pending.setdefault(key, text)
+
+        batch = None
+        if pending:
+            batch = asyncio.ensure_future(self._translate_batch(
+                pending, target_lang, source_lang, style, enhance, user_id, explain_grammar
+            ))
+
+        async def from_batch(key: str):
+            return (await asyncio.shield(batch))[key]
+
+        def factory(key: str, text: str):
+            if key in pending:
+                return lambda: from_batch(key)
+            # The other caller's flight finished meanwhile: translate on our own
+            return lambda: self._translate_uncached(key, text, target_lang, source_lang, style,
+                                                    enhance, user_id, explain_grammar)
+
+        waiting = {key: text for key, text in zip(keys, texts) if key not in results}
+        outcomes = await asyncio.gather(*[
+            translation_flights.do(key, factory(key, text)) for key, text in waiting.items()
+        ])
+        results.update(zip(waiting, outcomes))
+        if batch:
+            # Consume the batch even if other callers' flights served all its keys
+            await batch
+
+        translated_segments = []
+        for key, text in zip(keys, texts):
+            translated, metadata = results[key]
+            metadata = copy.deepcopy(metadata)
+            if translated:
+                metadata['original_text'] = text
+            translated_segments.append((translated, metadata))
+        return translated_segments
+
+    async def _translate_batch(self, pending: Dict[str, str], target_lang: str, source_lang: str,
+                               style: str, enhance: bool, user_id: int,
+                               explain_grammar: bool) -> Dict[str, Tuple[Optional[str], Dict[str, Any]]]:
+        """Translate {cache_key: text} through the provider chain, batching where supported"""
+        results = {}
+
+        # Providers need one source language per request (None: they detect it)
+        groups: Dict[Optional[str], List[str]] = {}
+        source_langs: Dict[str, Optional[str]] = {}
+        for key, text in pending.items():
+            lang = provider_lang = source_lang
+            if not lang:
+                lang, provider_lang = await self.detect_source_language(text)
+            groups.setdefault(provider_lang, []).append(key)
+            source_langs[key] = lang
+
+        translations: Dict[str, Tuple[str, str]] = {}  # key -> (translation, provider)
+        batch_providers = {
+            'deepl': self.translate_many_with_deepl,
+            'yandex': self.translate_many_with_yandex
+        }
+
+        for lang, group in groups.items():
+            remaining = list(group)
+            for name, func in self.get_provider_chain():
+                if not remaining:
+                    break
+
+                if name in batch_providers:
+                    outputs = []
+                    for batch in pack_batches([pending[key] for key in remaining],
+                                              *self.BATCH_LIMITS[name]):
+                        batch_texts = [pending[remaining[i]] for i in batch]
+                        batch_outputs = await self._call_provider_batch(
+                            name, batch_providers[name], batch_texts, target_lang, lang
+                        )
+                        outputs.extend(zip(batch, batch_outputs))
+                else:
+                    singles = await asyncio.gather(*[
+                        self._call_provider(name, func, pending[key], target_lang, lang)
+                        for key in remaining
+                    ])
+                    outputs = list(enumerate(singles))
+
+                for i, translated in outputs:
+                    if translated:
+                        translations[remaining[i]] = (translated, name)
+                remaining = [key for key in remaining if key not in translations]
+
+            for key in remaining:
+                logger.error(f"All translation methods failed for segment '{pending[key][:30]}'")
+                results[key] = (None, {'error': 'Translation failed'})
+
+        finished = await asyncio.gather(*[
+            self._finish_translation(key, pending[key], translated, provider, source_langs[key],
+                                     target_lang, style, enhance, user_id, explain_grammar)
+            for key, (translated, provider) in translations.items()
+        ])
+        results.update(zip(translations.keys(), finished))
+        return results
+
+    async def _call_provider_batch(self, name: str, func: Callable, texts: List[str],
+                                   target_lang: str, source_lang: str) -> List[Optional[str]]:
+        """One batched provider request through its circuit breaker"""
+        breaker = get_breaker(name)
+        if not breaker.allow():
+            logger.info(f"Skipping {name} batch: circuit breaker {breaker.state}")
+            return [None] * len(texts)
+
+        started = time.monotonic()
+        try:
+            result = await func(texts, target_lang, source_lang)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"{name} batch exception: {e}")
+            result = None
+
+        if result and len(result) == len(texts):
+            breaker.record_success(time.monotonic() - started)
+            return result
+
+        breaker.record_failure()
+        logger.warning(f"{name} batch of {len(texts)} returned no translation (breaker {breaker.state})")
+        return [None] * len(texts)
+
+    def get_provider_chain(self) -> List[Tuple[str, Callable]]:
+        """Healthy translation providers in quality order (fastest first with ADAPTIVE_PROVIDER_ORDER)"""
+        chain = []
+        if config.DEEPL_API_KEY:
+            chain.append(('deepl', self.translate_with_deepl))  # highest quality
+        if config.YANDEX_API_KEY:
+            chain.append(('yandex', self.translate_with_yandex))
+        chain.append(('google', self.translate_with_google))
+
+        if config.ADAPTIVE_PROVIDER_ORDER:
+            # Stable sort: providers without enough samples keep their preference slot
+            def observed_latency(provider):
+                latency = get_breaker(provider[0]).latency
+                if len(latency) < config.BREAKER_MIN_CALLS:
+                    return 0.0
+                return latency.percentile(50)
+
+            chain.sort(key=observed_latency)
+
+        # The LLM fallback is the most expensive, so it always goes last
+        if config.OPENAI_API_KEY:
+            chain.append(('openai', self.translate_with_openai_fallback))
+
+        healthy = [provider for provider in chain if get_breaker(provider[0]).is_available()]
+        if not healthy:
+            logger.warning("All translation provider breakers are open, trying every provider")
+            return chain
+        return healthy
+
+    async def _call_provider(self, name: str, func: Callable, text: str,
+                             target_lang: str, source_lang: str) -> Optional[str]:
+        """Call one provider through its circuit breaker"""
+        breaker = get_breaker(name)
+        if not breaker.allow():
+            logger.info(f"Skipping {name}: circuit breaker {breaker.state}")
+            return None
+
+        started = time.monotonic()
+        try:
+            result = await func(text, target_lang, source_lang)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"{name} provider exception: {e}")
+            result = None
+
+        if result:
+            breaker.record_success(time.monotonic() - started)
+        else:
+            breaker.record_failure()
+            logger.warning(f"{name} provider returned no translation (breaker {breaker.state})")
+        return result
+
+    async def _translate_sequential(self, chain, text: str, target_lang: str,
+                                    source_lang: str) -> Tuple[Optional[str], Optional[str]]:
+        """Try providers one after another until one succeeds"""
+        for name, func in chain:
+            translated = await self._call_provider(name, func, text, target_lang, source_lang)
+            if translated:
+                return translated, name
+        return None, None
+
+    def get_hedge_delay(self, name: str) -> float:
+        """How long to wait on a provider before also starting the next one"""
+        observed = get_breaker(name).latency.percentile(config.HEDGE_PERCENTILE)
+        if observed is None:
+            return config.HEDGE_DELAY
+        return min(max(observed, config.HEDGE_DELAY_MIN), config.HEDGE_DELAY_MAX)
+
+    async def _translate_hedged(self, chain, text: str, target_lang: str,
+                                source_lang: str) -> Tuple[Optional[str], Optional[str]]:
+        """Race providers: start the next one whenever the running ones are slow or
+        fail, keep the first good answer and cancel the rest"""
+        names = {}
+        pending = set()
+        next_index = 0
+
+        def launch():
+            nonlocal next_index
+            name, func = chain[next_index]
+            next_index += 1
+            task = asyncio.create_task(self._call_provider(name, func, text, target_lang, source_lang))
+            names[task] = name
+            pending.add(task)
+            return name
+
+        try:
+            last_launched = None
+            while pending or next_index < len(chain):
+                if not pending:
+                    last_launched = launch()
+
+                timeout = self.get_hedge_delay(last_launched) if next_index < len(chain) else None
+                done, _ = await asyncio.wait(pending, timeout=timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                pending.difference_update(done)
+
+                for task in done:
+                    if task.result():
+                        return task.result(), names[task]
+
+                # Slow (timeout) or failed - bring in the next provider
+                if next_index < len(chain):
+                    if not done:
+                        logger.info(f"Hedging: {last_launched} slower than "
+                                    f"{self.get_hedge_delay(last_launched):.2f}s, starting {chain[next_index][0]}")
+                    last_launched = launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return None, None
+
     async def get_language_name(self, lang_code: str, interface_lang: str = 'ru') -> str:
         """Get language name in the interface language"""
         names = {
@@ -483,4 +880,7 @@ Provide ONLY the enhanced translation in {target_lang_name} with {style} style.
         }
 
         lang_names = names.get(interface_lang, names['en'])
+        if not lang_code:
+            # Left to the provider to detect
+            return 'Автоопределение' if interface_lang == 'ru' else 'Auto-detected'
         return lang_names.get(lang_code, lang_code.upper())
\ No newline at end of file
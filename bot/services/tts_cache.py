@@ -0,0 +1,225 @@
+"""Content-addressed cache for synthesized speech"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+
+import aiofiles
+
+from bot.utils import metrics
+from config import config
+
+logger = logging.getLogger(__name__)
+
+class TTSCache:
+    """Size-bounded directory of audio files with an in-memory LRU index.
+
+    Files are named by the hash of (text, language, provider, voice, speed),
+    so identical requests map to the same file; the extension follows the
+    audio (.mp3 from the providers, .ogg for stitched Opus notes). Once Telegram has stored an
+    upload, its file_id is remembered next to the entry and the audio can be
+    resent without reading or uploading it again. The index (LRU order and
+    file_ids) is saved on close() and rebuilt from the directory otherwise.
+    Scanning and saving the directory run in the default executor.
+    """
+
+    INDEX_FILE = 'index.json'
+    FORMATS = ('mp3', 'ogg')
+
+    def __init__(self, path: str = None, max_bytes: int = None):
+        self.path = Path(path or config.TTS_CACHE_PATH)
+        self.max_bytes = max_bytes or config.TTS_CACHE_MAX_BYTES
+        # key -> {'size': int, 'file_id': Optional[str], 'format': str}, least recently used first
+        self._index: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+        self.bytes_total = 0
+
+        self.disk_hits = 0
+        self.file_id_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(text: str, language: str, provider: str, voice_type: str = None,
+                 speed: float = 1.0) -> str:
+        normalized = unicodedata.normalize('NFC', ' '.join(text.split()))
+        payload = json.dumps(
+            [normalized, language, provider, voice_type, round(float(speed), 2)],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _file(self, key: str, audio_format: str = 'mp3') -> Path:
+        return self.path / f"{key}.{audio_format}"
+
+    @staticmethod
+    def audio_format(audio_data: bytes) -> str:
+        return 'ogg' if audio_data.startswith(b'OggS') else 'mp3'
+
+    async def _load(self):
+        """Build the index from the directory on first use"""
+        async with self._load_lock:
+            if self._loaded:
+                return
+            loop = asyncio.get_running_loop()
+            try:
+                entries = await loop.run_in_executor(None, self._scan)
+            except Exception as e:
+                logger.error(f"TTS cache load error: {e}")
+                entries = []
+
+            for key, size, file_id, audio_format in entries:
+                self._index[key] = {'size': size, 'file_id': file_id, 'format': audio_format}
+                self.bytes_total += size
+            self._loaded = True
+
+    def _scan(self) -> List[Tuple[str, int, Optional[str], str]]:
+        """(key, size, file_id, format) of the cached files, oldest first"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        file_ids = {}
+        index_path = self.path / self.INDEX_FILE
+        if index_path.exists():
+            file_ids = json.loads(index_path.read_text())
+
+        files = []
+        for audio_format in self.FORMATS:
+            for file in self.path.glob(f'*.{audio_format}'):
+                stat = file.stat()
+                files.append((stat.st_mtime, file.stem, stat.st_size, audio_format))
+        files.sort()
+        return [(key, size, file_ids.get(key), audio_format)
+                for _, key, size, audio_format in files]
+
+    async def get(self, key: str, need_audio: bool = False) -> Optional[Dict[str, Any]]:
+        """{'file_id', 'audio', 'format'} for key, or None on a miss.
+
+        When a file_id is known and ``need_audio`` is false the file isn't
+        read and 'audio' is None - resend by file_id instead.
+        """
+        if not self._loaded:
+            await self._load()
+
+        entry = self._index.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._index.move_to_end(key)
+
+        if entry['file_id'] and not need_audio:
+            self.file_id_hits += 1
+            return {'file_id': entry['file_id'], 'audio': None, 'format': entry['format']}
+
+        try:
+            async with aiofiles.open(self._file(key, entry['format']), 'rb') as f:
+                audio_data = await f.read()
+        except OSError:
+            # Removed behind our back
+            self._drop(key)
+            self.misses += 1
+            return None
+
+        self.disk_hits += 1
+        return {'file_id': entry['file_id'], 'audio': audio_data, 'format': entry['format']}
+
+    async def set(self, key: str, audio_data: bytes):
+        """Store audio under key, evicting least recently used files past max_bytes"""
+        if not self._loaded:
+            await self._load()
+        if len(audio_data) > self.max_bytes:
+            return
+
+        audio_format = self.audio_format(audio_data)
+        try:
+            tmp_path = self._file(key).with_suffix('.tmp')
+            async with aiofiles.open(tmp_path, 'wb') as f:
+                await f.write(audio_data)
+            os.replace(tmp_path, self._file(key, audio_format))
+        except OSError as e:
+            logger.error(f"TTS cache write error: {e}")
+            return
+
+        previous = self._index.get(key)
+        self._drop(key, unlink=previous is not None and previous['format'] != audio_format)
+        self._index[key] = {'size': len(audio_data), 'file_id': None, 'format': audio_format}
+        self.bytes_total += len(audio_data)
+        self._evict()
+
+    def remember_file_id(self, key: str, file_id: str):
+        """Remember the Telegram file_id of an uploaded cache entry"""
+        entry = self._index.get(key)
+        if entry is not None:
+            entry['file_id'] = file_id
+
+    def forget_file_id(self, key: str):
+        """Drop a file_id Telegram no longer accepts"""
+        entry = self._index.get(key)
+        if entry is not None:
+            entry['file_id'] = None
+
+    def _drop(self, key: str, unlink: bool = True):
+        entry = self._index.pop(key, None)
+        if entry is None:
+            return
+        self.bytes_total -= entry['size']
+        if unlink:
+            try:
+                self._file(key, entry['format']).unlink()
+            except OSError:
+                pass
+
+    def _evict(self):
+        while self.bytes_total > self.max_bytes and self._index:
+            oldest = next(iter(self._index))
+            self._drop(oldest)
+            self.evictions += 1
+
+    async def close(self):
+        """Persist LRU order and file_ids (call from on_shutdown)"""
+        if not self._loaded:
+            return
+
+        files = [(key, entry['format']) for key, entry in self._index.items()]
+        file_ids = {key: entry['file_id'] for key, entry in self._index.items()
+                    if entry['file_id']}
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self._save, files, file_ids)
+        except Exception as e:
+            logger.error(f"TTS cache save error: {e}")
+
+    def _save(self, files: List[Tuple[str, str]], file_ids: Dict[str, str]):
+        # Touch files in LRU order so a restart rebuilds the same order
+        for position, (key, audio_format) in enumerate(files):
+            try:
+                os.utime(self._file(key, audio_format), (position, position))
+            except FileNotFoundError:
+                pass
+        tmp_path = self.path / f"{self.INDEX_FILE}.tmp"
+        tmp_path.write_text(json.dumps(file_ids))
+        os.replace(tmp_path, self.path / self.INDEX_FILE)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.disk_hits + self.file_id_hits + self.misses
+        return {
+            'entries': len(self._index),
+            'bytes': self.bytes_total,
+            'max_bytes': self.max_bytes,
+            'file_ids': sum(1 for entry in self._index.values() if entry['file_id']),
+            'disk_hits': self.disk_hits,
+            'file_id_hits': self.file_id_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': round((self.disk_hits + self.file_id_hits) / lookups, 3) if lookups else 0.0
+        }
+
+# Shared cache used by VoiceService and the voice handlers
+tts_cache = TTSCache()
+
+metrics.register('tts_cache', tts_cache.stats)
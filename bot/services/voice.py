@@ -1,48 +1,155 @@
-import os
 import io
 import asyncio
+import re
 import tempfile
-from typing import Optional, Tuple
+import time
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple, Union
 from pathlib import Path
 import aiofiles
-import aiohttp
-from pydub import AudioSegment
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import BufferedInputFile
 from gtts import gTTS
-import openai
 from config import config
+from bot.services import audio_pool as audio_jobs
+from bot.services.audio_pool import AudioPoolBusy, audio_pool
+from bot.services.circuit_breaker import get_breaker
+from bot.services.http_client import http_clients
+from bot.services.tts_cache import tts_cache
+from bot.utils import metrics
+from bot.utils.latency import LatencyHistogram, LatencyWindow
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Containers the Whisper API accepts as-is (Telegram voice notes are .oga)
+WHISPER_FORMATS = {'flac', 'm4a', 'mp3', 'mp4', 'mpeg', 'mpga', 'oga', 'ogg', 'wav', 'webm'}
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+def _pydub_format(extension: Optional[str]) -> Optional[str]:
+    """ffmpeg format name for a file extension (.oga is plain OGG)"""
+    return 'ogg' if extension == 'oga' else extension
+
+# Bounded pool for the blocking gTTS client, so synthesis never runs on the event loop
+gtts_executor = ThreadPoolExecutor(max_workers=config.GTTS_WORKERS, thread_name_prefix='gtts')
+gtts_latency = LatencyHistogram()
+gtts_stats = {'errors': 0}
+
+metrics.register('gtts', lambda: dict(gtts_latency.stats(), **gtts_stats))
+
+def _synthesize_gtts(text: str, lang_code: str, slow: bool) -> bytes:
+    """Fetch all gTTS MP3 segments into memory (runs in gtts_executor)"""
+    buffer = io.BytesIO()
+    gTTS(text=text, lang=lang_code, slow=slow).write_to_fp(buffer)
+    return buffer.getvalue()
+
+SENTENCE_END = re.compile(r'(?<=[.!?…。！？])\s+')
+
+def split_sentences(text: str, max_chars: int = None) -> List[str]:
+    """Group sentences into chunks of at most max_chars for chunked synthesis"""
+    max_chars = max_chars or config.TTS_STREAM_CHUNK_CHARS
+    chunks = []
+    current = ''
+
+    for sentence in SENTENCE_END.split(text.strip()):
+        # A sentence longer than a chunk is cut at the last space that fits
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(' ', 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            if current:
+                chunks.append(current)
+                current = ''
+            chunks.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        elif sentence:
+            current = f"{current} {sentence}" if current else sentence
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+class UserSlots:
+    """Per-user cap on concurrent synthesis calls; idle users hold no state.
+
+    Calls without a user_id aren't capped.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._slots: Dict[Any, list] = {}  # user_id -> [semaphore, holders + waiters]
+
+    @asynccontextmanager
+    async def slot(self, user_id):
+        if user_id is None:
+            yield
+            return
+
+        entry = self._slots.setdefault(user_id, [asyncio.Semaphore(self.limit), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._slots[user_id]
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+tts_user_slots = UserSlots(config.TTS_USER_CONCURRENCY)
+tts_stream_stats = {
+    'ttfb': LatencyWindow(),
+    'total': LatencyWindow(),
+    'stitched': 0,
+    'joined_mp3': 0
+}
+
+metrics.register('tts_stream', lambda: {
+    'ttfb': tts_stream_stats['ttfb'].stats(),
+    'total': tts_stream_stats['total'].stats(),
+    'stitched': tts_stream_stats['stitched'],
+    'joined_mp3': tts_stream_stats['joined_mp3'],
+    'active_users': len(tts_user_slots)
+})
+
 class VoiceService:
     def __init__(self):
-        self.openai_client = openai.AsyncOpenAI(api_key=config.OPENAI_API_KEY) if config.OPENAI_API_KEY else None
+        self.openai_client = http_clients.openai
         self.session = None
 
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        self.session = http_clients.session
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        # The session is shared application-wide and closed on shutdown
+        self.session = None
 
-    async def transcribe_with_whisper(self, audio_file_path: str) -> Optional[str]:
-        """Transcribe audio using OpenAI Whisper API"""
+    async def transcribe_with_whisper(self, audio: Union[str, BinaryIO],
+                                      filename: str = None) -> Optional[str]:
+        """Transcribe audio using OpenAI Whisper API (file path or in-memory buffer)"""
         if not self.openai_client:
             return None
 
         try:
-            async with aiofiles.open(audio_file_path, 'rb') as audio_file:
-                audio_data = await audio_file.read()
-
-            # Create a file-like object from bytes
-            audio_file = io.BytesIO(audio_data)
-            audio_file.name = Path(audio_file_path).name
-
+            if isinstance(audio, str):
+                async with aiofiles.open(audio, 'rb') as audio_file:
+                    audio_data = await audio_file.read()
+                filename = Path(audio).name
+                audio = io.BytesIO(audio_data)
+
+            # The extension tells the API which container/codec to expect
+            audio.seek(0)
             response = await self.openai_client.audio.transcriptions.create(
                 model=config.WHISPER_MODEL,
-                file=audio_file,
+                file=(filename or 'voice.ogg', audio),
                 response_format="text"
             )
 
@@ -51,19 +158,27 @@ class VoiceService:
             logger.error(f"Whisper transcription error: {e}")
             return None
 
-    async def transcribe_with_google(self, audio_file_path: str) -> Optional[str]:
+    async def transcribe_with_google(self, audio: Union[str, BinaryIO],
+                                     input_format: str = None) -> Optional[str]:
         """Transcribe audio using Google Speech-to-Text (fallback)"""
         try:
             import speech_recognition as sr
 
             recognizer = sr.Recognizer()
 
-            # Convert audio to WAV if needed
-            audio = AudioSegment.from_file(audio_file_path)
-            wav_path = audio_file_path.replace(Path(audio_file_path).suffix, '.wav')
-            audio.export(wav_path, format='wav')
+            if isinstance(audio, str):
+                input_format = Path(audio).suffix.lstrip('.') or None
+                async with aiofiles.open(audio, 'rb') as audio_file:
+                    audio_data = await audio_file.read()
+            else:
+                audio.seek(0)
+                audio_data = audio.read()
 
-            with sr.AudioFile(wav_path) as source:
+            # Convert audio to WAV in memory
+            wav_data = await audio_pool.run(audio_jobs.transcode, audio_data,
+                                            _pydub_format(input_format), 'wav')
+
+            with sr.AudioFile(io.BytesIO(wav_data)) as source:
                 audio_data = recognizer.record(source)
 
             # Run in executor to avoid blocking
@@ -73,25 +188,41 @@ class VoiceService:
                 lambda: recognizer.recognize_google(audio_data, language='auto')
             )
 
-            # Clean up temporary file
-            if wav_path != audio_file_path:
-                os.remove(wav_path)
-
             return text
+        except AudioPoolBusy:
+            raise
         except Exception as e:
             logger.error(f"Google STT error: {e}")
             return None
 
-    async def transcribe_audio(self, audio_file_path: str) -> Optional[str]:
+    async def transcribe_audio(self, audio: Union[str, BinaryIO],
+                               filename: str = None) -> Optional[str]:
         """Transcribe audio using available services"""
-        # Try Whisper first
+        if isinstance(audio, str):
+            filename = Path(audio).name
+        input_format = Path(filename or '').suffix.lstrip('.').lower() or None
+
+        # Try Whisper first, transcoding only formats it doesn't accept
         if config.OPENAI_API_KEY:
-            text = await self.transcribe_with_whisper(audio_file_path)
+            whisper_audio, whisper_name = audio, filename
+            if input_format not in WHISPER_FORMATS:
+                if isinstance(audio, str):
+                    async with aiofiles.open(audio, 'rb') as audio_file:
+                        audio_data = await audio_file.read()
+                else:
+                    audio.seek(0)
+                    audio_data = audio.read()
+                whisper_audio = io.BytesIO(await audio_pool.run(
+                    audio_jobs.transcode, audio_data, _pydub_format(input_format), 'mp3'
+                ))
+                whisper_name = f"{Path(filename or 'voice').stem}.mp3"
+
+            text = await self.transcribe_with_whisper(whisper_audio, whisper_name)
             if text:
                 return text
 
         # Fallback to Google
-        return await self.transcribe_with_google(audio_file_path)
+        return await self.transcribe_with_google(audio, input_format)
 
     async def generate_speech_gtts(self, text: str, language: str = 'en',
                                   speed: float = 1.0) -> Optional[bytes]:
@@ -129,29 +260,24 @@ class VoiceService:
 
             lang_code = gtts_lang_map.get(language, 'en')
 
-            # Generate speech
-            tts = gTTS(text=text, lang=lang_code, slow=(speed < 1.0))
-
-            # Save to temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as tmp_file:
-                tts.save(tmp_file.name)
-                tmp_path = tmp_file.name
-
-            # Read the file
-            async with aiofiles.open(tmp_path, 'rb') as f:
-                audio_data = await f.read()
+            # gTTS is a blocking HTTP client: run it in the gTTS thread pool
+            loop = asyncio.get_running_loop()
+            started = time.perf_counter()
+            try:
+                audio_data = await loop.run_in_executor(
+                    gtts_executor, _synthesize_gtts, text, lang_code, speed < 1.0
+                )
+            except Exception:
+                gtts_stats['errors'] += 1
+                raise
+            gtts_latency.record(time.perf_counter() - started)
 
             # Adjust speed if needed
             if speed != 1.0 and speed > 0:
-                audio = AudioSegment.from_mp3(io.BytesIO(audio_data))
-                # Speed up or slow down
-                audio = audio.speedup(playback_speed=speed)
-                buffer = io.BytesIO()
-                audio.export(buffer, format='mp3')
-                audio_data = buffer.getvalue()
-
-            # Clean up
-            os.remove(tmp_path)
+                try:
+                    audio_data = await audio_pool.run(audio_jobs.change_speed, audio_data, speed)
+                except AudioPoolBusy:
+                    logger.warning("Audio pool busy, sending speech at normal speed")
 
             return audio_data
         except Exception as e:
@@ -164,7 +290,7 @@ class VoiceService:
         if not config.ELEVENLABS_API_KEY:
             return None
 
-        url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id or 'default'}"
+        url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id or 'default'}/stream"
         headers = {
             "xi-api-key": config.ELEVENLABS_API_KEY,
             "Content-Type": "application/json"
@@ -181,14 +307,18 @@ class VoiceService:
 
         try:
             if not self.session:
-                self.session = aiohttp.ClientSession()
+                self.session = http_clients.session
 
             async with self.session.post(url, headers=headers, json=data) as response:
-                if response.status == 200:
-                    return await response.read()
-                else:
+                if response.status != 200:
                     logger.error(f"ElevenLabs error: {response.status}")
                     return None
+
+                # Consume the audio as ElevenLabs streams it out
+                buffer = io.BytesIO()
+                async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                    buffer.write(chunk)
+                return buffer.getvalue()
         except Exception as e:
             logger.error(f"ElevenLabs exception: {e}")
             return None
@@ -200,50 +330,198 @@ class VoiceService:
             return None
 
         try:
-            response = await self.openai_client.audio.speech.create(
+            # Consume the audio chunks as they arrive
+            buffer = io.BytesIO()
+            async with self.openai_client.audio.speech.with_streaming_response.create(
                 model="tts-1",
                 voice=voice,  # alloy, echo, fable, onyx, nova, shimmer
                 input=text,
                 speed=speed,  # 0.25 to 4.0
                 response_format="mp3"
-            )
+            ) as response:
+                async for chunk in response.iter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    buffer.write(chunk)
 
-            # Convert response to bytes
-            audio_data = response.content
-            return audio_data
+            return buffer.getvalue()
         except Exception as e:
             logger.error(f"OpenAI TTS error: {e}")
             return None
 
-    async def generate_speech(self, text: str, language: str = 'en',
-                            premium: bool = False, speed: float = 1.0,
-                            voice_type: str = 'alloy') -> Optional[bytes]:
-        """Generate speech using available services"""
+    def _speech_providers(self, premium: bool, speed: float, voice_type: str) -> List[Tuple[str, Optional[str], float, Callable]]:
+        """(provider, voice, speed, synthesize) in the order to try them"""
+        providers = []
+
         # For premium users, try higher quality services first
         if premium:
-            # Try ElevenLabs first
+            # ElevenLabs uses its own voice and ignores speed
             if config.ELEVENLABS_API_KEY:
-                audio = await self.generate_speech_elevenlabs(text, language)
-                if audio:
-                    return audio
+                providers.append(('elevenlabs', None, 1.0,
+                                  lambda text, language: self.generate_speech_elevenlabs(text, language)))
 
-            # Try OpenAI TTS with user settings
+            # OpenAI TTS with user settings
             if config.OPENAI_API_KEY:
-                audio = await self.generate_speech_openai(text, language, voice=voice_type, speed=speed)
-                if audio:
-                    return audio
+                providers.append(('openai', voice_type, speed,
+                                  lambda text, language: self.generate_speech_openai(text, language, voice=voice_type, speed=speed)))
 
         # Fallback to gTTS (free)
-        return await self.generate_speech_gtts(text, language, speed)
+        providers.append(('gtts', None, speed,
+                          lambda text, language: self.generate_speech_gtts(text, language, speed)))
+        return providers
+
+    async def generate_speech(self, text: str, language: str = 'en',
+                            premium: bool = False, speed: float = 1.0,
+                            voice_type: str = 'alloy') -> Optional[bytes]:
+        """Generate speech using available services"""
+        speech = await self.get_speech(text, language, premium, speed, voice_type, need_audio=True)
+        return speech['audio'] if speech else None
+
+    async def get_speech(self, text: str, language: str = 'en', premium: bool = False,
+                         speed: float = 1.0, voice_type: str = 'alloy',
+                         need_audio: bool = False, user_id: int = None) -> Optional[Dict[str, Any]]:
+        """Speech from the TTS cache or a provider: {'key', 'audio', 'file_id', 'format'}.
+
+        'audio' is None when the cached Telegram file_id can be resent instead.
+        Providers are tried in order, each from its cache entry first, so a
+        lower-tier entry is only used while the providers above it fail.
+        Texts of TTS_STREAM_MIN_CHARS or more are synthesized in sentence chunks.
+        """
+        providers = self._speech_providers(premium, speed, voice_type)
+
+        if len(text) >= config.TTS_STREAM_MIN_CHARS and len(text) > config.TTS_STREAM_CHUNK_CHARS:
+            chain = '+'.join(provider for provider, _, _, _ in providers)
+            key = tts_cache.make_key(text, language, f"stitched:{chain}", voice_type, speed)
+            cached = await tts_cache.get(key, need_audio=need_audio)
+            if cached:
+                return dict(cached, key=key)
+
+            audio = await self.generate_speech_stream(text, language, premium, speed,
+                                                      voice_type, user_id)
+            if not audio:
+                return None
+            await tts_cache.set(key, audio)
+            return {'key': key, 'audio': audio, 'file_id': None,
+                    'format': tts_cache.audio_format(audio)}
+
+        for provider in providers:
+            key = tts_cache.make_key(text, language, *provider[:3])
+            cached = await tts_cache.get(key, need_audio=need_audio)
+            if cached:
+                return dict(cached, key=key)
+
+            audio = await self._provider_speech(provider, text, language, cached=False)
+            if audio:
+                return {'key': key, 'audio': audio, 'file_id': None,
+                        'format': tts_cache.audio_format(audio)}
+
+        return None
+
+    async def _provider_speech(self, provider: Tuple[str, Optional[str], float, Callable],
+                               text: str, language: str, cached: bool = True) -> Optional[bytes]:
+        """Audio of text from one provider, through the TTS cache and its circuit breaker"""
+        name, voice, rate, synthesize = provider
+        key = tts_cache.make_key(text, language, name, voice, rate)
+        if cached:
+            speech = await tts_cache.get(key, need_audio=True)
+            if speech:
+                return speech['audio']
+
+        breaker = get_breaker(f"tts_{name}")
+        if not breaker.allow():
+            logger.info(f"Skipping TTS {name}: circuit breaker {breaker.state}")
+            return None
+
+        started = time.monotonic()
+        try:
+            audio = await synthesize(text, language)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"TTS {name} exception: {e}")
+            audio = None
+
+        if audio:
+            breaker.record_success(time.monotonic() - started)
+            await tts_cache.set(key, audio)
+        else:
+            breaker.record_failure()
+        return audio
+
+    async def generate_speech_stream(self, text: str, language: str = 'en',
+                                     premium: bool = False, speed: float = 1.0,
+                                     voice_type: str = 'alloy', user_id: int = None) -> Optional[bytes]:
+        """Synthesize sentence chunks concurrently and stitch them into one OGG/Opus note.
+
+        All chunks come from one provider, so the voice doesn't change mid-message:
+        if any chunk fails, the whole text moves to the next provider.
+        """
+        chunks = split_sentences(text)
+        started = time.perf_counter()
+        first_chunk_done = False
+
+        async def synthesize(provider, index: int, chunk: str) -> Optional[bytes]:
+            nonlocal first_chunk_done
+            async with tts_user_slots.slot(user_id):
+                audio = await self._provider_speech(provider, chunk, language)
+            if index == 0 and audio and not first_chunk_done:
+                first_chunk_done = True
+                tts_stream_stats['ttfb'].record(time.perf_counter() - started)
+            return audio
+
+        for provider in self._speech_providers(premium, speed, voice_type):
+            segments = await asyncio.gather(*[synthesize(provider, i, chunk)
+                                              for i, chunk in enumerate(chunks)])
+            if all(segments):
+                break
+            logger.warning(f"Streaming TTS with {provider[0]} failed for "
+                           f"{segments.count(None)}/{len(chunks)} chunks")
+        else:
+            logger.error("Streaming TTS failed with every provider")
+            return None
+
+        try:
+            audio = await audio_pool.run(audio_jobs.stitch_to_opus, segments, 'mp3')
+            tts_stream_stats['stitched'] += 1
+        except Exception as e:
+            # MP3 frames can simply be concatenated (e.g. no ffmpeg or a busy pool)
+            logger.warning(f"Opus stitching failed, sending joined MP3: {e}")
+            audio = b''.join(segments)
+            tts_stream_stats['joined_mp3'] += 1
+
+        tts_stream_stats['total'].record(time.perf_counter() - started)
+        return audio
+
+    async def answer_with_speech(self, message, text: str, language: str = 'en',
+                                 premium: bool = False, speed: float = 1.0,
+                                 voice_type: str = 'alloy', filename: str = 'translation.mp3') -> bool:
+        """Reply with a voice message, resending by file_id when Telegram already has it"""
+        user_id = message.chat.id
+        speech = await self.get_speech(text, language, premium, speed, voice_type, user_id=user_id)
+        if not speech:
+            return False
+
+        if speech['file_id']:
+            try:
+                await message.answer_voice(speech['file_id'])
+                return True
+            except TelegramBadRequest as e:
+                logger.warning(f"Cached voice file_id rejected, uploading again: {e}")
+                tts_cache.forget_file_id(speech['key'])
+                speech = await self.get_speech(text, language, premium, speed, voice_type,
+                                               need_audio=True, user_id=user_id)
+                if not speech:
+                    return False
+
+        filename = f"{Path(filename).stem}.{speech['format']}"
+        sent = await message.answer_voice(BufferedInputFile(speech['audio'], filename=filename))
+        if sent.voice:
+            tts_cache.remember_file_id(speech['key'], sent.voice.file_id)
+        return True
 
     async def convert_audio_format(self, audio_data: bytes, input_format: str,
                                   output_format: str = 'mp3') -> bytes:
         """Convert audio between formats"""
         try:
-            audio = AudioSegment.from_file(io.BytesIO(audio_data), format=input_format)
-            buffer = io.BytesIO()
-            audio.export(buffer, format=output_format)
-            return buffer.getvalue()
+            return await audio_pool.run(audio_jobs.transcode, audio_data, input_format, output_format)
         except Exception as e:
             logger.error(f"Audio conversion error: {e}")
             return audio_data
@@ -252,7 +530,7 @@ class VoiceService:
         """Download voice message from Telegram"""
         try:
             if not self.session:
-                self.session = aiohttp.ClientSession()
+                self.session = http_clients.session
 
             async with self.session.get(file_url) as response:
                 if response.status == 200:
@@ -264,6 +542,29 @@ class VoiceService:
             logger.error(f"Voice download error: {e}")
             return None
 
+    async def download_voice_buffer(self, file_url: str) -> Optional[BinaryIO]:
+        """Stream a Telegram file into memory, spilling to disk past VOICE_SPOOL_MAX_BYTES"""
+        buffer = tempfile.SpooledTemporaryFile(max_size=config.VOICE_SPOOL_MAX_BYTES)
+        try:
+            if not self.session:
+                self.session = http_clients.session
+
+            async with self.session.get(file_url) as response:
+                if response.status != 200:
+                    logger.error(f"Failed to download voice message: {response.status}")
+                    buffer.close()
+                    return None
+
+                async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                    buffer.write(chunk)
+
+            buffer.seek(0)
+            return buffer
+        except Exception as e:
+            logger.error(f"Voice download error: {e}")
+            buffer.close()
+            return None
+
     async def process_voice_message(self, file_id: str, bot) -> Optional[str]:
         """Process voice message from Telegram"""
         try:
@@ -271,50 +572,16 @@ class VoiceService:
             file = await bot.get_file(file_id)
             file_url = f"https://api.telegram.org/file/bot{config.BOT_TOKEN}/{file.file_path}"
 
-            # Download the file
-            audio_data = await self.download_voice_message(file_url, config.BOT_TOKEN)
-            if not audio_data:
+            # Download into memory and hand the buffer straight to the STT API
+            audio = await self.download_voice_buffer(file_url)
+            if audio is None:
                 return None
 
-            # Save to temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.ogg') as tmp_file:
-                tmp_file.write(audio_data)
-                tmp_path = tmp_file.name
-
-            try:
-                # Try to transcribe OGG directly with Whisper first (it supports OGG)
-                if config.OPENAI_API_KEY:
-                    text = await self.transcribe_with_whisper(tmp_path)
-                    if text:
-                        os.remove(tmp_path)
-                        return text
-
-                # If Whisper fails or is not available, try to convert using pydub
-                audio = AudioSegment.from_ogg(tmp_path)
-                mp3_path = tmp_path.replace('.ogg', '.mp3')
-                audio.export(mp3_path, format='mp3')
-
-                # Transcribe converted file
-                text = await self.transcribe_audio(mp3_path)
-
-                # Clean up
-                os.remove(tmp_path)
-                os.remove(mp3_path)
-
-                return text
-            except Exception as conversion_error:
-                logger.error(f"Audio conversion error (ffmpeg might be missing): {conversion_error}")
-
-                # If conversion fails, try transcribing OGG directly with Google (may not work)
-                try:
-                    text = await self.transcribe_with_google(tmp_path)
-                    os.remove(tmp_path)
-                    return text
-                except Exception as google_error:
-                    logger.error(f"Google STT with OGG failed: {google_error}")
-                    os.remove(tmp_path)
-                    return None
+            with audio:
+                return await self.transcribe_audio(audio, Path(file.file_path).name)
 
+        except AudioPoolBusy:
+            raise
         except Exception as e:
             logger.error(f"Voice processing error: {e}")
             return None
@@ -325,8 +592,7 @@ class VoiceService:
             max_duration = config.MAX_VOICE_DURATION
 
         try:
-            audio = AudioSegment.from_file(io.BytesIO(audio_data))
-            duration_seconds = len(audio) / 1000
+            duration_seconds = await audio_pool.run(audio_jobs.duration, audio_data)
             return duration_seconds <= max_duration
         except Exception as e:
             logger.error(f"Audio validation error: {e}")
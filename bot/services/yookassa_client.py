@@ -0,0 +1,164 @@
+"""Async YooKassa REST client over the shared aiohttp session"""
+
+import asyncio
+import base64
+import logging
+import random
+import time
+import uuid
+from typing import Optional, Dict, Any, Tuple
+
+import aiohttp
+
+from bot.services.http_client import http_clients
+from bot.utils import metrics
+from bot.utils.cache import TTLCache
+from bot.utils.latency import LatencyWindow
+from config import config
+
+logger = logging.getLogger(__name__)
+
+class YooKassaError(Exception):
+    """Request rejected by YooKassa or still failing after the retries"""
+
+    def __init__(self, message: str, status: int = None, code: str = None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+class YooKassaClient:
+    """The two YooKassa API calls the bot needs, without blocking the event loop.
+
+    Every attempt has its own timeout. Network errors, timeouts, 429 and
+    5xx responses are retried with exponential backoff and full jitter;
+    a POST is retried with the same Idempotence-Key, so YooKassa creates
+    the payment at most once however many attempts reach it.
+    """
+
+    def __init__(self, base_url: str = None, session: aiohttp.ClientSession = None,
+                 timeout: float = None, max_retries: int = None, backoff: float = None,
+                 max_backoff: float = None):
+        self.base_url = (base_url or config.YOOKASSA_API_URL).rstrip('/')
+        self._session = session
+        self.timeout = timeout or config.YOOKASSA_TIMEOUT
+        self.max_retries = max_retries if max_retries is not None else config.YOOKASSA_MAX_RETRIES
+        self.backoff = backoff if backoff is not None else config.YOOKASSA_BACKOFF
+        self.max_backoff = max_backoff or config.YOOKASSA_MAX_BACKOFF
+
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.latency = LatencyWindow()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        return self._session or http_clients.session
+
+    async def create_payment(self, payment_data: Dict[str, Any], idempotence_key: str) -> Dict[str, Any]:
+        return await self._request('POST', '/payments', payment_data, idempotence_key)
+
+    async def get_payment(self, payment_id: str) -> Dict[str, Any]:
+        return await self._request('GET', f'/payments/{payment_id}')
+
+    def _delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    async def _request(self, method: str, path: str, payload: Dict[str, Any] = None,
+                       idempotence_key: str = None) -> Dict[str, Any]:
+        credentials = f"{config.YOOKASSA_SHOP_ID}:{config.YOOKASSA_SECRET_KEY}".encode('utf-8')
+        headers = {'Authorization': 'Basic ' + base64.b64encode(credentials).decode('ascii')}
+        if idempotence_key:
+            headers['Idempotence-Key'] = idempotence_key
+        url = self.base_url + path
+        self.requests += 1
+
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            started = time.monotonic()
+            try:
+                async with self.session.request(
+                    method, url, json=payload, headers=headers,
+                    timeout=aiohttp.ClientTimeout(total=self.timeout)
+                ) as response:
+                    body = await response.json(content_type=None)
+                    self.latency.record(time.monotonic() - started)
+
+                    if response.status == 200:
+                        return body
+                    if response.status == 202 or response.status == 429 or response.status >= 500:
+                        # 202: the request is still being processed - ask again with the same key
+                        error = f"HTTP {response.status}"
+                        if response.headers.get('Retry-After', '').isdigit():
+                            retry_after = float(response.headers['Retry-After'])
+                        elif isinstance(body, dict) and body.get('retry_after'):
+                            retry_after = body['retry_after'] / 1000
+                    else:
+                        body = body if isinstance(body, dict) else {}
+                        self.failures += 1
+                        raise YooKassaError(
+                            f"YooKassa {method} {path}: {response.status} "
+                            f"{body.get('code')}: {body.get('description')}",
+                            status=response.status, code=body.get('code')
+                        )
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                error = f"{type(e).__name__}: {e}"
+
+            if attempt < self.max_retries:
+                self.retries += 1
+                delay = self._delay(attempt, retry_after)
+                logger.warning(f"YooKassa {method} {path} failed ({error}), "
+                               f"retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+        self.failures += 1
+        raise YooKassaError(f"YooKassa {method} {path} failed after {self.max_retries + 1} attempts: {error}")
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            'requests': self.requests,
+            'retries': self.retries,
+            'failures': self.failures
+        }
+        stats.update(self.latency.stats())
+        return stats
+
+class IdempotenceKeys:
+    """Reuses the Idempotence-Key of a purchase the user just started, so a
+    repeated tap on "buy" returns the same payment instead of a second one.
+
+    Only a pending payment is worth returning again: the key is released
+    once its payment is known to be succeeded or canceled.
+    """
+
+    def __init__(self, ttl: int = None, maxsize: int = 10000):
+        ttl = ttl or config.YOOKASSA_IDEMPOTENCE_TTL
+        self._keys = TTLCache(maxsize, ttl)
+        self._purchases = TTLCache(maxsize, ttl)  # payment id -> purchase
+
+    def get(self, purchase: Tuple) -> str:
+        key = self._keys.get(purchase)
+        if key is None:
+            key = str(uuid.uuid4())
+            self._keys.set(purchase, key)
+        return key
+
+    def release(self, purchase: Tuple):
+        """Forget the key (after a failed attempt whose request body may differ next time)"""
+        self._keys.pop(purchase)
+
+    def bind(self, purchase: Tuple, payment_id: str):
+        """Remember which purchase created the payment"""
+        self._purchases.set(payment_id, purchase)
+
+    def finish(self, payment_id: str):
+        """The payment reached a final status - the next tap creates a new one"""
+        purchase = self._purchases.pop(payment_id)
+        if purchase is not None:
+            self.release(purchase)
+
+# Shared client used by PaymentService
+yookassa_client = YooKassaClient()
+
+metrics.register('yookassa', yookassa_client.stats)
@@ -0,0 +1,69 @@
+"""Latency tracking helpers"""
+
+from bisect import bisect_left
+from collections import deque
+from typing import Dict, Any, Optional, Sequence
+
+class LatencyWindow:
+    """Rolling window of the most recent latencies (seconds) with percentiles"""
+
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+        self.count = 0
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+        self.count += 1
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Nearest-rank percentile of the window, or None when empty"""
+        if not self._samples:
+            return None
+
+        ordered = sorted(self._samples)
+        rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+        return ordered[rank]
+
+    def stats(self) -> Dict[str, Any]:
+        def ms(value):
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            'count': self.count,
+            'p50_ms': ms(self.percentile(50)),
+            'p95_ms': ms(self.percentile(95)),
+            'p99_ms': ms(self.percentile(99))
+        }
+
+class LatencyHistogram:
+    """Cumulative latency histogram over fixed bucket bounds (seconds)"""
+
+    DEFAULT_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot: above every bound
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds: float):
+        self._counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def stats(self) -> Dict[str, Any]:
+        buckets = {}
+        cumulative = 0
+        for bound, count in zip(self.buckets, self._counts):
+            cumulative += count
+            buckets[f"le_{bound:g}s"] = cumulative
+        buckets['inf'] = self.count
+
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count * 1000, 1) if self.count else None,
+            'buckets': buckets
+        }
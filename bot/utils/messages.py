@@ -130,6 +130,10 @@ MESSAGES = {
 • Уменьшить фоновый шум
 • Отправить более короткое сообщение""",
 
+        'voice_busy': """⏳ Сейчас обрабатывается слишком много голосовых сообщений
+
+Пожалуйста, отправьте сообщение еще раз через минуту""",
+
         'select_language': """🌍 *Выбор языка перевода*
 
 Текущий язык: *{current_lang}*
@@ -0,0 +1,36 @@
+"""Registry of runtime statistics exposed for monitoring"""
+
+import json
+import logging
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+# name -> callable returning a JSON-serializable dict
+_sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+def register(name: str, source: Callable[[], Dict[str, Any]]):
+    """Register (or replace) a statistics source under ``name``"""
+    _sources[name] = source
+
+def collect() -> Dict[str, Dict[str, Any]]:
+    """Snapshot all registered sources"""
+    snapshot = {}
+    for name, source in _sources.items():
+        try:
+            snapshot[name] = source()
+        except Exception as e:
+            logger.error(f"Metrics source {name} failed: {e}")
+            snapshot[name] = {'error': str(e)}
+    return snapshot
+
+async def metrics_handler(request):
+    """aiohttp handler serving collect() as JSON"""
+    from aiohttp import web
+    from config import config
+
+    if config.METRICS_TOKEN:
+        if request.headers.get('Authorization', '') != f"Bearer {config.METRICS_TOKEN}":
+            return web.Response(status=401, text="Unauthorized")
+
+    return web.json_response(collect(), dumps=lambda data: json.dumps(data, default=str))
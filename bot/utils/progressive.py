@@ -0,0 +1,68 @@
+"""A reply that is sent once and then updated in place"""
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.types import Message
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+class ProgressiveMessage:
+    """Answers ``message`` on the first show() and edits that answer afterwards.
+
+    Edits are throttled to one per ``interval`` seconds: an intermediate
+    update that comes too soon is dropped (a newer one will follow), while
+    the final update waits out the interval so it is never lost.
+    """
+
+    def __init__(self, message: Message, interval: float = None):
+        self.message = message
+        self.interval = config.PROGRESSIVE_EDIT_INTERVAL if interval is None else interval
+        self.sent: Optional[Message] = None
+        self._last_text: Optional[str] = None
+        self._last_at = 0.0
+        self.edits = 0
+        self.skipped = 0
+
+    async def show(self, text: str, parse_mode: str = None, reply_markup=None,
+                   final: bool = False) -> Optional[Message]:
+        if self.sent is None:
+            self.sent = await self.message.answer(text, parse_mode=parse_mode,
+                                                  reply_markup=reply_markup)
+            self._last_text = text
+            self._last_at = time.monotonic()
+            return self.sent
+
+        if text == self._last_text and reply_markup is None:
+            return self.sent
+
+        wait = self._last_at + self.interval - time.monotonic()
+        if wait > 0:
+            if not final:
+                self.skipped += 1
+                return self.sent
+            await asyncio.sleep(wait)
+
+        await self._edit(text, parse_mode, reply_markup)
+        return self.sent
+
+    async def _edit(self, text: str, parse_mode: str, reply_markup, retry: bool = True):
+        try:
+            await self.sent.edit_text(text, parse_mode=parse_mode, reply_markup=reply_markup)
+            self.edits += 1
+        except TelegramRetryAfter as e:
+            if not retry:
+                raise
+            logger.warning(f"Edit rate limited, retrying in {e.retry_after}s")
+            await asyncio.sleep(e.retry_after)
+            await self._edit(text, parse_mode, reply_markup, retry=False)
+        except TelegramBadRequest as e:
+            if 'message is not modified' not in str(e):
+                raise
+        self._last_text = text
+        self._last_at = time.monotonic()
@@ -1,15 +1,353 @@
-"""Rate limiting decorator"""
+"""Rate limiting: token buckets in memory or Redis, and the handler decorator"""
 
 import asyncio
+import hashlib
+import time
 from functools import wraps
-from typing import Dict, Any
+from typing import Callable, Dict, Any, List, NamedTuple, Optional
 from datetime import datetime, timedelta
 import logging
 
+from bot.services.circuit_breaker import CircuitBreaker
+from bot.utils import metrics
+from config import config
+
 logger = logging.getLogger(__name__)
 
-# Store rate limit data in memory (in production, use Redis)
-rate_limit_storage: Dict[str, Dict[str, Any]] = {}
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    remaining: int       # requests left right now
+    retry_after: float   # seconds until the next request is allowed (0 if allowed)
+    reset_after: float   # seconds until the bucket is full again
+
+class Bucket:
+    """Per-key token bucket state"""
+
+    __slots__ = ('tokens', 'updated', 'expires', 'tick')
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+        self.expires = updated
+        self.tick = None  # wheel slot this key is filed under
+
+class MemoryBackend:
+    """Token buckets in process memory.
+
+    A bucket that has refilled completely is indistinguishable from a new
+    one, so it is dropped. Expiry uses a timing wheel: every key is filed
+    under the tick (``resolution`` seconds) in which its bucket will be
+    full, and each call only visits the ticks that have passed since the
+    previous call. A key that was used again in the meantime is refiled
+    once under its new tick, so each key sits in at most one slot and the
+    work per request stays O(1) amortized however many users are active.
+    """
+
+    name = 'memory'
+
+    def __init__(self, resolution: float = 1.0, timer: Callable[[], float] = time.monotonic):
+        self.resolution = resolution
+        self._timer = timer
+        self._buckets: Dict[str, Bucket] = {}
+        self._wheel: Dict[int, List[str]] = {}
+        self._next_tick: Optional[int] = None
+
+        self.allowed = 0
+        self.rejected = 0
+        self.expired = 0
+
+    async def hit(self, key: str, rate: int, per: float) -> RateLimitResult:
+        """Take one token from key's bucket (``rate`` tokens refilled per ``per`` seconds)"""
+        return self.hit_now(key, rate, per, self._timer())
+
+    def hit_now(self, key: str, rate: int, per: float, now: float) -> RateLimitResult:
+        self._expire(now)
+
+        refill = rate / per
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = Bucket(float(rate), now)
+        else:
+            bucket.tokens = min(float(rate), bucket.tokens + (now - bucket.updated) * refill)
+            bucket.updated = now
+
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            allowed, retry_after = True, 0.0
+            self.allowed += 1
+        else:
+            allowed, retry_after = False, (1 - bucket.tokens) / refill
+            self.rejected += 1
+
+        reset_after = (rate - bucket.tokens) / refill
+        bucket.expires = now + reset_after
+        if bucket.tick is None:
+            self._schedule(key, bucket)
+        return RateLimitResult(allowed, int(bucket.tokens), retry_after, reset_after)
+
+    async def peek(self, key: str, rate: int, per: float) -> RateLimitResult:
+        """Current state of key's bucket without taking a token"""
+        now = self._timer()
+        refill = rate / per
+        bucket = self._buckets.get(key)
+        tokens = float(rate)
+        if bucket is not None:
+            tokens = min(float(rate), bucket.tokens + (now - bucket.updated) * refill)
+        retry_after = 0.0 if tokens >= 1 else (1 - tokens) / refill
+        return RateLimitResult(tokens >= 1, int(tokens), retry_after, (rate - tokens) / refill)
+
+    def _schedule(self, key: str, bucket: Bucket):
+        tick = int(bucket.expires // self.resolution) + 1
+        bucket.tick = tick
+        self._wheel.setdefault(tick, []).append(key)
+        if self._next_tick is None or tick < self._next_tick:
+            self._next_tick = tick
+
+    def _expire(self, now: float):
+        tick = int(now // self.resolution)
+        if self._next_tick is None or self._next_tick > tick:
+            return
+
+        # After a long idle period jump straight to the oldest filled slot
+        if tick - self._next_tick > len(self._wheel):
+            due = sorted(slot for slot in self._wheel if slot <= tick)
+        else:
+            due = range(self._next_tick, tick + 1)
+
+        for slot in due:
+            for key in self._wheel.pop(slot, ()):
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    continue
+                bucket.tick = None
+                if bucket.expires <= now:
+                    del self._buckets[key]
+                    self.expired += 1
+                else:
+                    # Used again since it was filed - refile under its new expiry
+                    self._schedule(key, bucket)
+
+        self._next_tick = min(self._wheel) if self._wheel else None
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'keys': len(self._buckets),
+            'wheel_slots': len(self._wheel),
+            'allowed': self.allowed,
+            'rejected': self.rejected,
+            'expired': self.expired
+        }
+
+# Token bucket as a Redis hash {tokens, ts}; the key expires once the bucket is full.
+# Returns strings: Lua numbers would be truncated to integers. Needs Redis >= 5
+# (TIME before a write relies on effects replication).
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local per = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local refill = rate / per
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = rate
+if state[1] then
+    tokens = math.min(rate, tonumber(state[1]) + (now - tonumber(state[2])) * refill)
+end
+
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+
+local reset_after = (rate - tokens) / refill
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(reset_after * 1000))
+return {allowed, tostring(tokens), tostring(reset_after)}
+"""
+
+class RedisBackend:
+    """Token buckets shared by all replicas through Redis.
+
+    Every bucket update is one atomic Lua script call. Calls made within
+    ``window`` seconds of each other are sent together as one pipeline
+    (up to ``max_batch`` per round trip), so a burst of updates costs one
+    round trip instead of one per update.
+
+    When Redis is unreachable - or the redis package isn't installed - a
+    circuit breaker opens and requests are limited per process by a
+    MemoryBackend until a probe call succeeds again.
+    """
+
+    name = 'redis'
+
+    def __init__(self, url: str = None, prefix: str = None, window: float = None,
+                 max_batch: int = None, timeout: float = None, client=None):
+        self.url = url or config.REDIS_URL
+        self.prefix = prefix if prefix is not None else config.RATE_LIMIT_REDIS_PREFIX
+        self.window = window if window is not None else config.RATE_LIMIT_BATCH_MS / 1000
+        self.max_batch = max_batch or config.RATE_LIMIT_BATCH_MAX
+        self.timeout = timeout or config.RATE_LIMIT_REDIS_TIMEOUT
+        self._client = client
+        self._sha = hashlib.sha1(TOKEN_BUCKET_SCRIPT.encode('utf-8')).hexdigest()
+        self._pending: List[tuple] = []  # (key, rate, per, future)
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+        self.local = MemoryBackend()
+        self.breaker = CircuitBreaker('rate_limit_redis', window=10, error_threshold=0.5,
+                                      min_calls=3, open_seconds=5)
+        self.round_trips = 0
+        self.batched_keys = 0
+        self.redis_hits = 0
+        self.fallback_hits = 0
+
+    @property
+    def client(self):
+        if self._client is None:
+            import redis.asyncio as aioredis
+
+            self._client = aioredis.Redis.from_url(
+                self.url, socket_timeout=self.timeout, socket_connect_timeout=self.timeout
+            )
+        return self._client
+
+    async def hit(self, key: str, rate: int, per: float) -> RateLimitResult:
+        if not self.breaker.allow():
+            self.fallback_hits += 1
+            return await self.local.hit(key, rate, per)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((self.prefix + key, rate, per, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.window, self._flush)
+
+        result = await future
+        if result is None:
+            self.fallback_hits += 1
+            return await self.local.hit(key, rate, per)
+        self.redis_hits += 1
+        return result
+
+    def _flush(self):
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: List[tuple]):
+        """One pipeline of script calls; None for keys that should use the local limits"""
+        results = [None] * len(batch)
+        started = time.monotonic()
+        try:
+            replies = await self._run_scripts(batch)
+            self.breaker.record_success(time.monotonic() - started)
+            for i, ((_, rate, per, _), reply) in enumerate(zip(batch, replies)):
+                results[i] = self._to_result(reply, rate, per)
+        except Exception as e:
+            self.breaker.record_failure()
+            logger.error(f"Redis rate limit error ({len(batch)} keys), using local limits: {e}")
+
+        self.round_trips += 1
+        self.batched_keys += len(batch)
+        for (_, _, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _run_scripts(self, batch: List[tuple]) -> list:
+        from redis.exceptions import NoScriptError
+
+        for attempt in range(2):
+            pipe = self.client.pipeline(transaction=False)
+            for key, rate, per, _ in batch:
+                pipe.evalsha(self._sha, 1, key, rate, per)
+            try:
+                return await pipe.execute()
+            except NoScriptError:
+                # First use, or the server restarted / flushed its script cache
+                if attempt:
+                    raise
+                await self.client.script_load(TOKEN_BUCKET_SCRIPT)
+
+    @staticmethod
+    def _to_result(reply: list, rate: int, per: float) -> RateLimitResult:
+        allowed, tokens, reset_after = int(reply[0]), float(reply[1]), float(reply[2])
+        retry_after = 0.0 if allowed else (1 - tokens) * per / rate
+        return RateLimitResult(bool(allowed), int(tokens), retry_after, reset_after)
+
+    async def peek(self, key: str, rate: int, per: float) -> RateLimitResult:
+        if not self.breaker.is_available():
+            return await self.local.peek(key, rate, per)
+        try:
+            state = await self.client.hmget(self.prefix + key, 'tokens', 'ts')
+        except Exception as e:
+            logger.error(f"Redis rate limit peek error: {e}")
+            return await self.local.peek(key, rate, per)
+
+        refill = rate / per
+        tokens = float(rate)
+        if state[0] is not None:
+            tokens = min(float(rate), float(state[0]) + (time.time() - float(state[1])) * refill)
+        retry_after = 0.0 if tokens >= 1 else (1 - tokens) / refill
+        return RateLimitResult(tokens >= 1, int(tokens), retry_after, (rate - tokens) / refill)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'redis_hits': self.redis_hits,
+            'fallback_hits': self.fallback_hits,
+            'round_trips': self.round_trips,
+            'avg_batch': round(self.batched_keys / self.round_trips, 2) if self.round_trips else 0.0,
+            'breaker': self.breaker.stats(),
+            'local': self.local.stats()
+        }
+
+BACKENDS = {
+    MemoryBackend.name: MemoryBackend,
+    RedisBackend.name: RedisBackend
+}
+
+class RateLimiter:
+    """Shared rate limiter engine for the throttling middleware and @rate_limit"""
+
+    def __init__(self, backend=None):
+        self.backend = backend or BACKENDS.get(config.RATE_LIMIT_BACKEND, MemoryBackend)()
+
+    async def hit(self, key: str, rate: int, per: float) -> RateLimitResult:
+        return await self.backend.hit(key, rate, per)
+
+    async def peek(self, key: str, rate: int, per: float) -> RateLimitResult:
+        return await self.backend.peek(key, rate, per)
+
+    async def close(self):
+        close = getattr(self.backend, 'close', None)
+        if close:
+            await close()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {'backend': self.backend.name}
+        stats.update(self.backend.stats())
+        return stats
+
+rate_limiter = RateLimiter()
+
+metrics.register('rate_limit', rate_limiter.stats)
+
+RATE_LIMIT_TEXT = "⚠️ Слишком много запросов. Попробуйте через минуту."
 
 def rate_limit(key: str, rate: int, per: int):
     """
@@ -25,65 +363,32 @@ def rate_limit(key: str, rate: int, per: int):
         async def wrapper(*args, **kwargs):
             # Get user_id from message or callback
             user_id = None
+            event = None
             for arg in args:
                 if hasattr(arg, 'from_user'):
                     user_id = arg.from_user.id
+                    event = arg
                     break
 
             if not user_id:
                 # If we can't get user_id, allow the request
                 return await func(*args, **kwargs)
 
-            # Create rate limit key
-            rl_key = f"{key}:{user_id}"
-            current_time = datetime.now()
-
-            # Clean up old entries
-            cleanup_old_entries()
-
-            # Check rate limit
-            if rl_key in rate_limit_storage:
-                data = rate_limit_storage[rl_key]
-                window_start = data['window_start']
-                request_count = data['count']
-
-                # If we're in the same window
-                if current_time - window_start < timedelta(seconds=per):
-                    if request_count >= rate:
-                        # Rate limit exceeded
-                        logger.warning(f"Rate limit exceeded for user {user_id}, key {key}")
-
-                        # Try to send rate limit message
-                        try:
-                            for arg in args:
-                                if hasattr(arg, 'answer'):
-                                    await arg.answer(
-                                        "⚠️ Слишком много запросов. Попробуйте через минуту.",
-                                        show_alert=True
-                                    )
-                                    break
-                                elif hasattr(arg, 'reply'):
-                                    await arg.reply("⚠️ Слишком много запросов. Попробуйте через минуту.")
-                                    break
-                        except Exception as e:
-                            logger.error(f"Error sending rate limit message: {e}")
-
-                        return
+            result = await rate_limiter.hit(f"{key}:{user_id}", rate, per)
+            if not result.allowed:
+                # Rate limit exceeded
+                logger.warning(f"Rate limit exceeded for user {user_id}, key {key}")
+
+                # Try to send rate limit message
+                try:
+                    if hasattr(event, 'reply'):
+                        await event.reply(RATE_LIMIT_TEXT)
                     else:
-                        # Increment counter
-                        rate_limit_storage[rl_key]['count'] += 1
-                else:
-                    # New window
-                    rate_limit_storage[rl_key] = {
-                        'window_start': current_time,
-                        'count': 1
-                    }
-            else:
-                # First request
-                rate_limit_storage[rl_key] = {
-                    'window_start': current_time,
-                    'count': 1
-                }
+                        await event.answer(RATE_LIMIT_TEXT, show_alert=True)
+                except Exception as e:
+                    logger.error(f"Error sending rate limit message: {e}")
+
+                return
 
             # Execute the function
             return await func(*args, **kwargs)
@@ -91,48 +396,13 @@ def rate_limit(key: str, rate: int, per: int):
         return wrapper
     return decorator
 
-def cleanup_old_entries():
-    """Clean up old rate limit entries"""
-    current_time = datetime.now()
-    keys_to_remove = []
-
-    for key, data in rate_limit_storage.items():
-        if current_time - data['window_start'] > timedelta(hours=1):
-            keys_to_remove.append(key)
-
-    for key in keys_to_remove:
-        del rate_limit_storage[key]
-
-def get_rate_limit_status(user_id: int, key: str, rate: int, per: int) -> Dict[str, Any]:
+async def get_rate_limit_status(user_id: int, key: str, rate: int, per: int) -> Dict[str, Any]:
     """Get current rate limit status for a user"""
-    rl_key = f"{key}:{user_id}"
+    result = await rate_limiter.peek(f"{key}:{user_id}", rate, per)
     current_time = datetime.now()
 
-    if rl_key not in rate_limit_storage:
-        return {
-            'remaining': rate,
-            'reset_at': current_time + timedelta(seconds=per),
-            'blocked': False
-        }
-
-    data = rate_limit_storage[rl_key]
-    window_start = data['window_start']
-    request_count = data['count']
-
-    if current_time - window_start >= timedelta(seconds=per):
-        # Window expired
-        return {
-            'remaining': rate,
-            'reset_at': current_time + timedelta(seconds=per),
-            'blocked': False
-        }
-
-    remaining = max(0, rate - request_count)
-    reset_at = window_start + timedelta(seconds=per)
-    blocked = remaining == 0
-
     return {
-        'remaining': remaining,
-        'reset_at': reset_at,
-        'blocked': blocked
-    }
\ No newline at end of file
+        'remaining': result.remaining,
+        'reset_at': current_time + timedelta(seconds=result.reset_after),
+        'blocked': not result.allowed
+    }
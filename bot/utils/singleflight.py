@@ -0,0 +1,49 @@
+"""Request coalescing for identical in-flight calls"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers with the same key.
+
+    The work runs as its own task, so a caller that is cancelled (e.g. its
+    handler timed out) doesn't cancel the result the other callers wait for.
+    Callers get the very same result object - copy it before mutating.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0       # upstream calls actually made
+        self.coalesced = 0   # callers that joined an in-flight call
+
+    def start(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """The in-flight task for key, started from factory() if there is none"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+        return task
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        return await asyncio.shield(self.start(key, factory))
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved even if every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'in_flight': len(self._inflight),
+            'calls': self.calls,
+            'coalesced': self.coalesced
+        }
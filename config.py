@@ -21,10 +21,23 @@ class Config:
     # Payment Configuration
     YOOKASSA_SHOP_ID = os.getenv("YOOKASSA_SHOP_ID")
     YOOKASSA_SECRET_KEY = os.getenv("YOOKASSA_SECRET_KEY")
+    YOOKASSA_API_URL = os.getenv("YOOKASSA_API_URL", "https://api.yookassa.ru/v3")
+    YOOKASSA_TIMEOUT = float(os.getenv("YOOKASSA_TIMEOUT", "10"))  # seconds per attempt
+    YOOKASSA_MAX_RETRIES = int(os.getenv("YOOKASSA_MAX_RETRIES", "3"))
+    YOOKASSA_BACKOFF = float(os.getenv("YOOKASSA_BACKOFF", "0.5"))  # first retry delay cap, doubles each time
+    YOOKASSA_MAX_BACKOFF = float(os.getenv("YOOKASSA_MAX_BACKOFF", "5"))
+    YOOKASSA_IDEMPOTENCE_TTL = int(os.getenv("YOOKASSA_IDEMPOTENCE_TTL", "600"))  # repeated "buy" taps reuse the payment
     PAYMENT_WEBHOOK_SECRET = os.getenv("PAYMENT_WEBHOOK_SECRET")
 
     # Database
     DATABASE_PATH = os.getenv("DATABASE_PATH", "data/bot.db")
+    DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "4"))
+    DATABASE_CACHE_SIZE_KB = int(os.getenv("DATABASE_CACHE_SIZE_KB", "16384"))  # page cache per connection
+    DATABASE_MMAP_SIZE = int(os.getenv("DATABASE_MMAP_SIZE", str(64 * 1024 * 1024)))
+
+    # User profile cache (joined users/user_settings rows)
+    USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "60"))  # seconds
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
 
     # Subscription Prices
     MONTHLY_PRICE = int(os.getenv("MONTHLY_PRICE", "490"))
@@ -32,7 +45,21 @@ class Config:
 
     # Limits
     FREE_DAILY_LIMIT = int(os.getenv("FREE_DAILY_LIMIT", "10"))
+    QUOTA_FLUSH_INTERVAL = float(os.getenv("QUOTA_FLUSH_INTERVAL", "5"))  # total_translations write-behind, seconds
+    QUOTA_EXHAUSTED_TTL = int(os.getenv("QUOTA_EXHAUSTED_TTL", "60"))  # refuse out-of-quota users without a query
     MAX_HISTORY_ITEMS = int(os.getenv("MAX_HISTORY_ITEMS", "100"))
+    HISTORY_BATCH_SIZE = int(os.getenv("HISTORY_BATCH_SIZE", "100"))  # entries per write
+    HISTORY_FLUSH_INTERVAL = float(os.getenv("HISTORY_FLUSH_INTERVAL", "1"))  # seconds
+    HISTORY_QUEUE_SIZE = int(os.getenv("HISTORY_QUEUE_SIZE", "5000"))
+    HISTORY_QUEUE_POLICY = os.getenv("HISTORY_QUEUE_POLICY", "spill")  # when full: spill (write now) or drop
+    HISTORY_PRUNE_SLACK = int(os.getenv("HISTORY_PRUNE_SLACK", "20"))  # trim after this many new entries
+    HISTORY_PRUNE_TTL = int(os.getenv("HISTORY_PRUNE_TTL", "3600"))  # seconds a user's count is kept
+    STATS_FLUSH_INTERVAL = float(os.getenv("STATS_FLUSH_INTERVAL", "60"))  # daily statistics rollup, seconds
+    NOTIFY_GLOBAL_RATE = float(os.getenv("NOTIFY_GLOBAL_RATE", "25"))  # outbound messages per second
+    NOTIFY_CHAT_INTERVAL = float(os.getenv("NOTIFY_CHAT_INTERVAL", "1"))  # seconds between messages to one chat
+    NOTIFY_MAX_ATTEMPTS = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "5"))
+    NOTIFY_LEASE_SECONDS = float(os.getenv("NOTIFY_LEASE_SECONDS", "60"))  # claimed rows are retried after this
+    NOTIFY_BATCH_SIZE = int(os.getenv("NOTIFY_BATCH_SIZE", "50"))
 
     # Admin Settings
     ADMIN_IDS_STR = os.getenv("ADMIN_IDS", "")
@@ -108,17 +135,67 @@ class Config:
         }
     }
 
+    # Translation provider strategy: 'sequential' (one after another) or 'hedged'
+    # (start the next provider when the current one is slower than its observed
+    # HEDGE_PERCENTILE latency, clamped to HEDGE_DELAY_MIN..HEDGE_DELAY_MAX)
+    TRANSLATION_STRATEGY = os.getenv("TRANSLATION_STRATEGY", "sequential")
+    HEDGE_DELAY = float(os.getenv("HEDGE_DELAY", "1.0"))  # seconds, until latencies are known
+    HEDGE_DELAY_MIN = float(os.getenv("HEDGE_DELAY_MIN", "0.2"))
+    HEDGE_DELAY_MAX = float(os.getenv("HEDGE_DELAY_MAX", "3.0"))
+    HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+
+    # Circuit breakers per translation provider
+    BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "50"))  # calls in the rolling window
+    BREAKER_ERROR_THRESHOLD = float(os.getenv("BREAKER_ERROR_THRESHOLD", "0.5"))
+    BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "5"))
+    BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))
+    # Reorder DeepL/Yandex/Google by observed median latency instead of quality (opt-in)
+    ADAPTIVE_PROVIDER_ORDER = os.getenv("ADAPTIVE_PROVIDER_ORDER", "false").lower() == "true"
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")  # optional bearer token for /metrics
+
     # OpenAI Model Configuration
     GPT_MODEL = "gpt-4o"
+    # Enhancement via JSON-schema output, micro-batched across concurrent requests
+    GPT_STRUCTURED_OUTPUT = os.getenv("GPT_STRUCTURED_OUTPUT", "true").lower() == "true"
+    GPT_BATCH_WINDOW_MS = float(os.getenv("GPT_BATCH_WINDOW_MS", "15"))
+    GPT_BATCH_MAX_ITEMS = int(os.getenv("GPT_BATCH_MAX_ITEMS", "8"))
+    # Reply with the provider translation first, then edit in the GPT result
+    PROGRESSIVE_TRANSLATION = os.getenv("PROGRESSIVE_TRANSLATION", "true").lower() == "true"
+    PROGRESSIVE_EDIT_INTERVAL = float(os.getenv("PROGRESSIVE_EDIT_INTERVAL", "1.0"))  # seconds between edits
+    # Source language detection: 'ngram' (offline profiles) or 'langdetect'
+    LANG_DETECT_ENGINE = os.getenv("LANG_DETECT_ENGINE", "ngram")
+    # Below this confidence the provider detects the source language itself
+    LANG_DETECT_MIN_CONFIDENCE = float(os.getenv("LANG_DETECT_MIN_CONFIDENCE", "0.8"))
+    LANG_DETECT_MEMO_SIZE = int(os.getenv("LANG_DETECT_MEMO_SIZE", "10000"))
+    LANG_DETECT_MEMO_MAX_CHARS = int(os.getenv("LANG_DETECT_MEMO_MAX_CHARS", "64"))
     WHISPER_MODEL = "whisper-1"
 
     # Rate Limiting
     RATE_LIMIT_WINDOW = 60  # seconds
     RATE_LIMIT_MAX_REQUESTS = 30
+    RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # token bucket storage: memory or redis
+    REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    RATE_LIMIT_REDIS_PREFIX = os.getenv("RATE_LIMIT_REDIS_PREFIX", "rl:")
+    RATE_LIMIT_REDIS_TIMEOUT = float(os.getenv("RATE_LIMIT_REDIS_TIMEOUT", "0.25"))  # seconds
+    RATE_LIMIT_BATCH_MS = float(os.getenv("RATE_LIMIT_BATCH_MS", "2"))  # pipeline window
+    RATE_LIMIT_BATCH_MAX = int(os.getenv("RATE_LIMIT_BATCH_MAX", "64"))
 
     # Voice Settings
     MAX_VOICE_DURATION = 60  # seconds
     SUPPORTED_AUDIO_FORMATS = ['.mp3', '.ogg', '.wav', '.m4a']
+    # Worker processes for pydub/ffmpeg jobs and how many jobs may wait for one
+    AUDIO_WORKERS = int(os.getenv("AUDIO_WORKERS", "2"))
+    AUDIO_MAX_QUEUE = int(os.getenv("AUDIO_MAX_QUEUE", "16"))
+    # Downloaded voice files stay in memory up to this size, then spill to disk
+    VOICE_SPOOL_MAX_BYTES = int(os.getenv("VOICE_SPOOL_MAX_BYTES", str(5 * 1024 * 1024)))
+    GTTS_WORKERS = int(os.getenv("GTTS_WORKERS", "4"))  # threads for blocking gTTS requests
+    # Texts this long are synthesized in sentence chunks and stitched together
+    TTS_STREAM_MIN_CHARS = int(os.getenv("TTS_STREAM_MIN_CHARS", "300"))
+    TTS_STREAM_CHUNK_CHARS = int(os.getenv("TTS_STREAM_CHUNK_CHARS", "250"))
+    TTS_USER_CONCURRENCY = int(os.getenv("TTS_USER_CONCURRENCY", "3"))  # chunks per user at once
+    # Synthesized speech cache (files + remembered Telegram file_ids)
+    TTS_CACHE_PATH = os.getenv("TTS_CACHE_PATH", "data/tts_cache")
+    TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
 
     # Export Settings
     PDF_FONT_SIZE = 12
@@ -126,6 +203,22 @@ class Config:
 
     # Cache Settings
     CACHE_TTL = 3600  # 1 hour
+    TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "5000"))  # in-memory entries
+    TRANSLATION_CACHE_DISK = os.getenv("TRANSLATION_CACHE_DISK", "true").lower() == "true"
+    TRANSLATION_CACHE_PATH = os.getenv("TRANSLATION_CACHE_PATH", "data/translation_cache.db")
+
+    # Translation sessions behind the callback buttons: 'sqlite' or 'memory'
+    SESSION_BACKEND = os.getenv("SESSION_BACKEND", "sqlite")
+    SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "data/sessions.db")
+    SESSION_TTL = int(os.getenv("SESSION_TTL", str(48 * 3600)))  # seconds
+    SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "20000"))  # memory backend
+
+    # Shared HTTP client settings
+    HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))  # total connections
+    HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "20"))
+    HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "60"))  # seconds
+    HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))  # seconds
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))  # seconds per request
 
     # Webhook Configuration (for production)
     WEBHOOK_HOST = os.getenv("WEBHOOK_HOST")
@@ -20,6 +20,14 @@ sys.path.append(str(Path(__file__).parent))
 
 from config import config
 from bot.database import db
+from bot.services.audio_pool import audio_pool
+from bot.services.http_client import http_clients
+from bot.services.lang_detect import language_detector
+from bot.services.notifications import notification_queue
+from bot.services.session_store import translation_sessions
+from bot.services.translation_cache import translation_cache
+from bot.services.tts_cache import tts_cache
+from bot.utils.rate_limit import rate_limiter
 from bot.handlers import base, callbacks, payments, export, admin
 from bot.middlewares.throttling import ThrottlingMiddleware
 from bot.middlewares.user_middleware import UserMiddleware
@@ -37,7 +45,7 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-async def on_startup():
+async def on_startup(bot: Bot):
     """Bot startup handler"""
     logger.info("🚀 Starting PolyglotAI44...")
 
@@ -57,12 +65,65 @@ async def on_startup():
         logger.error(f"❌ Database initialization error: {e}")
         return False
 
+    # Shared HTTP clients for translation, voice and OpenAI calls
+    await http_clients.start()
+    logger.info("✅ HTTP clients started")
+
+    # Worker processes for audio decoding/transcoding
+    audio_pool.start()
+    logger.info(f"✅ Audio worker pool started ({audio_pool.workers} workers)")
+
+    # Language profiles are loaded once instead of on the first message
+    language_detector.load()
+    logger.info(f"✅ Language detector loaded ({language_detector.engine.name})")
+
+    # Payment notifications go out through this Bot's session
+    notification_queue.start(bot)
+    logger.info("✅ Notification queue started")
+
     logger.info("🎉 PolyglotAI44 started successfully!")
     return True
 
 async def on_shutdown():
     """Bot shutdown handler"""
     logger.info("🛑 Shutting down PolyglotAI44...")
+
+    # Close shared HTTP clients
+    try:
+        await http_clients.close()
+        logger.info("✅ HTTP clients closed")
+    except Exception as e:
+        logger.error(f"❌ HTTP clients shutdown error: {e}")
+
+    # Close the rate limit backend (Redis connection pool)
+    try:
+        await rate_limiter.close()
+    except Exception as e:
+        logger.error(f"❌ Rate limiter shutdown error: {e}")
+
+    # Stop audio worker processes
+    try:
+        audio_pool.close()
+        logger.info("✅ Audio worker pool stopped")
+    except Exception as e:
+        logger.error(f"❌ Audio worker pool shutdown error: {e}")
+
+    # Stop the notification worker; unsent messages stay in the database
+    try:
+        await notification_queue.close()
+    except Exception as e:
+        logger.error(f"❌ Notification queue shutdown error: {e}")
+
+    # Close pooled database connections
+    try:
+        await translation_cache.close()
+        await translation_sessions.close()
+        await tts_cache.close()
+        await db.close()
+        logger.info("✅ Database connections closed")
+    except Exception as e:
+        logger.error(f"❌ Database shutdown error: {e}")
+
     logger.info("👋 PolyglotAI44 stopped")
 
 async def main():
@@ -131,6 +192,10 @@ async def main():
         app.router.add_get('/health', health_check)
         app.router.add_get('/', health_check)  # Root endpoint
 
+        # Runtime statistics (caches, pools, provider circuit breakers)
+        from bot.utils.metrics import metrics_handler
+        app.router.add_get('/metrics', metrics_handler)
+
         # Add payment webhook endpoint
         from webhook import WebhookHandler
         webhook_handler = WebhookHandler()
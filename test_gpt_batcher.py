@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Tests for the micro-batched, structured-output GPT enhancement
+(bot.services.gpt_enhancer) against a fake OpenAI client
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add bot directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from bot.services.gpt_enhancer import EnhancementBatcher
+
+class FakeCompletions:
+    """Answers every item of the JSON prompt, optionally dropping some ids"""
+
+    def __init__(self, drop_ids=(), broken=False):
+        self.drop_ids = set(drop_ids)
+        self.broken = broken
+        self.calls = []
+
+    async def create(self, model, messages, temperature, max_tokens, response_format):
+        items = json.loads(messages[1]['content'])['items']
+        self.calls.append({'items': items, 'max_tokens': max_tokens,
+                           'schema': response_format['json_schema']['name']})
+        await asyncio.sleep(0.01)
+
+        if self.broken:
+            content = 'Enhanced: not JSON at all'
+        else:
+            content = json.dumps({'items': [
+                {
+                    'id': item['id'],
+                    'enhanced': item['translation'].upper(),
+                    'alternatives': ['alt 1', 'alt 2', 'alt 3'] if item['explain'] else [],
+                    'grammar': 'грамматика' if item['explain'] else '',
+                    'explanation': 'стиль' if item['explain'] else ''
+                }
+                for item in items if item['id'] not in self.drop_ids
+            ]})
+
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=40 * len(items), completion_tokens=20 * len(items))
+        )
+
+def fake_client(completions: FakeCompletions):
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+def test_burst_is_batched_and_fanned_out():
+    async def run():
+        completions = FakeCompletions()
+        batcher = EnhancementBatcher(window=0.01, max_items=8, client=fake_client(completions))
+
+        results = await asyncio.gather(*[
+            batcher.enhance(f"text {i}", f"перевод {i}", 'ru', 'formal', explain_grammar=(i % 2 == 0))
+            for i in range(20)
+        ])
+
+        assert [len(call['items']) for call in completions.calls] == [8, 8, 4]
+        for i, result in enumerate(results):
+            assert result['enhanced_translation'] == f"ПЕРЕВОД {i}"
+            if i % 2 == 0:
+                assert result['alternatives'] == ['alt 1', 'alt 2', f"перевод {i}"]
+                assert result['grammar'] == 'грамматика'
+            else:
+                assert result['alternatives'] == [] and result['grammar'] == ''
+
+        stats = batcher.stats()
+        assert stats['requests'] == 3 and stats['items'] == 20
+        assert stats['tokens_per_item'] == 60.0
+    asyncio.run(run())
+
+def test_window_flushes_small_batch():
+    async def run():
+        completions = FakeCompletions()
+        batcher = EnhancementBatcher(window=0.005, max_items=8, client=fake_client(completions))
+
+        result = await batcher.enhance("hi", "привет", 'ru')
+        assert result['enhanced_translation'] == 'ПРИВЕТ'
+        assert completions.calls[0]['max_tokens'] == 120
+    asyncio.run(run())
+
+def test_missing_or_broken_results_fail_per_item():
+    async def run():
+        completions = FakeCompletions(drop_ids={1})
+        batcher = EnhancementBatcher(window=0.005, client=fake_client(completions))
+        results = await asyncio.gather(*[batcher.enhance(f"t{i}", f"п{i}", 'ru') for i in range(3)])
+        assert [result.get('failed', False) for result in results] == [False, True, False]
+        assert results[1]['enhanced_translation'] == 'п1'
+
+        broken = EnhancementBatcher(window=0.005, client=fake_client(FakeCompletions(broken=True)))
+        results = await asyncio.gather(*[broken.enhance(f"t{i}", f"п{i}", 'ru') for i in range(2)])
+        assert all(result['failed'] for result in results)
+        assert broken.stats()['failed_items'] == 2
+    asyncio.run(run())
+
+def main():
+    print("🧪 Testing batched GPT enhancement...\n")
+    for test in (test_burst_is_batched_and_fanned_out, test_window_flushes_small_batch,
+                 test_missing_or_broken_results_fail_per_item):
+        test()
+        print(f"✅ {test.__name__}")
+
+if __name__ == "__main__":
+    main()
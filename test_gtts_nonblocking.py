@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Event-loop lag test: free-tier gTTS synthesis must not stall concurrent
+text translations. gTTS network calls are replaced by a blocking sleep.
+"""
+
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add bot directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from gtts import gTTS
+
+from config import config
+from bot.services.translator import TranslatorService
+from bot.services.voice import VoiceService, gtts_latency
+
+GTTS_REQUESTS = 8
+GTTS_BLOCKING_SECONDS = 0.3  # typical Google round trip
+TRANSLATIONS = 50
+MAX_LOOP_LAG = 0.05
+
+def blocking_write_to_fp(self, fp):
+    """Stand-in for gTTS's synchronous HTTP requests"""
+    time.sleep(GTTS_BLOCKING_SECONDS)
+    fp.write(b'\xff\xfb' + self.text.encode('utf-8'))
+
+async def fake_deepl(text, target_lang, source_lang=None):
+    await asyncio.sleep(0.005)
+    return f"[{target_lang}] {text}"
+
+async def loop_lag(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        scheduled = time.perf_counter()
+        await asyncio.sleep(0.005)
+        lags.append(time.perf_counter() - scheduled - 0.005)
+
+async def run():
+    gTTS.write_to_fp = blocking_write_to_fp
+    config.DEEPL_API_KEY = 'test'
+    config.TRANSLATION_STRATEGY = 'sequential'
+    config.ADAPTIVE_PROVIDER_ORDER = False
+
+    translator = TranslatorService(cache=None)
+    translator.translate_with_deepl = fake_deepl
+    voice = VoiceService()
+
+    async def timed_translation(i):
+        await asyncio.sleep(i * 0.01)
+        started = time.perf_counter()
+        translated, _ = await translator.translate(f"phrase {i}", "ru", source_lang="en", enhance=False)
+        assert translated == f"[ru] phrase {i}"
+        return time.perf_counter() - started
+
+    lags = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(loop_lag(stop, lags))
+
+    started = time.perf_counter()
+    speech, translation_times = await asyncio.gather(
+        asyncio.gather(*[voice.generate_speech_gtts(f"text {i}", 'en') for i in range(GTTS_REQUESTS)]),
+        asyncio.gather(*[timed_translation(i) for i in range(TRANSLATIONS)])
+    )
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+
+    assert all(audio and audio.startswith(b'\xff\xfb') for audio in speech)
+    return max(lags), max(translation_times), elapsed
+
+def test_gtts_does_not_block_event_loop():
+    max_lag, slowest_translation, _ = asyncio.run(run())
+    assert max_lag < MAX_LOOP_LAG, f"event loop stalled for {max_lag * 1000:.0f} ms"
+    assert slowest_translation < MAX_LOOP_LAG, f"translation took {slowest_translation * 1000:.0f} ms"
+
+def main():
+    print(f"🧪 {GTTS_REQUESTS} gTTS requests ({GTTS_BLOCKING_SECONDS * 1000:.0f} ms blocking each) "
+          f"alongside {TRANSLATIONS} text translations\n")
+    max_lag, slowest_translation, elapsed = asyncio.run(run())
+    print(f"⏱️  Max event loop lag: {max_lag * 1000:.1f} ms")
+    print(f"⏱️  Slowest translation: {slowest_translation * 1000:.1f} ms")
+    print(f"⏱️  Total: {elapsed:.2f} s")
+    print(f"📊 gTTS latency: {gtts_latency.stats()}")
+    assert max_lag < MAX_LOOP_LAG and slowest_translation < MAX_LOOP_LAG
+    print("\n✅ gTTS synthesis doesn't block the event loop")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for the background translation history writer (Database.history):
+batching, save_history, amortized pruning, the full-queue policies and
+the flush on shutdown
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add bot directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from bot.database import Database, HistoryWriter
+from testing_helpers import async_test, make_db, override_config
+
+async def make_history_db(path: str, **writer_options) -> Database:
+    db = await make_db(path)
+    db.history = HistoryWriter(db, **writer_options)
+    for user_id in (1, 2):
+        await db.add_user(user_id, f"user{user_id}")
+    return db
+
+async def count_rows(db: Database, user_id: int) -> int:
+    async with db.pool.acquire() as conn:
+        cursor = await conn.execute('SELECT COUNT(*) FROM translation_history WHERE user_id = ?', (user_id,))
+        return (await cursor.fetchone())[0]
+
+async def add(db: Database, user_id: int, text: str):
+    await db.add_translation_history(user_id, text, 'ru', text.upper(), 'en')
+
+@async_test
+async def test_entries_are_batched():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = await make_history_db(os.path.join(tmp, 'history.db'), batch_size=50, flush_interval=0.05)
+        try:
+            await db.update_user_settings(2, save_history=False)
+            for i in range(120):
+                await add(db, 1 + i % 2, f"text {i}")
+
+            assert await count_rows(db, 1) == 0  # nothing written on the caller's time
+            await asyncio.sleep(0.2)
+            assert await count_rows(db, 1) == 60
+            assert await count_rows(db, 2) == 0  # history turned off
+
+            stats = db.history.stats()
+            assert stats['batches'] <= 3 and stats['max_batch'] <= 50
+            assert stats['flush_latency']['count'] == stats['batches']
+
+            # Reads see what is still queued
+            await add(db, 1, "latest")
+            history = await db.get_user_history(1, limit=1)
+            assert history[0]['source_text'] == "latest"
+        finally:
+            await db.close()
+
+@async_test
+async def test_pruning_is_amortized():
+    with override_config(MAX_HISTORY_ITEMS=10), tempfile.TemporaryDirectory() as tmp:
+        db = await make_history_db(os.path.join(tmp, 'history.db'), prune_slack=5)
+        try:
+            for i in range(14):
+                await add(db, 1, f"text {i}")
+                await db.history.flush()
+            # Pruned on the first write, then after 5 and 10 more; 3 more since then
+            assert db.history.prunes == 3
+            assert await count_rows(db, 1) == 13
+
+            # A failed write isn't counted towards the next prune
+            acquire = db.pool.acquire
+            db.pool.acquire = None
+            await add(db, 1, "lost")
+            await db.history.flush()
+            db.pool.acquire = acquire
+            assert db.history.failed == 1
+
+            await add(db, 1, "text 14")
+            await db.history.flush()
+            assert db.history.prunes == 3 and await count_rows(db, 1) == 14
+            await add(db, 1, "text 15")
+            await db.history.flush()
+            assert await count_rows(db, 1) == 10
+            assert len(await db.get_user_history(1, limit=100)) == 10
+            assert db.history.stats()['tracked_users'] == 1
+        finally:
+            await db.close()
+
+@async_test
+async def test_full_queue_and_shutdown():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.db')
+        db = await make_history_db(path, queue_size=5, flush_interval=10, policy='drop')
+        for i in range(8):
+            await add(db, 1, f"text {i}")
+        assert db.history.dropped >= 2
+        await db.close()  # flushes the queue
+        written = db.history.written
+
+        db = await make_history_db(path, queue_size=5, flush_interval=10, policy='spill')
+        try:
+            assert await count_rows(db, 1) == written
+            for i in range(8):
+                await add(db, 1, f"more {i}")
+            assert db.history.spilled >= 1 and db.history.dropped == 0
+            await db.history.close()
+            assert await count_rows(db, 1) == written + 8
+        finally:
+            await db.close()
+
+def main():
+    print("🧪 Testing history writer...\n")
+    for test in (test_entries_are_batched, test_pruning_is_amortized, test_full_queue_and_shutdown):
+        test()
+        print(f"✅ {test.__name__}")
+
+if __name__ == "__main__":
+    main()
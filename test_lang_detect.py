@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Tests for offline language detection (bot.services.lang_detect) and the
+provider-side fallback for low-confidence results
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+# Add bot directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from config import config
+from bot.services.circuit_breaker import provider_breakers
+from bot.services.lang_detect import LanguageDetector, NgramEngine
+from bot.services.translator import TranslatorService
+
+engine = NgramEngine()
+
+def test_detects_common_languages():
+    samples = {
+        'ru': "Завтра мы поедем на дачу, если не будет дождя.",
+        'uk': "Будь ласка, нагадай мені купити хліб.",
+        'en': "Please remind me to buy bread on the way home.",
+        'de': "Bitte erinnere mich daran, Brot zu kaufen.",
+        'fr': "Il travaille comme programmeur dans une petite entreprise.",
+        'ja': "ありがとうございます",
+        'zh': "这部电影比我想象的有趣得多。",
+        'ko': "정말 감사합니다",
+        'he': "תודה רבה"
+    }
+    for lang, text in samples.items():
+        detected, confidence = engine.detect(text)
+        assert detected == lang, (lang, detected, text)
+        assert 0.0 < confidence <= 1.0
+    assert engine.detect("12345 !!!") == (None, 0.0)
+
+def test_unsupported_languages_are_not_confident():
+    # Written like a supported language, but closer to another langdetect profile
+    lookalikes = {
+        'ar': ("این یک جمله به زبان فارسی است و من کتاب خواندن را دوست دارم.",
+               "یہ اردو زبان میں ایک جملہ ہے اور مجھے کتابیں پڑھنا پسند ہے۔"),
+        'ru': ("Ово је реченица на српском језику и волим да читам књиге.",
+               "Това е изречение на български език и обичам да чета книги."),
+        'cs': ("Ovo je rečenica na srpskom jeziku i volim da čitam knjige.",)
+    }
+    for lang, texts in lookalikes.items():
+        for text in texts:
+            detected, confidence = engine.detect(text)
+            assert confidence < config.LANG_DETECT_MIN_CONFIDENCE, (detected, confidence, text)
+            assert detected in config.SUPPORTED_LANGUAGES
+
+    # Scripts no supported language is written in
+    for text in ("Αυτή είναι μια πρόταση στα ελληνικά.", "Սա հայերեն նախադասություն է։",
+                 "ეს არის წინადადება ქართულად."):
+        assert engine.detect(text) == (None, 0.0)
+
+def test_deterministic_and_memoized():
+    detector = LanguageDetector(engine, memo_size=2, memo_max_chars=20)
+    first = [detector.detect("Hvordan har du det?") for _ in range(3)]
+    assert first[0] == first[1] == first[2]
+    assert detector.memo_hits == 2
+
+    detector.detect("Guten Morgen")
+    detector.detect("Buenos días")          # evicts the first entry
+    detector.detect("hvordan   HAR du det?")  # normalized key, but evicted
+    assert detector.memo_hits == 2
+    detector.detect("This sentence is longer than twenty characters")
+    assert len(detector._memo) == 2
+
+def test_low_confidence_leaves_detection_to_provider():
+    async def run():
+        config.OPENAI_API_KEY = None
+        config.DEEPL_API_KEY = None
+        config.YANDEX_API_KEY = None
+        config.ADAPTIVE_PROVIDER_ORDER = False
+        config.TRANSLATION_STRATEGY = 'sequential'
+        provider_breakers.clear()
+
+        sources = []
+
+        async def google(text, target_lang, source_lang=None):
+            sources.append(source_lang)
+            return f"translated:{text}"
+
+        service = TranslatorService(cache=None)
+        service.translate_with_google = google
+
+        original = config.LANG_DETECT_MIN_CONFIDENCE
+        try:
+            config.LANG_DETECT_MIN_CONFIDENCE = 0.0
+            _, metadata = await service.translate("Bitte erinnere mich daran, Brot zu kaufen.", 'en')
+            assert sources[-1] == 'de' and metadata['source_lang'] == 'de'
+
+            config.LANG_DETECT_MIN_CONFIDENCE = 1.01
+            _, metadata = await service.translate("Bitte erinnere mich daran, Milch zu kaufen.", 'en')
+            # Provider detects; the best guess is still shown to the user
+            assert sources[-1] is None and metadata['source_lang'] == 'de'
+
+            # Nothing detected (Greek): still translated, the provider detects
+            translated, metadata = await service.translate("Καλημέρα, τι κάνεις;", 'en')
+            assert translated == "translated:Καλημέρα, τι κάνεις;"
+            assert sources[-1] is None and metadata['source_lang'] is None
+            assert await service.get_language_name(None) == 'Автоопределение'
+        finally:
+            config.LANG_DETECT_MIN_CONFIDENCE = original
+    asyncio.run(run())
+
+def main():
+    print("🧪 Testing language detection...\n")
+    for test in (test_detects_common_languages, test_unsupported_languages_are_not_confident,
+                 test_deterministic_and_memoized,
+                 test_low_confidence_leaves_detection_to_provider):
+        test()
+        print(f"✅ {test.__name__}")
+
+if __name__ == "__main__":
+    main()
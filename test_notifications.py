@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Tests for the outbound notification queue: per-chat spacing, Telegram
+flood waits, delivery after a restart, and the payment webhook answering
+before anything is sent
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+# Add bot directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from bot.database import Database
+from bot.services.notifications import NotificationQueue
+from testing_helpers import async_test, make_db, override_config, temp_db
+import webhook
+from webhook import WebhookHandler
+
+class FakeBot:
+    """Records send_message calls; ``errors`` are raised by the first calls"""
+
+    def __init__(self, errors=(), delay: float = 0):
+        self.errors = list(errors)
+        self.delay = delay
+        self.sent = []      # (chat_id, text, time)
+
+    async def send_message(self, chat_id, text):
+        await asyncio.sleep(self.delay)
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append((chat_id, text, time.monotonic()))
+
+class FakeRequest:
+    def __init__(self, data):
+        self.headers = {}
+        self._data = data
+
+    async def json(self):
+        return self._data
+
+async def wait_for(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+async def pending(db: Database) -> int:
+    async with db.pool.acquire() as conn:
+        cursor = await conn.execute('SELECT COUNT(*) FROM outbound_messages')
+        return (await cursor.fetchone())[0]
+
+@async_test
+async def test_chat_spacing_and_flood_wait():
+    async with temp_db() as db:
+        flood = TelegramRetryAfter(method=SendMessage(chat_id=1, text='x'),
+                                   message='Too Many Requests', retry_after=1)
+        bot = FakeBot(errors=[flood])
+        queue = NotificationQueue(db, chat_interval=0.2)
+        try:
+            for text in ('a', 'b', 'c'):
+                await queue.enqueue(1, text)
+            await queue.enqueue(2, 'd')
+
+            started = time.monotonic()
+            queue.start(bot)
+            await wait_for(lambda: len(bot.sent) == 4)
+
+            # Nothing went out until Telegram's retry_after had passed
+            assert bot.sent[0][2] - started >= 1
+            assert queue.flood_waits == 1
+
+            to_first = [sent for sent in bot.sent if sent[0] == 1]
+            assert [text for _, text, _ in to_first] == ['a', 'b', 'c']
+            gaps = [b[2] - a[2] for a, b in zip(to_first, to_first[1:])]
+            assert min(gaps) >= 0.15
+            assert await pending(db) == 0 and queue.sent == 4
+        finally:
+            await queue.close()
+
+@async_test
+async def test_failures_are_retried_or_dropped():
+    async with temp_db() as db:
+        blocked = TelegramForbiddenError(method=SendMessage(chat_id=1, text='x'),
+                                         message='Forbidden: bot was blocked by the user')
+        bot = FakeBot(errors=[blocked, ConnectionError('reset')])
+        queue = NotificationQueue(db, chat_interval=0.01)
+        try:
+            await queue.enqueue(1, 'blocked')
+            await queue.enqueue(2, 'retried')
+            queue.start(bot)
+            await wait_for(lambda: len(bot.sent) == 1)
+
+            assert bot.sent[0][:2] == (2, 'retried')
+            assert queue.dropped == 1 and queue.retried == 1
+            assert await pending(db) == 0
+        finally:
+            await queue.close()
+
+@async_test
+async def test_queued_messages_survive_a_restart():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'notify.db')
+        db = await make_db(path)
+        queue = NotificationQueue(db)
+        await queue.enqueue(1, 'paid')
+        await queue.close()
+        await db.close()
+
+        db = await make_db(path)
+        bot = FakeBot()
+        queue = NotificationQueue(db)
+        try:
+            queue.start(bot)
+            await wait_for(lambda: bot.sent)
+            assert bot.sent[0][:2] == (1, 'paid')
+        finally:
+            await queue.close()
+            await db.close()
+
+@async_test
+async def test_webhook_answers_before_sending():
+    with override_config(PAYMENT_WEBHOOK_SECRET=None):
+        async with temp_db() as db:
+            bot = FakeBot(delay=1)
+            queue = NotificationQueue(db)
+            handler = WebhookHandler(notifications=queue)
+            try:
+                queue.start(bot)
+                started = time.monotonic()
+                response = await handler.handle_yookassa_webhook(FakeRequest({
+                    'event': 'payment.canceled',
+                    'object': {'id': 'pay-1', 'metadata': {'user_id': '42'}}
+                }))
+                assert response.status == 200
+                assert time.monotonic() - started < 0.5
+                assert queue.enqueued == 1 and not bot.sent
+
+                await wait_for(lambda: bot.sent)
+                assert bot.sent[0][0] == 42 and 'отменён' in bot.sent[0][1]
+            finally:
+                await queue.close()
+
+@async_test
+async def test_webhook_redelivery():
+    with override_config(PAYMENT_WEBHOOK_SECRET=None):
+        async with temp_db() as db:
+            queue = NotificationQueue(db)
+            handler = WebhookHandler(notifications=queue)
+            default_db, webhook.db = webhook.db, db
+            try:
+                await db.add_user(42, 'payer')
+                succeeded = FakeRequest({
+                    'event': 'payment.succeeded',
+                    'object': {'id': 'pay-1', 'amount': {'value': '490.00'},
+                               'metadata': {'user_id': '42', 'subscription_type': 'monthly'}}
+                })
+                # A repeated delivery of the same payment doesn't notify twice
+                for _ in range(2):
+                    assert (await handler.handle_yookassa_webhook(succeeded)).status == 200
+                assert queue.enqueued == 1 and await pending(db) == 1
+
+                # A notification that can't be queued makes YooKassa deliver again
+                async def broken(chat_id, text, delay=0):
+                    raise ConnectionError('disk full')
+                queue.enqueue = broken
+                response = await handler.handle_yookassa_webhook(FakeRequest({
+                    'event': 'payment.canceled',
+                    'object': {'id': 'pay-2', 'metadata': {'user_id': '42'}}
+                }))
+                assert response.status == 500
+            finally:
+                webhook.db = default_db
+
+def main():
+    print("🧪 Testing notification queue...\n")
+    for test in (test_chat_spacing_and_flood_wait, test_failures_are_retried_or_dropped,
+                 test_queued_messages_survive_a_restart, test_webhook_answers_before_sending,
+                 test_webhook_redelivery):
+        test()
+        print(f"✅ {test.__name__}")
+
+if __name__ == "__main__":
+    main()
@@ -168,6 +168,8 @@ async def main():
         print(f"\n❌ Test error: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        await db.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
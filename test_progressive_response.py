@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Tests for progressive translation replies: the provider result is sent
+first and the GPT-enhanced version is edited into the same message
+"""
+
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add bot directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+
+from config import config
+from bot.services.circuit_breaker import provider_breakers
+from bot.services.translator import TranslatorService
+from bot.utils.progressive import ProgressiveMessage
+
+PROVIDER_DELAY = 0.05
+GPT_DELAY = 0.4
+
+class FakeSentMessage:
+    def __init__(self, log, fail_with=None):
+        self.log = log
+        self.fail_with = list(fail_with or [])
+
+    async def edit_text(self, text, parse_mode=None, reply_markup=None):
+        if self.fail_with:
+            raise self.fail_with.pop(0)
+        self.log.append(('edit', text, reply_markup, time.monotonic()))
+
+class FakeMessage:
+    """Records answer() and the edits of the answered message"""
+
+    def __init__(self, fail_with=None):
+        self.log = []
+        self.sent = FakeSentMessage(self.log, fail_with)
+
+    async def answer(self, text, parse_mode=None, reply_markup=None):
+        self.log.append(('answer', text, reply_markup, time.monotonic()))
+        return self.sent
+
+def make_service() -> TranslatorService:
+    config.OPENAI_API_KEY = 'sk-test'
+    config.DEEPL_API_KEY = None
+    config.YANDEX_API_KEY = None
+    config.ADAPTIVE_PROVIDER_ORDER = False
+    config.TRANSLATION_STRATEGY = 'sequential'
+    provider_breakers.clear()
+
+    async def google(text, target_lang, source_lang=None):
+        await asyncio.sleep(PROVIDER_DELAY)
+        return f"basic:{text}"
+
+    async def enhance(original, translated, target_lang, style='informal',
+                      explain_grammar=False, user_id=None):
+        await asyncio.sleep(GPT_DELAY)
+        return {'enhanced_translation': f"styled:{original}", 'alternatives': ['alt'],
+                'explanation': '', 'grammar': 'грамматика', 'synonyms': []}
+
+    service = TranslatorService(cache=None)
+    service.translate_with_google = google
+    service.enhance_with_gpt = enhance
+    return service
+
+def run_progressive_translation():
+    """(seconds to the basic reply, seconds to the enhanced edit)"""
+    async def run():
+        service = make_service()
+        message = FakeMessage()
+        reply = ProgressiveMessage(message, interval=0.1)
+
+        async def show_basic(basic, metadata):
+            assert 'enhanced_translation' not in metadata
+            await reply.show(f"pending {basic}")
+
+        started = time.monotonic()
+        translated, metadata = await service.translate(
+            "hello", 'ru', source_lang='en', enhance=True, explain_grammar=True,
+            on_basic=show_basic
+        )
+        await reply.show(f"final {translated}", reply_markup='keyboard', final=True)
+
+        (kind1, text1, _, at1), (kind2, text2, markup, at2) = message.log
+        assert (kind1, text1) == ('answer', 'pending basic:hello')
+        assert (kind2, text2, markup) == ('edit', 'final styled:hello', 'keyboard')
+        assert metadata['basic_translation'] == 'basic:hello'
+        # The user sees something after the provider call, not after GPT
+        assert at1 - started < PROVIDER_DELAY + 0.1
+        assert at2 - started >= PROVIDER_DELAY + GPT_DELAY
+        return at1 - started, at2 - started
+    return asyncio.run(run())
+
+def test_basic_reply_arrives_before_enhancement():
+    run_progressive_translation()
+
+def test_joined_callers_get_their_own_basic_reply():
+    async def run():
+        service = make_service()
+        shown = {}
+        done = {}
+
+        def show_basic(name, delay):
+            async def show(basic, metadata):
+                await asyncio.sleep(delay)   # a slow Telegram edit
+                shown[name] = basic
+            return show
+
+        async def caller(name, delay):
+            await service.translate("shared", 'ru', source_lang='en', enhance=True,
+                                    on_basic=show_basic(name, delay))
+            done[name] = time.monotonic()
+
+        started = time.monotonic()
+        await asyncio.gather(caller('first', GPT_DELAY * 2), caller('second', 0))
+        assert shown == {'first': 'basic:shared', 'second': 'basic:shared'}
+        # The second caller doesn't wait for the first one's edit
+        assert done['second'] - started < PROVIDER_DELAY + GPT_DELAY + 0.15
+        assert done['first'] - started >= PROVIDER_DELAY + GPT_DELAY * 2
+    asyncio.run(run())
+
+def test_edits_are_throttled():
+    async def run():
+        message = FakeMessage()
+        reply = ProgressiveMessage(message, interval=0.2)
+
+        await reply.show("v1")
+        for i in range(5):
+            await reply.show(f"partial {i}")     # too soon - dropped
+        started = time.monotonic()
+        await reply.show("v2", final=True)      # waits out the interval
+        waited = time.monotonic() - started
+
+        assert [entry[1] for entry in message.log] == ["v1", "v2"]
+        assert reply.skipped == 5 and reply.edits == 1
+        assert 0.1 < waited < 0.3
+    asyncio.run(run())
+
+def test_edit_errors():
+    async def run():
+        message = FakeMessage(fail_with=[
+            TelegramRetryAfter(method=None, message="Too Many Requests", retry_after=0),
+            TelegramBadRequest(method=None, message="Bad Request: message is not modified")
+        ])
+        reply = ProgressiveMessage(message, interval=0)
+        await reply.show("v1")
+        await reply.show("v2", final=True)      # rate limited, then not modified
+        await reply.show("v3", final=True)
+        assert [entry[1] for entry in message.log] == ["v1", "v3"]
+    asyncio.run(run())
+
+def test_failed_enhancement_keeps_the_basic_translation():
+    from bot.handlers.base import format_translation_response
+
+    async def run():
+        service = make_service()
+        user_info = {'interface_language': 'ru', 'is_premium': True}
+        metadata = {'basic_translation': 'basic:hello', 'source_lang': 'en',
+                    'target_lang': 'ru', 'style': 'informal'}
+        pending = await format_translation_response(service, user_info, metadata, 'basic:hello',
+                                                    True, pending=True)
+        kept = await format_translation_response(service, user_info, metadata, 'basic:hello',
+                                                 True, basic_only=True)
+        assert 'Улучшаю перевод' in pending
+        assert 'basic:hello' in kept and 'Улучшаю перевод' not in kept
+        assert 'Стилизованный' not in kept
+    asyncio.run(run())
+
+def main():
+    print("🧪 Testing progressive translation replies...\n")
+    basic_at, final_at = run_progressive_translation()
+    print(f"✅ basic reply after {basic_at * 1000:.0f} ms, enhanced edit after {final_at * 1000:.0f} ms")
+    for test in (test_joined_callers_get_their_own_basic_reply, test_edits_are_throttled,
+                 test_edit_errors, test_failed_enhancement_keeps_the_basic_translation):
+        test()
+        print(f"✅ {test.__name__}")
+
+if __name__ == "__main__":
+    main()
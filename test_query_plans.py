@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Query plan check: fails if a hot query starts scanning a whole table.
+Run directly or via pytest.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add bot directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from bot.database import Database, MIGRATIONS
+from config import config
+
+# Hot queries as issued by Database, with sample parameters
+HOT_QUERIES = {
+    'get_user': ('''
+        SELECT u.*, s.auto_voice, s.save_history, s.notifications_enabled,
+               s.voice_speed, s.voice_type
+        FROM users u
+        LEFT JOIN user_settings s ON u.user_id = s.user_id
+        WHERE u.user_id = ?
+    ''', (1,)),
+    'get_user_history': ('''
+        SELECT * FROM translation_history
+        WHERE user_id = ?
+        ORDER BY created_at DESC
+        LIMIT ?
+    ''', (1, 10)),
+    'prune_history': ('''
+        DELETE FROM translation_history
+        WHERE user_id = ? AND id NOT IN (
+            SELECT id FROM translation_history
+            WHERE user_id = ?
+            ORDER BY created_at DESC
+            LIMIT ?
+        )
+    ''', (1, 1, config.MAX_HISTORY_ITEMS)),
+    'clear_history': ('''
+        DELETE FROM translation_history WHERE user_id = ?
+    ''', (1,)),
+    'statistics_days': ('''
+        SELECT date, total_users, new_users, active_users, premium_users,
+               total_translations, voice_translations, payments, revenue
+        FROM statistics
+        WHERE date >= ? AND date <= ?
+        ORDER BY date
+    ''', ('2024-01-01', '2024-01-07')),
+    'statistics_active_users': ('''
+        SELECT COUNT(*) FROM daily_active_users WHERE date = ?
+    ''', ('2024-01-01',)),
+    'premium_users': ('''
+        SELECT COUNT(*) FROM users
+        WHERE is_premium = 1 AND (premium_until IS NULL OR premium_until > ?)
+    ''', ('2024-01-01 00:00:00',)),
+    'subscription_by_payment': ('''
+        SELECT id FROM subscriptions WHERE payment_id = ?
+    ''', ('pay-1',)),
+    'outbound_due': ('''
+        SELECT id FROM outbound_messages
+        WHERE next_attempt_at <= ?
+        ORDER BY next_attempt_at LIMIT ?
+    ''', (1700000000.0, 50)),
+}
+
+async def collect_plans(db_path: str):
+    """Initialize a fresh database and return EXPLAIN QUERY PLAN rows per query"""
+    db = Database(db_path)
+    await db.init()
+
+    plans = {}
+    async with db.pool.acquire() as conn:
+        for name, (query, params) in HOT_QUERIES.items():
+            cursor = await conn.execute(f'EXPLAIN QUERY PLAN {query}', params)
+            plans[name] = [row[3] for row in await cursor.fetchall()]
+
+        cursor = await conn.execute('PRAGMA journal_mode')
+        journal_mode = (await cursor.fetchone())[0]
+        cursor = await conn.execute('PRAGMA user_version')
+        user_version = (await cursor.fetchone())[0]
+
+    await db.close()
+    return plans, journal_mode, user_version
+
+def find_problems(plans):
+    """Return a list of full scans and sorts that an index should have avoided"""
+    problems = []
+    for name, details in plans.items():
+        for detail in details:
+            # "SCAN <table>" is a full table (or full index) walk; "SEARCH" is fine
+            if detail.startswith('SCAN '):
+                problems.append(f"{name}: {detail}")
+            elif 'TEMP B-TREE' in detail:
+                problems.append(f"{name}: {detail}")
+    return problems
+
+def test_hot_queries_use_indexes():
+    with tempfile.TemporaryDirectory() as tmp:
+        plans, journal_mode, user_version = asyncio.run(
+            collect_plans(os.path.join(tmp, 'plans.db'))
+        )
+
+    assert journal_mode == 'wal', f"journal_mode is {journal_mode}"
+    assert user_version == MIGRATIONS[-1][0], f"user_version is {user_version}"
+
+    problems = find_problems(plans)
+    assert not problems, "Full scans in hot queries:\n" + "\n".join(problems)
+
+def main():
+    print("🧪 Checking query plans of hot queries...")
+    with tempfile.TemporaryDirectory() as tmp:
+        plans, journal_mode, user_version = asyncio.run(
+            collect_plans(os.path.join(tmp, 'plans.db'))
+        )
+
+    for name, details in plans.items():
+        print(f"\n📝 {name}:")
+        for detail in details:
+            print(f"   {detail}")
+
+    print(f"\n📊 journal_mode={journal_mode}, schema version={user_version}")
+
+    problems = find_problems(plans)
+    if problems:
+        print("\n❌ Full scans detected:")
+        for problem in problems:
+            print(f"   {problem}")
+        sys.exit(1)
+
+    print("\n✅ All hot queries use indexes")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Tests for the daily quota engine (Database.quota): no overshoot under
+concurrent reservations, refunds, day rollover, premium expiry and the
+write-behind total_translations counter
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add bot directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from bot.database import Database
+from testing_helpers import async_test, make_db, override_config, temp_db
+
+LIMIT = 5
+
+async def fetch_user(db: Database, user_id: int):
+    async with db.pool.acquire() as conn:
+        cursor = await conn.execute('''
+            SELECT free_translations_today, last_translation_date, total_translations, is_premium
+            FROM users WHERE user_id = ?
+        ''', (user_id,))
+        return tuple(await cursor.fetchone())
+
+@async_test
+async def test_concurrent_reservations_never_overshoot():
+    with override_config(FREE_DAILY_LIMIT=LIMIT), tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'quota.db')
+        # Two Database objects on one file stand in for two bot processes
+        first, second = await make_db(path, pool_size=4), await make_db(path, pool_size=4)
+        try:
+            await first.add_user(1, 'user')
+            reservations = await asyncio.gather(*(
+                (first if i % 2 else second).quota.reserve(1) for i in range(40)
+            ))
+            allowed = [r for r in reservations if r.allowed]
+            assert len(allowed) == LIMIT
+            assert sorted(r.remaining for r in allowed) == list(range(LIMIT))
+            assert (await fetch_user(first, 1))[0] == LIMIT
+
+            # Out-of-quota users are refused from memory afterwards
+            cached = first.quota.refused_cached
+            assert not (await first.quota.reserve(1)).allowed
+            assert first.quota.refused_cached == cached + 1
+        finally:
+            await first.close()
+            await second.close()
+
+@async_test
+async def test_refund_returns_the_unit():
+    with override_config(FREE_DAILY_LIMIT=LIMIT):
+        async with temp_db(pool_size=4) as db:
+            await db.add_user(1, 'user')
+            reservations = [await db.quota.reserve(1) for _ in range(LIMIT)]
+            assert not (await db.quota.reserve(1)).allowed
+
+            await db.quota.refund(reservations[-1])
+            assert (await fetch_user(db, 1))[0] == LIMIT - 1
+            retry = await db.quota.reserve(1)
+            assert retry.allowed and retry.remaining == 0
+
+            # Unknown users are refused
+            assert not (await db.quota.reserve(999)).allowed
+
+@async_test
+async def test_new_day_and_premium():
+    with override_config(FREE_DAILY_LIMIT=LIMIT):
+        async with temp_db(pool_size=4) as db:
+            await db.add_user(1, 'yesterday')
+            await db.add_user(2, 'premium')
+            await db.add_user(3, 'expired')
+            yesterday = (datetime.now().date() - timedelta(days=1)).isoformat()
+            async with db.pool.acquire() as conn:
+                await conn.execute('''
+                    UPDATE users SET free_translations_today = ?, last_translation_date = ?
+                    WHERE user_id = 1
+                ''', (LIMIT, yesterday))
+                await conn.execute('UPDATE users SET is_premium = 1, premium_until = ? WHERE user_id = 2',
+                                   (datetime.now() + timedelta(days=30),))
+                await conn.execute('UPDATE users SET is_premium = 1, premium_until = ? WHERE user_id = 3',
+                                   (datetime.now() - timedelta(days=1),))
+                await conn.commit()
+
+            reservation = await db.quota.reserve(1)
+            assert reservation.allowed and reservation.remaining == LIMIT - 1
+
+            premium = await db.quota.reserve(2)
+            assert premium.allowed and premium.remaining == -1 and not premium.charged
+            assert (await fetch_user(db, 2))[0] == 0
+            # Further messages are passed on the cached profile, without a write
+            assert (await db.quota.reserve(2)).allowed
+            assert db.quota.premium_cached == 2 and db.quota.reserved == 1
+
+            expired = await db.quota.reserve(3)
+            assert expired.allowed and expired.charged
+            assert (await fetch_user(db, 3))[3] == 0
+
+@async_test
+async def test_totals_are_written_behind():
+    with override_config(FREE_DAILY_LIMIT=LIMIT), tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'quota.db')
+        db = await make_db(path, pool_size=4)
+        db.quota.flush_interval = 0.05
+        try:
+            await db.add_user(1, 'user')
+            for _ in range(3):
+                await db.quota.reserve(1)
+                db.quota.commit(1)
+
+            assert (await fetch_user(db, 1))[2] == 0
+            assert (await db.get_user(1))['total_translations'] == 3
+
+            await asyncio.sleep(0.1)
+            assert (await fetch_user(db, 1))[2] == 3
+            assert db.quota.flushes == 1
+
+            db.quota.commit(1)
+            await db.close()  # flushes what is left
+            db = await make_db(path, pool_size=4)
+            assert (await fetch_user(db, 1))[2] == 4
+        finally:
+            await db.close()
+
+def main():
+    print("🧪 Testing quota engine...\n")
+    for test in (test_concurrent_reservations_never_overshoot, test_refund_returns_the_unit,
+                 test_new_day_and_premium, test_totals_are_written_behind):
+        test()
+        print(f"✅ {test.__name__}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tests for the token-bucket rate limiter (bot.utils.rate_limit): refill,
+timing-wheel expiry, the @rate_limit decorator and ThrottlingMiddleware
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add bot directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from aiogram.types import Message
+
+from bot.middlewares.throttling import ThrottlingMiddleware
+from bot.utils import rate_limit as rate_limit_module
+from bot.utils.rate_limit import MemoryBackend, RateLimiter, rate_limit
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+def test_bucket_refills():
+    clock = FakeClock()
+    backend = MemoryBackend(timer=clock)
+    results = [backend.hit_now("k", 3, 30, clock()) for _ in range(4)]
+    assert [result.allowed for result in results] == [True, True, True, False]
+    assert results[-1].retry_after == 10.0
+
+    clock.now += 10  # one token back
+    assert backend.hit_now("k", 3, 30, clock()).allowed
+    assert not backend.hit_now("k", 3, 30, clock()).allowed
+
+def test_full_buckets_expire():
+    clock = FakeClock()
+    backend = MemoryBackend(timer=clock)
+    for user in range(1000):
+        backend.hit_now(f"u{user}", 10, 60, clock())
+    assert len(backend) == 1000
+
+    # Keeps u0 busy while the others refill (6 s for one token)
+    for _ in range(5):
+        clock.now += 2
+        backend.hit_now("u0", 10, 60, clock())
+    assert len(backend) == 1
+    assert backend.stats()['expired'] == 999
+
+    clock.now += 3600  # long idle period
+    backend.hit_now("u1", 10, 60, clock())
+    assert len(backend) == 1 and backend.stats()['wheel_slots'] == 1
+
+def test_decorator_and_middleware():
+    async def run():
+        limiter = RateLimiter(MemoryBackend())
+        original = rate_limit_module.rate_limiter
+        rate_limit_module.rate_limiter = limiter
+        try:
+            replies = []
+            handled = []
+
+            async def reply(text):
+                replies.append(text)
+
+            message = SimpleNamespace(from_user=SimpleNamespace(id=1), reply=reply)
+
+            @rate_limit(key='translation', rate=2, per=60)
+            async def handler(event):
+                handled.append(event)
+
+            for _ in range(3):
+                await handler(message)
+            assert len(handled) == 2 and len(replies) == 1
+
+            middleware = ThrottlingMiddleware(rate=1, per=60, limiter=limiter)
+            message = Message.model_construct(from_user=SimpleNamespace(id=1))
+
+            async def inner(event, data):
+                return 'ok'
+
+            assert await middleware(inner, message, {}) == 'ok'
+            assert await middleware(inner, message, {}) is None
+        finally:
+            rate_limit_module.rate_limiter = original
+    asyncio.run(run())
+
+def main():
+    print("🧪 Testing rate limiter...\n")
+    for test in (test_bucket_refills, test_full_buckets_expire, test_decorator_and_middleware):
+        test()
+        print(f"✅ {test.__name__}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Tests for the Redis rate limit backend against a small in-process server
+that speaks the Redis protocol: limits shared between replicas, pipelined
+batches, script reloading and the fallback to local limits
+"""
+
+import asyncio
+import hashlib
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add bot directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from bot.utils.rate_limit import RedisBackend
+
+class FakeRedis:
+    """Just enough of a Redis server for RedisBackend.
+
+    EVALSHA of the token bucket script runs a Python copy of it, so the
+    tests check the backend's protocol use, not the Lua itself.
+    """
+
+    def __init__(self):
+        self.hashes = {}
+        self.scripts = set()
+        self.commands = []
+        self._server = None
+        self._writers = set()
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._serve, '127.0.0.1', 0)
+        port = self._server.sockets[0].getsockname()[1]
+        return f"redis://127.0.0.1:{port}/0"
+
+    async def stop(self):
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        await self._server.wait_closed()
+
+    async def _serve(self, reader, writer):
+        self._writers.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                args = []
+                for _ in range(int(line[1:])):
+                    size = int((await reader.readline())[1:])
+                    args.append((await reader.readexactly(size + 2))[:-2].decode())
+                writer.write(self._encode(self._execute(args)))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def _execute(self, args):
+        command = args[0].upper()
+        self.commands.append(command)
+        if command in ('PING', 'CLIENT', 'SELECT'):
+            return 'OK'
+        if command == 'SCRIPT' and args[1].upper() == 'LOAD':
+            sha = hashlib.sha1(args[2].encode('utf-8')).hexdigest()
+            self.scripts.add(sha)
+            return sha.encode()
+        if command == 'SCRIPT' and args[1].upper() == 'FLUSH':
+            self.scripts.clear()
+            return 'OK'
+        if command == 'HMGET':
+            state = self.hashes.get(args[1], {})
+            return [state.get(field, '').encode() or None for field in args[2:]]
+        if command == 'EVALSHA':
+            if args[1] not in self.scripts:
+                return Exception('NOSCRIPT No matching script. Please use EVAL.')
+            return self._token_bucket(args[3], float(args[4]), float(args[5]))
+        return Exception(f"ERR unknown command '{command}'")
+
+    def _token_bucket(self, key, rate, per):
+        now = time.time()
+        refill = rate / per
+        state = self.hashes.get(key)
+        tokens = rate
+        if state:
+            tokens = min(rate, float(state['tokens']) + (now - float(state['ts'])) * refill)
+        allowed = 0
+        if tokens >= 1:
+            tokens -= 1
+            allowed = 1
+        self.hashes[key] = {'tokens': repr(tokens), 'ts': repr(now)}
+        return [allowed, repr(tokens).encode(), repr((rate - tokens) / refill).encode()]
+
+    @staticmethod
+    def _encode(value) -> bytes:
+        if value is None:
+            return b'$-1\r\n'
+        if isinstance(value, Exception):
+            return f"-{value}\r\n".encode()
+        if isinstance(value, str):
+            return f"+{value}\r\n".encode()
+        if isinstance(value, int):
+            return f":{value}\r\n".encode()
+        if isinstance(value, bytes):
+            return b'$%d\r\n%s\r\n' % (len(value), value)
+        return b'*%d\r\n' % len(value) + b''.join(FakeRedis._encode(item) for item in value)
+
+def make_backend(url: str, **kwargs) -> RedisBackend:
+    return RedisBackend(url=url, prefix='rl:', window=0.002, max_batch=64, timeout=0.25, **kwargs)
+
+def test_replicas_share_limits():
+    async def run():
+        server = FakeRedis()
+        url = await server.start()
+        first, second = make_backend(url), make_backend(url)
+        try:
+            results = [await backend.hit("user:1", 4, 60)
+                       for backend in (first, second, first, second, first)]
+            assert [result.allowed for result in results] == [True, True, True, True, False]
+            assert results[-1].retry_after > 0
+            assert not (await second.peek("user:1", 4, 60)).allowed
+            assert (await second.peek("user:2", 4, 60)).remaining == 4
+            assert 'rl:user:1' in server.hashes
+            assert first.fallback_hits == second.fallback_hits == 0
+        finally:
+            await first.close()
+            await second.close()
+            await server.stop()
+    asyncio.run(run())
+
+def test_concurrent_hits_share_a_pipeline():
+    async def run():
+        server = FakeRedis()
+        url = await server.start()
+        backend = make_backend(url)
+        try:
+            results = await asyncio.gather(*(backend.hit(f"user:{i % 10}", 5, 60) for i in range(100)))
+            assert sum(result.allowed for result in results) == 50
+            assert backend.round_trips <= 3
+            assert backend.stats()['avg_batch'] >= 30
+
+            # Script cache flushed (e.g. Redis restarted) - reloaded on the next call
+            server.scripts.clear()
+            assert not (await backend.hit("user:1", 5, 60)).allowed
+            assert (await backend.hit("user:new", 5, 60)).allowed
+            assert server.commands.count('SCRIPT') == 2
+            assert backend.fallback_hits == 0
+        finally:
+            await backend.close()
+            await server.stop()
+    asyncio.run(run())
+
+def test_falls_back_to_local_limits():
+    async def run():
+        server = FakeRedis()
+        url = await server.start()
+        backend = make_backend(url)
+        try:
+            assert (await backend.hit("user:1", 2, 60)).allowed
+            await server.stop()
+
+            results = [await backend.hit("user:1", 2, 60) for _ in range(4)]
+            # Local buckets start full: this process alone still gets 2
+            assert [result.allowed for result in results] == [True, True, False, False]
+            assert backend.breaker.state == 'open'
+            assert backend.fallback_hits == 4
+            assert backend.round_trips == 3  # open after 2 of 3 calls failed, then Redis is skipped
+            assert (await backend.peek("user:1", 2, 60)).remaining == 0
+        finally:
+            await backend.close()
+    asyncio.run(run())
+
+def main():
+    print("🧪 Testing Redis rate limit backend...\n")
+    for test in (test_replicas_share_limits, test_concurrent_hits_share_a_pipeline,
+                 test_falls_back_to_local_limits):
+        test()
+        print(f"✅ {test.__name__}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for the translation session store (bot.services.session_store):
+compact payloads, LRU/TTL memory backend, persistent SQLite backend and
+lookups by message_id with a fallback to the latest translation
+"""
+
+import asyncio
+import sys
+import tempfile
+from pathlib import Path
+
+# Add bot directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from bot.services.session_store import (
+    MemorySessionBackend, SQLiteSessionBackend, SessionStore, pack, unpack
+)
+
+def make_metadata(i: int) -> dict:
+    return {
+        'original_text': f"Сегодня отличная погода, пойдём гулять в парк {i}",
+        'basic_translation': f"The weather is great today, let's go for a walk in the park {i}",
+        'enhanced_translation': f"Lovely weather today - fancy a walk in the park? {i}",
+        'alternatives': ["It's a beautiful day, let's go to the park", "Great weather - park time?"],
+        'explanation': 'Неформальный стиль: разговорные обороты и вопросительная форма.',
+        'grammar': 'Let\'s + инфинитив без to выражает предложение сделать что-то вместе.',
+        'source_lang': 'ru',
+        'target_lang': 'en',
+        'style': 'informal',
+        'provider': 'deepl',       # not needed by the callbacks - dropped
+        'synonyms': []
+    }
+
+def test_pack_roundtrip():
+    metadata = make_metadata(1)
+    restored = unpack(pack(metadata))
+    assert restored['alternatives'] == metadata['alternatives']
+    assert restored['grammar'] == metadata['grammar']
+    assert 'provider' not in restored
+    assert unpack(pack({'basic_translation': 'hi'})) == {'basic_translation': 'hi'}
+
+def test_memory_backend_lru_and_ttl():
+    async def run():
+        store = SessionStore(MemorySessionBackend(maxsize=3, ttl=0.2))
+        for message_id in range(1, 5):
+            await store.save(7, message_id, make_metadata(message_id))
+
+        # Message 1 was evicted; the others are found by message_id
+        assert (await store.get(7, 4))['original_text'].endswith('4')
+        assert (await store.get(7, 2))['original_text'].endswith('2')
+        # Unknown message falls back to the latest translation
+        assert (await store.get(7, 1))['original_text'].endswith('4')
+        assert store.hits == 2 and store.fallbacks == 1
+        assert await store.get(8, 1) == {}
+
+        await asyncio.sleep(0.25)
+        assert await store.get(7, 4) == {}
+        assert store.stats()['bytes'] > 0
+    asyncio.run(run())
+
+def test_sqlite_backend_survives_restart():
+    async def run():
+        path = str(Path(tempfile.mkdtemp()) / 'sessions.db')
+        store = SessionStore(SQLiteSessionBackend(path, ttl=60))
+        await store.save(7, 10, make_metadata(10))
+        await store.save(7, 11, make_metadata(11))
+        await store.close()
+
+        reopened = SessionStore(SQLiteSessionBackend(path, ttl=60))
+        assert (await reopened.get(7, 10))['original_text'].endswith('10')
+        assert (await reopened.get(7, 999))['original_text'].endswith('11')
+        await reopened.backend.purge_expired()
+        assert reopened.stats()['entries'] == 2
+        await reopened.close()
+    asyncio.run(run())
+
+def measure_memory(count: int = 10000):
+    """(bytes held by the old dict-per-user approach, bytes in the memory backend)"""
+    import tracemalloc
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    plain = {user_id: make_metadata(user_id) for user_id in range(count)}
+    plain_bytes = tracemalloc.get_traced_memory()[0] - before
+    del plain
+
+    async def fill():
+        backend = MemorySessionBackend(maxsize=count, ttl=60)
+        for user_id in range(count):
+            await backend.set(user_id, 1, pack(make_metadata(user_id)))
+        return backend
+
+    before = tracemalloc.get_traced_memory()[0]
+    backend = asyncio.run(fill())
+    packed_bytes = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return plain_bytes, packed_bytes, backend.stats()['bytes']
+
+def main():
+    print("🧪 Testing translation session store...\n")
+    for test in (test_pack_roundtrip, test_memory_backend_lru_and_ttl,
+                 test_sqlite_backend_survives_restart):
+        test()
+        print(f"✅ {test.__name__}")
+
+    plain, packed, payload = measure_memory()
+    print(f"\n📊 10000 sessions: metadata dicts {plain / 1024:.0f} KiB, "
+          f"memory backend {packed / 1024:.0f} KiB (payloads {payload / 1024:.0f} KiB)")
+
+if __name__ == "__main__":
+    main()
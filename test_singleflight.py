@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Stress test for request coalescing: a burst of identical concurrent
+translate() calls must reach the provider and GPT exactly once
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add bot directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from config import config
+from bot.services.translation_cache import TranslationCache
+from bot.services.translator import TranslatorService, translation_flights
+
+BURST = 50
+
+class CountingProviders:
+    """Slow fake DeepL + GPT that count how often they are actually called"""
+
+    def __init__(self):
+        self.translations = 0
+        self.enhancements = 0
+
+    async def translate_with_deepl(self, text, target_lang, source_lang=None):
+        self.translations += 1
+        await asyncio.sleep(0.05)
+        return f"[{target_lang}] {text}"
+
+    async def enhance(self, original_text, translated_text, target_lang,
+                      style='informal', explain_grammar=False, user_id=None):
+        self.enhancements += 1
+        await asyncio.sleep(0.05)
+        return {
+            'enhanced_translation': translated_text + '!',
+            'alternatives': ['a', 'b'],
+            'explanation': '',
+            'grammar': ''
+        }
+
+async def run_burst(cache):
+    fake = CountingProviders()
+    config.DEEPL_API_KEY = 'test'
+    config.OPENAI_API_KEY = 'sk-test'
+    config.TRANSLATION_STRATEGY = 'sequential'
+
+    service = TranslatorService(cache=cache)
+    service.translate_with_deepl = fake.translate_with_deepl
+    service._enhance_with_gpt = fake.enhance
+    results = await asyncio.gather(*[
+        service.translate("Hello, world", "ru", source_lang="en", enhance=True, user_id=i)
+        for i in range(BURST)
+    ])
+
+    translated = {text for text, _ in results}
+    assert translated == {"[ru] Hello, world!"}, translated
+    assert fake.translations == 1, f"provider called {fake.translations} times"
+    assert fake.enhancements == 1, f"GPT called {fake.enhancements} times"
+
+    # Every caller owns its metadata
+    results[0][1]['alternatives'].append('mutated')
+    assert results[1][1]['alternatives'] == ['a', 'b']
+    return fake
+
+def test_burst_without_cache():
+    asyncio.run(run_burst(None))
+
+def test_burst_with_cache():
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = TranslationCache(path=os.path.join(tmp, 'cache.db'))
+            try:
+                await run_burst(cache)
+            finally:
+                await cache.close()
+    asyncio.run(run())
+
+def main():
+    print(f"🧪 {BURST} identical concurrent translations\n")
+    test_burst_without_cache()
+    print("✅ Without cache: 1 provider call, 1 GPT call")
+    test_burst_with_cache()
+    print("✅ With cache: 1 provider call, 1 GPT call")
+    print(f"📊 Single-flight: {translation_flights.stats()}")
+
+if __name__ == "__main__":
+    main()
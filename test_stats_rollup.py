@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Tests for the daily statistics rollup (Database.stats): counters from
+events, flushes shared by two processes, and the backfill from the base
+tables
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add bot directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+import aiosqlite
+
+from testing_helpers import async_test, make_db, temp_db
+
+@async_test
+async def test_events_roll_up_into_daily_rows():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'stats.db')
+        # Two Database objects on one file stand in for two bot processes
+        first, second = await make_db(path), await make_db(path)
+        try:
+            for user_id in (1, 2, 3):
+                await first.add_user(user_id, f"user{user_id}")
+            await second.add_user(4, "user4")
+            await first.add_user(1, "user1")  # existing user, not a signup
+
+            for user_id in (1, 1, 2):
+                await first.add_translation_history(user_id, "hi", 'en', "привет", 'ru')
+            await second.add_translation_history(1, "hi", 'en', "привет", 'ru', is_voice=True)
+            await second.activate_subscription(4, 'monthly', 'pay-1', 490)
+
+            await second.stats.flush()
+            stats = await first.get_statistics()
+            assert stats['new_users'] == 4 and stats['total_users'] == 4
+            assert stats['total_translations'] == 4 and stats['voice_translations'] == 1
+            assert stats['active_users'] == 2
+            assert stats['payments'] == 1 and stats['revenue'] == 490
+            assert stats['premium_users'] == 1
+            assert await second.stats.total_users() == 4
+        finally:
+            await first.close()
+            await second.close()
+
+@async_test
+async def test_backfill_rebuilds_past_days():
+    async with temp_db() as db:
+        # Data written before the rollup existed, on two earlier days
+        async with db.pool.acquire() as conn:
+            for user_id, days_ago in ((1, 3), (2, 3), (3, 2)):
+                await conn.execute(
+                    "INSERT INTO users (user_id, created_at) VALUES (?, datetime('now', ?))",
+                    (user_id, f'-{days_ago} days')
+                )
+            for user_id, is_voice in ((1, 0), (1, 1), (2, 0)):
+                await conn.execute('''
+                    INSERT INTO translation_history (user_id, source_text, is_voice, created_at)
+                    VALUES (?, 'x', ?, datetime('now', '-3 days'))
+                ''', (user_id, is_voice))
+            await conn.execute('''
+                INSERT INTO subscriptions (user_id, amount, status, created_at)
+                VALUES (3, 4680, 'active', datetime('now', '-2 days'))
+            ''')
+            await conn.commit()
+
+        assert await db.stats.backfill() == 2
+        # Running it again rebuilds the same rows instead of adding to them
+        assert await db.stats.backfill() == 2
+
+        today = date.today()
+        rows = await db.stats.get_days(today - timedelta(days=3), today)
+        assert [row['new_users'] for row in rows] == [2, 1]
+        assert [row['total_users'] for row in rows] == [2, 3]
+        assert rows[0]['total_translations'] == 3 and rows[0]['voice_translations'] == 1
+        assert rows[0]['active_users'] == 2
+        assert rows[1]['payments'] == 1 and rows[1]['revenue'] == 4680
+
+        assert await db.stats.backfill(since=today - timedelta(days=2)) == 1
+        assert await db.stats.total_users() == 3
+
+@async_test
+async def test_upgrade_backfills_and_counts_webhook_payments():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'stats.db')
+        db = await make_db(path)
+        for user_id in (1, 2, 3):
+            await db.add_user(user_id, f"user{user_id}")
+        await db.close()
+
+        # Back to a schema from before migration 3, with the users kept
+        async with aiosqlite.connect(path) as conn:
+            await conn.execute('DROP TABLE statistics')
+            await conn.execute('DROP TABLE daily_active_users')
+            await conn.execute('DROP INDEX idx_users_premium')
+            await conn.execute('PRAGMA user_version = 2')
+            await conn.commit()
+
+        db = await make_db(path)
+        try:
+            assert await db.stats.total_users() == 3
+
+            await db.activate_subscription(1, 'monthly', 'pay-1', 490)
+            # The webhook for the same payment doesn't count it again
+            for payment_id in ('pay-1', 'pay-2'):
+                await db.update_user_subscription(2, True, 'monthly', time.time() + 86400,
+                                                  payment_id=payment_id, amount=490)
+            stats = await db.get_statistics()
+            assert stats['payments'] == 2 and stats['revenue'] == 980
+
+            # Webhook payments are stored too, once each, so a backfill keeps them
+            await db.stats.flush()
+            await db.stats.backfill()
+            stats = await db.get_statistics()
+            assert stats['payments'] == 2 and stats['revenue'] == 980
+        finally:
+            await db.close()
+
+def main():
+    print("🧪 Testing statistics rollup...\n")
+    for test in (test_events_roll_up_into_daily_rows, test_backfill_rebuilds_past_days,
+                 test_upgrade_backfills_and_counts_webhook_payments):
+        test()
+        print(f"✅ {test.__name__}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Tests for TranslatorService.translate_many: provider batching, input order,
+per-segment fallback and the shared cache/single-flight layer
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add bot directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from config import config
+from bot.services.circuit_breaker import provider_breakers
+from bot.services.translation_cache import TranslationCache
+from bot.services.translator import TranslatorService, pack_batches
+
+class FakeProviders:
+    """DeepL batch endpoint plus single-text Google fallback, counting calls"""
+
+    def __init__(self, fail_marker: str = None):
+        self.fail_marker = fail_marker
+        self.deepl_batches = []
+        self.google_calls = []
+
+    async def deepl_many(self, texts, target_lang, source_lang=None):
+        self.deepl_batches.append(list(texts))
+        await asyncio.sleep(0.02)
+        if self.fail_marker and any(self.fail_marker in text for text in texts):
+            return None
+        return [f"deepl:{text}" for text in texts]
+
+    async def deepl(self, text, target_lang, source_lang=None):
+        result = await self.deepl_many([text], target_lang, source_lang)
+        return result[0] if result else None
+
+    async def google(self, text, target_lang, source_lang=None):
+        self.google_calls.append(text)
+        await asyncio.sleep(0.01)
+        return f"google:{text}"
+
+def make_service(fake: FakeProviders, cache=None) -> TranslatorService:
+    config.DEEPL_API_KEY = 'test'
+    config.YANDEX_API_KEY = None
+    config.OPENAI_API_KEY = None
+    config.ADAPTIVE_PROVIDER_ORDER = False
+    config.TRANSLATION_STRATEGY = 'sequential'
+    provider_breakers.clear()
+
+    service = TranslatorService(cache=cache)
+    service.translate_many_with_deepl = fake.deepl_many
+    service.translate_with_deepl = fake.deepl
+    service.translate_with_google = fake.google
+    return service
+
+def test_pack_batches():
+    assert pack_batches(['a'] * 5, 2, 100) == [[0, 1], [2, 3], [4]]
+    assert pack_batches(['aaaa', 'bbbb', 'cc', 'dddddd'], 10, 6) == [[0], [1, 2], [3]]
+
+def test_batches_and_order():
+    async def run():
+        fake = FakeProviders()
+        service = make_service(fake)
+        texts = [f"segment {i % 100}" for i in range(120)]  # 20 duplicates
+
+        results = await service.translate_many(texts, 'ru', source_lang='en', enhance=False)
+
+        assert [translated for translated, _ in results] == [f"deepl:{text}" for text in texts]
+        assert [metadata['original_text'] for _, metadata in results] == texts
+        assert [len(batch) for batch in fake.deepl_batches] == [50, 50]
+        assert not fake.google_calls
+    asyncio.run(run())
+
+def test_partial_failure_falls_back_per_segment():
+    async def run():
+        fake = FakeProviders(fail_marker='broken')
+        service = make_service(fake)
+        service.BATCH_LIMITS = {'deepl': (3, 1000)}
+        texts = ['one', 'two', 'broken', 'four', 'five', 'six']
+
+        results = await service.translate_many(texts, 'ru', source_lang='en', enhance=False)
+
+        # Only the batch with the failing segment falls back, one segment at a time
+        assert [translated for translated, _ in results] == [
+            'google:one', 'google:two', 'google:broken', 'deepl:four', 'deepl:five', 'deepl:six'
+        ]
+        assert len(fake.google_calls) == 3
+        assert {metadata['provider'] for _, metadata in results} == {'deepl', 'google'}
+    asyncio.run(run())
+
+def test_shares_cache_with_translate():
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = TranslationCache(path=os.path.join(tmp, 'cache.db'))
+            try:
+                fake = FakeProviders()
+                service = make_service(fake, cache)
+
+                await service.translate('hello', 'ru', source_lang='en', enhance=False)
+                results = await service.translate_many(['hello', 'world'], 'ru',
+                                                       source_lang='en', enhance=False)
+                assert [translated for translated, _ in results] == ['deepl:hello', 'deepl:world']
+                assert fake.deepl_batches == [['hello'], ['world']]
+
+                again = await service.translate_many(['world', 'hello'], 'ru',
+                                                     source_lang='en', enhance=False)
+                assert [translated for translated, _ in again] == ['deepl:world', 'deepl:hello']
+                assert len(fake.deepl_batches) == 2
+            finally:
+                await cache.close()
+    asyncio.run(run())
+
+def test_joins_in_flight_translate():
+    async def run():
+        fake = FakeProviders()
+        service = make_service(fake)
+
+        single, many = await asyncio.gather(
+            service.translate('shared', 'ru', source_lang='en', enhance=False),
+            service.translate_many(['shared', 'other'], 'ru', source_lang='en', enhance=False)
+        )
+        assert single[0] == 'deepl:shared'
+        assert [translated for translated, _ in many] == ['deepl:shared', 'deepl:other']
+        assert sorted(map(tuple, fake.deepl_batches)) == [('other',), ('shared',)]
+    asyncio.run(run())
+
+def main():
+    print("🧪 Testing translate_many...\n")
+    for test in (test_pack_batches, test_batches_and_order,
+                 test_partial_failure_falls_back_per_segment,
+                 test_shares_cache_with_translate, test_joins_in_flight_translate):
+        test()
+        print(f"✅ {test.__name__}")
+
+if __name__ == "__main__":
+    main()
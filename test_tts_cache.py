@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for the synthesized speech cache: hits and misses, Telegram
+file_ids, LRU eviction past max_bytes, and the index kept across restarts
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add bot directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from bot.services.tts_cache import TTSCache
+
+def key(text: str) -> str:
+    return TTSCache.make_key(text, 'en', 'gtts')
+
+def test_hit_miss_and_file_id():
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = TTSCache(tmp, max_bytes=1000)
+            assert await cache.get(key("hello")) is None
+
+            await cache.set(key("hello"), b'audio-hello')
+            # Whitespace doesn't change the key
+            assert TTSCache.make_key("  hello ", 'en', 'gtts') == key("hello")
+            assert await cache.get(key("hello")) == {'file_id': None, 'audio': b'audio-hello',
+                                                     'format': 'mp3'}
+
+            cache.remember_file_id(key("hello"), 'tg-file-1')
+            assert await cache.get(key("hello")) == {'file_id': 'tg-file-1', 'audio': None,
+                                                     'format': 'mp3'}
+            assert (await cache.get(key("hello"), need_audio=True))['audio'] == b'audio-hello'
+
+            stats = cache.stats()
+            assert (stats['misses'], stats['disk_hits'], stats['file_id_hits']) == (1, 2, 1)
+    asyncio.run(run())
+
+def test_eviction_and_restart():
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = TTSCache(tmp, max_bytes=250)
+            for name in ('a', 'b', 'c'):
+                await cache.set(key(name), name.encode() * 100)
+            # 300 bytes > 250: the least recently used entry is gone
+            assert await cache.get(key('a')) is None
+            assert cache.evictions == 1 and cache.bytes_total == 200
+            assert not os.path.exists(os.path.join(tmp, f"{key('a')}.mp3"))
+
+            await cache.get(key('b'))              # now 'c' is the oldest
+            cache.remember_file_id(key('b'), 'tg-b')
+            await cache.close()
+
+            restarted = TTSCache(tmp, max_bytes=250)
+            assert (await restarted.get(key('b')))['file_id'] == 'tg-b'
+            # Stitched Opus notes are stored as .ogg and survive the restart too
+            await restarted.set(key('d'), b'OggS' + b'd' * 96)
+            assert await restarted.get(key('c')) is None
+            assert os.path.exists(os.path.join(tmp, f"{key('d')}.ogg"))
+            await restarted.close()
+
+            again = TTSCache(tmp, max_bytes=250)
+            speech = await again.get(key('d'), need_audio=True)
+            assert speech['audio'] == b'OggS' + b'd' * 96 and speech['format'] == 'ogg'
+    asyncio.run(run())
+
+def main():
+    print("🧪 Testing TTS cache...\n")
+    for test in (test_hit_miss_and_file_id, test_eviction_and_restart):
+        test()
+        print(f"✅ {test.__name__}")
+
+if __name__ == "__main__":
+    main()
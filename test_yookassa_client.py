@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Tests for the async YooKassa client against a local stub of the REST API:
+retries reuse the Idempotence-Key, timeouts and 4xx errors, and
+PaymentService on top of it
+"""
+
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+from aiohttp import web
+
+# Add bot directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from bot.services.payment import PaymentService
+from bot.services.yookassa_client import YooKassaClient, YooKassaError
+from config import config
+
+class StubYooKassa:
+    """POST /v3/payments and GET /v3/payments/{id} with scripted failures"""
+
+    def __init__(self):
+        self.payments = {}      # id -> payment
+        self.by_key = {}        # Idempotence-Key -> payment id
+        self.keys = []          # Idempotence-Key of every POST
+        self.failures = []      # responses to give before succeeding: status code or 'slow'
+        self.no_confirmation = False
+        self.runner = None
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_post('/v3/payments', self.create)
+        app.router.add_get('/v3/payments/{payment_id}', self.find)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/v3"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+    async def _scripted_failure(self):
+        if not self.failures:
+            return None
+        failure = self.failures.pop(0)
+        if failure == 'slow':
+            await asyncio.sleep(1)
+            return None
+        return web.json_response({'type': 'error', 'code': 'internal_server_error'}, status=failure)
+
+    async def create(self, request):
+        assert request.headers['Authorization'].startswith('Basic ')
+        key = request.headers['Idempotence-Key']
+        self.keys.append(key)
+        data = await request.json()
+        failure = await self._scripted_failure()
+        if failure is not None:
+            return failure
+
+        if float(data['amount']['value']) <= 0:
+            return web.json_response({'type': 'error', 'code': 'invalid_request',
+                                      'description': 'Invalid amount'}, status=400)
+        if key not in self.by_key:
+            payment_id = f"pay-{len(self.payments) + 1}"
+            self.payments[payment_id] = {
+                'id': payment_id,
+                'status': 'pending',
+                'paid': False,
+                'amount': data['amount'],
+                'description': data['description'],
+                'metadata': data['metadata'],
+                'confirmation': {'type': 'redirect',
+                                 'confirmation_url': f"https://yoomoney.test/{payment_id}"}
+            }
+            if self.no_confirmation:
+                del self.payments[payment_id]['confirmation']
+            self.by_key[key] = payment_id
+        return web.json_response(self.payments[self.by_key[key]])
+
+    async def find(self, request):
+        failure = await self._scripted_failure()
+        if failure is not None:
+            return failure
+        payment = self.payments.get(request.match_info['payment_id'])
+        if payment is None:
+            return web.json_response({'type': 'error', 'code': 'not_found'}, status=404)
+        return web.json_response(payment)
+
+async def with_stub(check):
+    config.YOOKASSA_SHOP_ID, config.YOOKASSA_SECRET_KEY = '123456', 'test_secret'
+    stub = StubYooKassa()
+    url = await stub.start()
+    async with aiohttp.ClientSession() as session:
+        client = YooKassaClient(url, session=session, timeout=0.3, max_retries=3,
+                                backoff=0.01, max_backoff=0.05)
+        try:
+            await check(stub, client)
+        finally:
+            await stub.stop()
+
+def test_retries_reuse_the_idempotence_key():
+    async def check(stub, client):
+        stub.failures = [500, 'slow', 429]
+        payment = await client.create_payment(
+            {'amount': {'value': '490', 'currency': 'RUB'}, 'description': 'test', 'metadata': {}},
+            'key-1'
+        )
+        assert payment['id'] == 'pay-1'
+        assert stub.keys == ['key-1'] * 4 and client.retries == 3
+        assert len(stub.payments) == 1
+
+        stub.failures = [503] * 4
+        try:
+            await client.get_payment('pay-1')
+            assert False, "expected YooKassaError"
+        except YooKassaError as e:
+            assert e.status is None and "4 attempts" in str(e)
+
+        try:
+            await client.get_payment('missing')
+            assert False, "expected YooKassaError"
+        except YooKassaError as e:
+            assert e.status == 404 and e.code == 'not_found'
+    asyncio.run(with_stub(check))
+
+def test_event_loop_keeps_running():
+    async def check(stub, client):
+        stub.failures = ['slow']
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.ensure_future(ticker())
+        started = time.monotonic()
+        await client.create_payment(
+            {'amount': {'value': '490', 'currency': 'RUB'}, 'description': 'test', 'metadata': {}},
+            'key-2'
+        )
+        elapsed = time.monotonic() - started
+        task.cancel()
+        # The slow attempt timed out after 0.3s and the loop kept ticking meanwhile
+        assert 0.3 <= elapsed < 1
+        assert ticks >= 20
+    asyncio.run(with_stub(check))
+
+def test_payment_service_reuses_the_purchase():
+    async def check(stub, client):
+        service = PaymentService(client)
+        first = await service.create_payment(42, 'monthly', 490)
+        again = await service.create_payment(42, 'monthly', 490)
+        other = await service.create_payment(42, 'yearly', 4680)
+        assert first['payment_id'] == again['payment_id'] != other['payment_id']
+        assert first['confirmation_url'].endswith(first['payment_id'])
+        assert first['amount'] == 490.0 and first['currency'] == 'RUB'
+
+        status = await service.check_payment_status(first['payment_id'])
+        assert status['status'] == 'pending' and not status['paid']
+        assert status['metadata']['subscription_type'] == 'monthly'
+
+        # Rejected requests release the key
+        assert await service.create_payment(42, 'monthly', 0) is None
+        assert await service.check_payment_status('missing') is None
+        assert len(set(stub.keys)) == 3
+    asyncio.run(with_stub(check))
+
+def test_finished_payments_are_not_reused():
+    async def check(stub, client):
+        service = PaymentService(client)
+        first = await service.create_payment(7, 'monthly', 490)
+
+        # Canceled on YooKassa's page: the next tap starts a new payment
+        stub.payments[first['payment_id']]['status'] = 'canceled'
+        second = await service.create_payment(7, 'monthly', 490)
+        assert second['payment_id'] != first['payment_id'] and second['status'] == 'pending'
+
+        # Succeeded, reported by the webhook
+        await service.process_webhook({'event': 'payment.succeeded', 'object': {
+            'id': second['payment_id'], 'metadata': {'user_id': '7', 'subscription_type': 'monthly'}
+        }})
+        third = await service.create_payment(7, 'monthly', 490)
+        assert third['payment_id'] not in (first['payment_id'], second['payment_id'])
+
+        # ... or by a status check
+        stub.payments[third['payment_id']]['status'] = 'succeeded'
+        assert (await service.check_payment_status(third['payment_id']))['status'] == 'succeeded'
+        fourth = await service.create_payment(7, 'monthly', 490)
+        assert fourth['payment_id'] != third['payment_id']
+
+        stub.no_confirmation = True
+        assert await service.create_payment(8, 'monthly', 490) is None
+    asyncio.run(with_stub(check))
+
+def main():
+    print("🧪 Testing YooKassa client...\n")
+    for test in (test_retries_reuse_the_idempotence_key, test_event_loop_keeps_running,
+                 test_payment_service_reuses_the_purchase, test_finished_payments_are_not_reused):
+        test()
+        print(f"✅ {test.__name__}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Helpers shared by the test scripts: a fresh database in a temporary
+directory, config overrides that are undone afterwards, and running an
+async test function without a pytest plugin
+"""
+
+import asyncio
+import functools
+import os
+import tempfile
+from contextlib import asynccontextmanager, contextmanager
+
+from bot.database import Database
+from config import config
+
+def async_test(func):
+    """Run an ``async def`` test with asyncio.run (plain pytest and main() alike)"""
+    @functools.wraps(func)
+    def wrapper():
+        asyncio.run(func())
+    return wrapper
+
+async def make_db(path: str, **options) -> Database:
+    """Initialized Database at path; options go to Database()"""
+    db = Database(path, **options)
+    await db.init()
+    return db
+
+@asynccontextmanager
+async def temp_db(**options):
+    """A fresh Database in a temporary directory, closed afterwards"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = await make_db(os.path.join(tmp, 'test.db'), **options)
+        try:
+            yield db
+        finally:
+            await db.close()
+
+@contextmanager
+def override_config(**values):
+    """Set config attributes for the duration of the block, then restore them"""
+    original = {name: getattr(config, name) for name in values}
+    try:
+        for name, value in values.items():
+            setattr(config, name, value)
+        yield
+    finally:
+        for name, value in original.items():
+            setattr(config, name, value)
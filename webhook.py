@@ -14,13 +14,18 @@ from aiohttp.web import Request, Response
 
 from config import config
 from bot.database import db
+from bot.services.notifications import notification_queue
 from bot.services.payment import PaymentService
+from bot.utils.metrics import metrics_handler
 
 logger = logging.getLogger(__name__)
 
 class WebhookHandler:
-    def __init__(self):
+    def __init__(self, notifications=None):
         self.payment_service = PaymentService()
+        # Messages to users are queued and sent by the queue's worker with the
+        # running Bot, so YooKassa gets its answer without waiting for Telegram
+        self.notifications = notifications or notification_queue
 
     async def handle_yookassa_webhook(self, request: Request) -> Response:
         """Handle YooKassa webhook notifications"""
@@ -72,15 +77,20 @@ class WebhookHandler:
 
         subscription_end = datetime.now().timestamp() + (days * 24 * 60 * 60)
 
-        # Update user subscription in database
-        await db.update_user_subscription(
+        # Update user subscription in database; a redelivered payment changes nothing
+        recorded = await db.update_user_subscription(
             user_id=user_id,
             is_premium=True,
             subscription_type=subscription_type,
-            subscription_end=subscription_end
+            subscription_end=subscription_end,
+            payment_id=payment_data['payment_id'],
+            amount=amount
         )
+        if not recorded:
+            logger.info(f"Payment {payment_data['payment_id']} was already processed")
+            return
 
-        # Send notification to user via bot
+        # Queue notification to user
         await self._send_payment_notification(user_id, subscription_type, True)
 
         logger.info(f"Successfully activated {subscription_type} subscription for user {user_id}")
@@ -94,53 +104,45 @@ class WebhookHandler:
         await self._send_payment_notification(user_id, None, False)
 
     async def _send_payment_notification(self, user_id: int, subscription_type: str, success: bool):
-        """Send payment notification to user via bot"""
-        try:
-            from aiogram import Bot
-            from aiogram.exceptions import TelegramForbiddenError, TelegramNotFound
-
-            bot = Bot(token=config.BOT_TOKEN)
-
-            if success:
-                if subscription_type == "monthly":
-                    message = (
-                        "🎉 Поздравляем! Месячная премиум подписка активирована!\n\n"
-                        "✨ Теперь вам доступны все функции:\n"
-                        "• Безлимитные переводы\n"
-                        "• Озвучивание переводов\n"
-                        "• История переводов\n"
-                        "• Экспорт в PDF/TXT\n"
-                        "• Альтернативные переводы\n"
-                        "• Грамматические объяснения\n\n"
-                        "Спасибо за выбор PolyglotAI44! 🚀"
-                    )
-                else:
-                    message = (
-                        "🎉 Поздравляем! Годовая премиум подписка активирована!\n\n"
-                        "✨ Теперь вам доступны все функции:\n"
-                        "• Безлимитные переводы\n"
-                        "• Озвучивание переводов\n"
-                        "• История переводов\n"
-                        "• Экспорт в PDF/TXT\n"
-                        "• Альтернативные переводы\n"
-                        "• Грамматические объяснения\n\n"
-                        "Спасибо за выбор LinguaBot! 🚀\n"
-                        "💰 Вы сэкономили 20% с годовой подпиской!"
-                    )
+        """Queue payment notification to user.
+
+        Errors propagate, so the webhook answers 500 and YooKassa delivers
+        the event again instead of the notification being lost.
+        """
+        if success:
+            if subscription_type == "monthly":
+                message = (
+                    "🎉 Поздравляем! Месячная премиум подписка активирована!\n\n"
+                    "✨ Теперь вам доступны все функции:\n"
+                    "• Безлимитные переводы\n"
+                    "• Озвучивание переводов\n"
+                    "• История переводов\n"
+                    "• Экспорт в PDF/TXT\n"
+                    "• Альтернативные переводы\n"
+                    "• Грамматические объяснения\n\n"
+                    "Спасибо за выбор PolyglotAI44! 🚀"
+                )
             else:
                 message = (
-                    "❌ Платёж был отменён.\n\n"
-                    "Если у вас возникли проблемы с оплатой, "
-                    "попробуйте снова или обратитесь в поддержку."
+                    "🎉 Поздравляем! Годовая премиум подписка активирована!\n\n"
+                    "✨ Теперь вам доступны все функции:\n"
+                    "• Безлимитные переводы\n"
+                    "• Озвучивание переводов\n"
+                    "• История переводов\n"
+                    "• Экспорт в PDF/TXT\n"
+                    "• Альтернативные переводы\n"
+                    "• Грамматические объяснения\n\n"
+                    "Спасибо за выбор LinguaBot! 🚀\n"
+                    "💰 Вы сэкономили 20% с годовой подпиской!"
                 )
+        else:
+            message = (
+                "❌ Платёж был отменён.\n\n"
+                "Если у вас возникли проблемы с оплатой, "
+                "попробуйте снова или обратитесь в поддержку."
+            )
 
-            await bot.send_message(user_id, message)
-            await bot.session.close()
-
-        except (TelegramForbiddenError, TelegramNotFound):
-            logger.warning(f"Cannot send notification to user {user_id} - bot blocked or user not found")
-        except Exception as e:
-            logger.error(f"Error sending notification to user {user_id}: {e}")
+        await self.notifications.enqueue(user_id, message)
 
 def create_webhook_app() -> web.Application:
     """Create webhook application"""
@@ -155,11 +157,20 @@ def create_webhook_app() -> web.Application:
         return web.Response(text="OK")
 
     app.router.add_get('/health', health_check)
+    app.router.add_get('/metrics', metrics_handler)
 
     return app
 
 async def run_webhook_server():
     """Run webhook server"""
+    from aiogram import Bot
+
+    await db.init()
+
+    # One Bot (and HTTP session) for every notification sent by this process
+    bot = Bot(token=config.BOT_TOKEN)
+    notification_queue.start(bot)
+
     app = create_webhook_app()
 
     runner = web.AppRunner(app)
@@ -179,6 +190,9 @@ async def run_webhook_server():
         await asyncio.Future()
     finally:
         await runner.cleanup()
+        await notification_queue.close()
+        await bot.session.close()
+        await db.close()
 
 if __name__ == "__main__":
     logging.basicConfig(